@@ -0,0 +1,54 @@
+"""
+Benchmark du dédoublonnage approximatif (data_cleaning.fuzzy) : des
+identités sont dupliquées avec des fautes de frappe, on mesure le temps et
+la qualité des grappes (grappes mélangeant plusieurs identités, identités
+coupées en plusieurs grappes).
+
+Usage : python -m benchmarks.bench_fuzzy [nb_lignes]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from data_cleaning.fuzzy import fuzzy_clusters
+
+FIRST = ["Jean", "Marie", "Pierre", "Sophie", "Luc", "Camille", "Paul", "Julie", "Louis", "Emma"]
+CITIES = ["Paris", "Lyon", "Marseille", "Lille", "Nantes", "Bordeaux"]
+LETTERS = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+
+
+def make_identities(n_rows: int, dup_rate: float = 0.3, typo_rate: float = 0.5, seed: int = 0) -> pd.DataFrame:
+    """`n_rows` lignes ; `truth` = identité d'origine de chaque ligne."""
+    rng = np.random.default_rng(seed)
+    n_ids = max(1, int(n_rows * (1 - dup_rate)))
+    last = ["".join(w) for w in LETTERS[rng.integers(0, 26, (n_ids, 8))]]
+    first = np.array(FIRST)[rng.integers(0, len(FIRST), n_ids)]
+    names = np.array([f"{f} {l.capitalize()}" for f, l in zip(first, last)], dtype=object)
+    truth = np.concatenate([np.arange(n_ids), rng.integers(0, n_ids, n_rows - n_ids)])
+    values = names[truth].copy()
+    # fautes de frappe sur une partie des copies : une lettre remplacée
+    for i in np.flatnonzero((np.arange(n_rows) >= n_ids) & (rng.random(n_rows) < typo_rate)):
+        text = values[i]
+        pos = rng.integers(1, len(text))
+        values[i] = text[:pos] + LETTERS[rng.integers(0, 26)] + text[pos + 1:]
+    cities = np.array(CITIES)[truth % len(CITIES)]
+    return pd.DataFrame({"nom": values, "ville": cities, "truth": truth})
+
+
+def main(n_rows: int = 100_000):
+    df = make_identities(n_rows)
+    print(f"{n_rows} lignes, {df['truth'].nunique()} identités")
+    for block_on in (None, ["ville"]):
+        start = time.perf_counter()
+        clusters = fuzzy_clusters(df, ["nom"], block_on)
+        elapsed = time.perf_counter() - start
+        pairs = pd.DataFrame({"cluster": clusters, "truth": df["truth"]})
+        impure = int((pairs.groupby("cluster")["truth"].nunique() > 1).sum())
+        split = int((pairs.groupby("truth")["cluster"].nunique() > 1).sum())
+        print(f"blocage={block_on}  {elapsed:.2f} s  grappes={clusters.max() + 1}  "
+              f"mélangées={impure}  identités coupées={split}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,129 @@
+"""
+Benchmark de la normalisation : ancienne version cellule par cellule
+(`apply(clean_text)`) contre le moteur colonne de data_cleaning.normalization,
+puis temps du moteur colonne selon le nombre de valeurs distinctes (cache
+LRU vide, puis rempli par une requête précédente).
+
+Usage : python -m benchmarks.bench_normalization [nb_lignes]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from data_cleaning.normalization import (
+    clean_text, parse_date, clean_text_column, normalize_for_duplicates, text_keys, PROTECTED_COLS,
+)
+from data_cleaning.dates import date_key_column
+
+# L'ancienne analyse des dates est très lente : on la mesure sur moins de lignes
+LEGACY_DATE_ROWS = 20_000
+
+
+def legacy_normalize_for_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """Copie de l'implémentation d'origine, sert de référence."""
+    df_norm = df.copy()
+    for col in df_norm.columns:
+        if col in PROTECTED_COLS:
+            continue
+        if df_norm[col].dtype == object:
+            df_norm[col] = df_norm[col].apply(clean_text)
+        if "date" in col.lower() or "birth" in col.lower() or "nais" in col.lower():
+            df_norm[col] = df_norm[col].apply(parse_date)
+            df_norm[col] = df_norm[col].dt.strftime("%Y-%m-%d")
+            df_norm[col] = df_norm[col].fillna("NULL")
+            continue
+        if pd.api.types.is_numeric_dtype(df_norm[col]):
+            df_norm[col] = pd.to_numeric(df_norm[col], errors="coerce")
+            continue
+        if df_norm[col].dtype == object:
+            df_norm[col] = df_norm[col].apply(clean_text)
+    return df_norm
+
+
+def make_text_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    noms = np.array(["Alice", "  Bob ", "Chloé", "Élodie  Martin", "Jean-Luc", "O'Brien",
+                     "Zoë\tDupont", "François", "李 雷", None], dtype=object)
+    villes = np.array([" Paris ", "Lyon", "Saint-Étienne", "MARSEILLE", "Île-de-France",
+                       "Nice!!", None], dtype=object)
+    return pd.DataFrame({
+        "nom": rng.choice(noms, n_rows),
+        "ville": rng.choice(villes, n_rows),
+        "code": rng.integers(0, 10**6, n_rows).astype(str).astype(object),
+    })
+
+
+def bench_column(series: pd.Series) -> tuple:
+    start = time.perf_counter()
+    legacy = series.apply(clean_text).apply(clean_text)
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = clean_text_column(series, twice=True)
+    t_fast = time.perf_counter() - start
+
+    assert legacy.tolist() == fast.tolist(), f"clés différentes pour {series.name}"
+    return t_legacy, t_fast
+
+
+def make_date_column(n_rows: int, n_distinct: int = 3000, seed: int = 0) -> pd.Series:
+    """Dates de naissance : quelques milliers de valeurs distinctes, formats mélangés."""
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("1940-01-01") + pd.to_timedelta(rng.integers(0, 25000, n_distinct), unit="D")
+    fmts = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%Y%m%d"]
+    distinct = np.array([d.strftime(fmts[i % len(fmts)]) for i, d in enumerate(days)], dtype=object)
+    return pd.Series(rng.choice(distinct, n_rows), name="date_naissance")
+
+
+def bench_dates(n_rows: int) -> tuple:
+    legacy_rows = min(n_rows, LEGACY_DATE_ROWS)
+    series = make_date_column(n_rows)
+
+    start = time.perf_counter()
+    legacy = pd.to_datetime(series[:legacy_rows].apply(parse_date)).dt.strftime("%Y-%m-%d").fillna("NULL")
+    t_legacy = (time.perf_counter() - start) * n_rows / legacy_rows
+
+    start = time.perf_counter()
+    fast = date_key_column(series)
+    t_fast = time.perf_counter() - start
+
+    assert legacy.tolist() == fast[:legacy_rows].tolist(), "clés de dates différentes"
+    return t_legacy, t_fast
+
+
+def bench_cardinality(n_rows: int, distinct: int, seed: int = 0) -> tuple:
+    """(temps cache vide, temps cache rempli) pour une colonne de `distinct` valeurs."""
+    rng = np.random.default_rng(seed)
+    values = np.array([f" Société n°{i}  Île " for i in range(distinct)], dtype=object)
+    series = pd.Series(values[rng.integers(0, distinct, n_rows)])
+    for cache in text_keys.values():
+        cache.clear()
+    times = []
+    for _ in range(2):
+        start = time.perf_counter()
+        clean_text_column(series, twice=True)
+        times.append(time.perf_counter() - start)
+    return tuple(times)
+
+
+def main(n_rows: int = 200_000):
+    df = make_text_frame(n_rows)
+    print(f"{n_rows} lignes")
+    print(f"{'colonne':<10}{'ancien (l/s)':>16}{'colonne (l/s)':>16}{'gain':>8}")
+    for col in df.columns:
+        t_legacy, t_fast = bench_column(df[col])
+        print(f"{col:<10}{n_rows / t_legacy:>16,.0f}{n_rows / t_fast:>16,.0f}{t_legacy / t_fast:>7.1f}x")
+    t_legacy, t_fast = bench_dates(n_rows)
+    print(f"{'date':<10}{n_rows / t_legacy:>16,.0f}{n_rows / t_fast:>16,.0f}{t_legacy / t_fast:>7.1f}x")
+
+    assert legacy_normalize_for_duplicates(df).equals(normalize_for_duplicates(df))
+
+    print(f"\n{'distinctes':<12}{'cache vide (s)':>16}{'cache rempli (s)':>18}")
+    for distinct in (100, 10_000, n_rows // 10, n_rows):
+        cold, warm = bench_cardinality(n_rows, distinct)
+        print(f"{distinct:<12,}{cold:>16.3f}{warm:>18.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
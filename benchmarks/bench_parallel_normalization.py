@@ -0,0 +1,68 @@
+"""
+Benchmark de la normalisation parallèle (dédoublonnage) : courbe du gain
+selon le nombre de processus, contre le chemin séquentiel par tranches.
+
+Usage : python -m benchmarks.bench_parallel_normalization [nb_lignes] [--workers 1 2 4 8 16]
+(par défaut : puissances de 2 jusqu'au nombre de cœurs)
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from data_cleaning.dedup_index import CHUNK_ROWS, row_hashes
+from data_cleaning.normalization import normalize_for_duplicates
+from data_cleaning.parallel_normalization import parallel_row_hashes
+from data_cleaning.workers import WorkerPool
+
+from benchmarks.bench_normalization import make_date_column, make_text_frame
+
+
+def make_frame(n_rows: int):
+    """Colonnes texte, date en texte et numérique, comme un export CRM."""
+    df = make_text_frame(n_rows)
+    df["prenom"] = make_text_frame(n_rows, seed=1)["nom"]
+    df["date_naissance"] = make_date_column(n_rows)
+    df["age"] = np.random.default_rng(0).integers(18, 90, n_rows)
+    return df
+
+
+def serial_hashes(df) -> np.ndarray:
+    return np.concatenate([
+        row_hashes(normalize_for_duplicates(df.iloc[start:start + CHUNK_ROWS]))
+        for start in range(0, len(df), CHUNK_ROWS)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("rows", nargs="?", type=int, default=1_000_000)
+    parser.add_argument("--workers", nargs="+", type=int)
+    args = parser.parse_args()
+    cores = os.cpu_count() or 1
+    counts = args.workers or [2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores]
+
+    df = make_frame(args.rows)
+    start = time.perf_counter()
+    reference = serial_hashes(df)
+    t_serial = time.perf_counter() - start
+    print(f"{args.rows} lignes, {df.shape[1]} colonnes, {cores} cœurs")
+    print(f"{'processus':<12}{'temps (s)':>12}{'lignes/s':>14}{'gain':>8}")
+    print(f"{'séquentiel':<12}{t_serial:>12.2f}{args.rows / t_serial:>14,.0f}{1:>7.1f}x")
+
+    for workers in counts:
+        pool = WorkerPool("process", workers=workers, max_queue=workers * 4)
+        try:
+            parallel_row_hashes(df.iloc[:CHUNK_ROWS], pool=pool)  # démarrage des processus, hors mesure
+            start = time.perf_counter()
+            hashes = parallel_row_hashes(df, pool=pool)
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.shutdown()
+        assert (hashes == reference).all(), f"empreintes différentes avec {workers} processus"
+        print(f"{workers:<12}{elapsed:>12.2f}{args.rows / elapsed:>14,.0f}{t_serial / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark des quartiles IQR : calcul exact colonne par colonne (ancienne
+version), exact en une passe, et esquisses KLL (data_cleaning.sketches) à
+différentes erreurs. L'erreur mesurée est l'écart de rang normalisé au vrai
+quartile.
+
+Usage : python -m benchmarks.bench_quantiles [nb_lignes]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from data_cleaning.bounds import block_quantiles, numeric_block
+
+ERRORS = (0.05, 0.01, 0.002)
+
+
+def quartiles(df: pd.DataFrame, method: str = "exact", error: float = 0.01) -> dict:
+    """Quartiles de toutes les colonnes en un appel (bloc numpy)."""
+    q1, q3 = block_quantiles(numeric_block(df, df.columns), [0.25, 0.75], method, error)
+    return {c: (a, b) for c, a, b in zip(df.columns, q1, q3)}
+
+
+def make_numeric_frame(n_rows: int, n_cols: int = 8, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_cols):
+        col = rng.lognormal(0, 1 + i % 3, n_rows) if i % 2 else rng.normal(100, 15, n_rows)
+        col[rng.random(n_rows) < 0.05] = np.nan
+        data[f"c{i}"] = col
+    return pd.DataFrame(data)
+
+
+def legacy_quartiles(df: pd.DataFrame) -> dict:
+    """Une passe de tri par colonne, comme l'ancienne route /remove-outliers."""
+    return {c: tuple(df[c].quantile([0.25, 0.75])) for c in df.columns}
+
+
+def rank_error(sorted_values: np.ndarray, value: float, q: float) -> float:
+    lo = np.searchsorted(sorted_values, value, side="left") / len(sorted_values)
+    hi = np.searchsorted(sorted_values, value, side="right") / len(sorted_values)
+    return 0.0 if lo <= q <= hi else min(abs(lo - q), abs(hi - q))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(n_rows: int = 1_000_000):
+    df = make_numeric_frame(n_rows)
+    sorted_cols = {c: np.sort(df[c].dropna().to_numpy()) for c in df.columns}
+    print(f"{n_rows} lignes x {df.shape[1]} colonnes")
+    print(f"{'méthode':<16}{'temps (s)':>12}{'erreur de rang max':>22}")
+
+    t_legacy, reference = timed(legacy_quartiles, df)
+    print(f"{'colonne/colonne':<16}{t_legacy:>12.3f}{0:>22.5f}")
+    t_exact, exact = timed(quartiles, df)
+    assert exact == reference
+    print(f"{'exact':<16}{t_exact:>12.3f}{0:>22.5f}")
+
+    for error in ERRORS:
+        t_sketch, approx = timed(quartiles, df, "sketch", error)
+        worst = max(
+            rank_error(sorted_cols[c], value, q)
+            for c, pair in approx.items() for q, value in zip((0.25, 0.75), pair)
+        )
+        print(f"{'sketch ' + str(error):<16}{t_sketch:>12.3f}{worst:>22.5f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
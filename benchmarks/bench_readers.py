@@ -0,0 +1,72 @@
+"""
+Benchmark des moteurs de lecture de load_file (data_cleaning/readers.py).
+
+Pour chaque format (CSV, Excel, JSON), chaque moteur lit le même fichier
+sale de datagen.py ; on note le temps de lecture et l'égalité du DataFrame
+avec celui du moteur pandas (l'ancien chemin). Un moteur non installé est
+signalé comme tel. C'est ce tableau qui fixe l'ordre par défaut des moteurs
+Excel et JSON ; pour le CSV, pandas reste premier (pyarrow ne donne pas
+exactement le même DataFrame sur tous les fichiers, voir readers.py).
+
+Usage : python -m benchmarks.bench_readers [nb_lignes] [--formats csv xlsx json] [--repeat 3]
+"""
+import argparse
+import io
+import time
+
+import pandas as pd
+
+from benchmarks.datagen import EXCEL_MAX_ROWS, make_dirty_frame, write_dataset
+from data_cleaning.readers import ENGINES
+
+KINDS = {"csv": "csv", "xlsx": "excel", "json": "json"}
+
+
+def time_engine(func, content: bytes, repeat: int):
+    """(meilleur temps, DataFrame) ; lève l'erreur du moteur."""
+    best, df = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = func(io.BytesIO(content))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les moteurs de lecture.")
+    parser.add_argument("rows", type=int, nargs="?", default=300_000)
+    parser.add_argument("--formats", nargs="+", choices=list(KINDS), default=list(KINDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_dirty_frame(args.rows)
+    print(f"{'format':<8}{'moteur':<10}{'temps (s)':>11}{'vs pandas':>11}  résultat")
+    for fmt in args.formats:
+        if fmt == "xlsx" and args.rows > EXCEL_MAX_ROWS:
+            continue
+        buffer = io.BytesIO()
+        write_dataset(df, buffer, fmt)
+        content = buffer.getvalue()
+
+        engines = ENGINES[KINDS[fmt]]
+        ref_time, ref = time_engine(engines["pandas"], content, args.repeat)
+        for name, func in engines.items():
+            try:
+                seconds, out = (ref_time, ref) if name == "pandas" else time_engine(func, content, args.repeat)
+            except ImportError as e:
+                print(f"{fmt:<8}{name:<10}{'-':>11}{'-':>11}  non installé ({e})")
+                continue
+            except Exception as e:
+                print(f"{fmt:<8}{name:<10}{'-':>11}{'-':>11}  repli sur le moteur suivant ({e})")
+                continue
+            try:
+                pd.testing.assert_frame_equal(out, ref)
+                same = "identique"
+            except AssertionError as e:
+                same = "DIFFÉRENT : " + str(e).splitlines()[0]
+            print(f"{fmt:<8}{name:<10}{seconds:>11.3f}{ref_time / seconds:>10.2f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
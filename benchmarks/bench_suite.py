@@ -0,0 +1,170 @@
+"""
+Suite de benchmarks de bout en bout, sur les données sales de datagen.py.
+
+Pour chaque taille et chaque format d'entrée :
+- étapes du pipeline en direct : lecture (load_file), normalisation,
+  dédoublonnage, valeurs manquantes, outliers (suivis par le callback
+  `progress` de clean_all), export Excel ;
+- routes appelées via un client ASGI en processus (TestClient), sans
+  réseau : /get-numeric-columns, /deduplicate, /fill-missing,
+  /remove-outliers, /clean-all-and-download.
+Chaque mesure note le temps et le pic de mémoire résidente du processus
+(ru_maxrss, cumulatif : il ne fait que croître au fil des mesures).
+
+Les temps sont comparés à une référence enregistrée (baseline.json) ; une
+mesure plus lente que la référence de plus de `--tolerance` (et de plus de
+MIN_DELTA secondes) est signalée et le script se termine avec le code 1. La
+référence dépend de la machine : l'enregistrer avec `--save` sur la machine
+où l'on compare.
+
+Usage :
+python -m benchmarks.bench_suite [--rows 10000 1000000] [--formats csv xlsx parquet json]
+                                 [--skip-routes] [--compact] [--save] [--tolerance 0.25]
+
+`--compact` charge les données en types compacts (COMPACT_DTYPES, voir
+data_cleaning/compact.py) ; ces mesures ont leur propre référence.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import sys
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from benchmarks.datagen import EXCEL_MAX_ROWS, FORMATS, make_dirty_frame, write_dataset
+from data_cleaning import utils
+from data_cleaning.full_cleaning import clean_all, write_excel
+from data_cleaning.utils import load_file
+from main import app
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SIZES = (10_000, 1_000_000, 10_000_000)
+ROUTES = ("/get-numeric-columns", "/deduplicate", "/fill-missing", "/remove-outliers", "/clean-all-and-download")
+PIPELINE_STAGES = ("normalize", "dedup", "missing", "outliers")
+MIN_DELTA = 0.05  # secondes : en dessous, l'écart est du bruit de mesure
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (ru_maxrss : Ko sous Linux, octets sous macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(results: dict, name: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    out = func(*args, **kwargs)
+    results[name] = {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+    return out
+
+
+def bench_stages(content: bytes, fmt: str, results: dict):
+    """Étapes du pipeline appelées directement, sans passer par HTTP."""
+    upload = SimpleNamespace(file=io.BytesIO(content), filename=f"data.{fmt}")
+    df, _ = measure(results, f"{fmt}:stage:load", load_file, upload)
+
+    # fin de chaque étape de clean_all, d'après son callback de progression
+    ends = {}
+
+    def progress(stage, fraction):
+        if fraction >= 1.0:
+            ends[stage] = (time.perf_counter(), peak_rss_mb())
+
+    start = time.perf_counter()
+    df_clean = clean_all(df, progress=progress)
+    for stage in PIPELINE_STAGES:
+        end, rss = ends[stage]
+        results[f"{fmt}:stage:{stage}"] = {"seconds": end - start, "peak_rss_mb": rss}
+        start = end
+
+    if len(df_clean) <= EXCEL_MAX_ROWS:
+        measure(results, f"{fmt}:stage:export_xlsx", write_excel, df_clean, io.BytesIO())
+
+
+def bench_routes(client: TestClient, content: bytes, fmt: str, n_rows: int, results: dict):
+    """Routes complètes via le client ASGI ; Parquet en sortie au-delà de la limite d'Excel."""
+    data = {} if n_rows <= EXCEL_MAX_ROWS else {"output_format": "parquet"}
+    for route in ROUTES:
+        files = {"file": (f"data.{fmt}", content)}
+        form = {} if route == "/get-numeric-columns" else data
+        response = measure(results, f"{fmt}:route:{route}", client.post, route, files=files, data=form)
+        if response.status_code != 200 or response.headers["content-type"].startswith("application/json") \
+                and "error" in response.json():
+            raise RuntimeError(f"{route} ({fmt}) : {response.status_code} {response.text[:200]}")
+
+
+def run_size(n_rows: int, formats, skip_routes: bool = False, compact: bool = False) -> dict:
+    # load_file lit COMPACT_DTYPES à chaque appel : routes comprises
+    utils.COMPACT_DTYPES = compact
+    results = {}
+    df = measure(results, "generate", make_dirty_frame, n_rows)
+    client = TestClient(app)
+    for fmt in formats:
+        if fmt == "xlsx" and n_rows > EXCEL_MAX_ROWS:
+            continue
+        buffer = io.BytesIO()
+        measure(results, f"{fmt}:write_input", write_dataset, df, buffer, fmt)
+        content = buffer.getvalue()
+        bench_stages(content, fmt, results)
+        if not skip_routes:
+            bench_routes(client, content, fmt, n_rows, results)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Affiche les mesures et renvoie celles plus lentes que la référence."""
+    regressions = []
+    print(f"{'mesure':<48}{'temps (s)':>11}{'référence':>11}{'écart':>9}{'pic RSS (Mo)':>14}")
+    for name, value in results.items():
+        ref = baseline.get(name, {}).get("seconds")
+        ratio = value["seconds"] / ref if ref else None
+        flag = ""
+        if ratio is not None and ratio > 1 + tolerance and value["seconds"] - ref > MIN_DELTA:
+            regressions.append(name)
+            flag = "  RÉGRESSION"
+        ref_text = f"{ref:.3f}" if ref else "-"
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{name:<48}{value['seconds']:>11.3f}{ref_text:>11}{ratio_text:>9}"
+              f"{value['peak_rss_mb']:>14.0f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline et des routes.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[SIZES[0]])
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--skip-routes", action="store_true")
+    parser.add_argument("--compact", action="store_true", help="types compacts au chargement")
+    parser.add_argument("--save", action="store_true", help="enregistre les mesures comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--baseline", default=BASELINE)
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+
+    regressions = []
+    for n_rows in args.rows:
+        print(f"\n=== {n_rows} lignes ===")
+        key = f"{n_rows}-compact" if args.compact else str(n_rows)
+        results = run_size(n_rows, args.formats, args.skip_routes, args.compact)
+        regressions += compare(results, baseline.get(key, {}), args.tolerance)
+        if args.save:
+            baseline.setdefault(key, {}).update(results)
+
+    if args.save:
+        with open(args.baseline, "w") as fh:
+            json.dump(baseline, fh, indent=2, sort_keys=True)
+        print(f"\nRéférence enregistrée : {args.baseline}")
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Conformité des moteurs d'exécution (data_cleaning.backends) : chaque plan
+de data_cleaning/conformance.py est exécuté par pandas (référence) puis par
+chaque autre moteur installé, sur les données de datagen, et les résultats
+comparés par assert_same_frame. Donne aussi le temps de chaque moteur ;
+la même vérification tourne dans tests/test_backends.py.
+
+Usage : python -m benchmarks.check_backends [nb_lignes]
+Code de sortie 1 si un résultat diffère.
+"""
+import sys
+import time
+
+from data_cleaning import backends
+from data_cleaning.conformance import PLANS, assert_same_frame, variants
+from data_cleaning.pipeline import compile_steps, execute
+
+from benchmarks.datagen import make_dirty_frame
+
+
+def count_relays(run):
+    """Compte les passes exécutées par pandas pour le compte d'un autre moteur."""
+    calls = [0]
+
+    def counted(self, *args, **kwargs):
+        calls[0] += 1
+        return run(self, *args, **kwargs)
+    return calls, counted
+
+
+def main(n_rows: int = 100_000) -> int:
+    engines = []
+    for engine in backends.ENGINES[1:]:
+        try:
+            engines.append(backends.check_engine(engine))
+        except ValueError as e:
+            print(f"{engine} : ignoré ({e})")
+
+    relays, counted = count_relays(backends.PandasBackend.run)
+    backends.PandasBackend.run = counted
+    failures = 0
+    print(f"{n_rows} lignes")
+    print(f"{'données':<10}{'plan':<28}{'moteur':<8}{'temps (s)':>10}{'gain':>7}  résultat")
+    for data_name, df in variants(make_dirty_frame(n_rows)).items():
+        for plan_name, steps in PLANS.items():
+            passes = compile_steps(steps)
+            start = time.perf_counter()
+            reference = execute(df, passes, engine="pandas")
+            t_ref = time.perf_counter() - start
+            print(f"{data_name:<10}{plan_name:<28}{'pandas':<8}{t_ref:>10.3f}{1:>6.1f}x")
+            for engine in engines:
+                relays[0] = 0
+                start = time.perf_counter()
+                result = execute(df, passes, engine=engine)
+                elapsed = time.perf_counter() - start
+                try:
+                    assert_same_frame(reference, result)
+                    verdict = "identique"
+                except AssertionError as e:
+                    failures += 1
+                    verdict = "DIFFÉRENT : " + " ".join(str(e).split())[:200]
+                if relays[0]:
+                    verdict += f" ({relays[0]} passe(s) relayée(s) à pandas)"
+                print(f"{'':<38}{engine:<8}{elapsed:>10.3f}{t_ref / elapsed:>6.1f}x  {verdict}")
+    print("OK" if not failures else f"{failures} résultat(s) différent(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
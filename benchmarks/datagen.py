@@ -0,0 +1,126 @@
+"""
+Générateur de données sales pour les benchmarks.
+
+Lignes de type CRM (id, nom, ville, age, revenu, date de naissance, e-mail)
+avec des taux contrôlés de :
+- doublons : copies de lignes existantes (même id) qui ne deviennent
+  identiques qu'après normalisation (casse, espaces, autre format
+  de date) ;
+- valeurs manquantes, sur toutes les colonnes sauf id ;
+- outliers, sur age et revenu ;
+et des dates dans plusieurs formats mélangés. Tout est tiré d'un générateur
+initialisé par `seed` : même taille et même graine, mêmes données.
+
+Usage : python -m benchmarks.datagen nb_lignes [--formats csv xlsx parquet json] [--out dossier]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning.export import write_xlsx
+
+FORMATS = ("csv", "xlsx", "parquet", "json")
+EXCEL_MAX_ROWS = 1_048_575  # sans la ligne d'en-tête
+
+FIRST = ["Alice", "Bob", "Chloé", "Élodie", "Jean-Luc", "François", "Zoë", "Marie", "Paul", "Inès"]
+LAST = ["Martin", "Bernard", "Dubois", "Lefèvre", "O'Brien", "Moreau", "Girard", "Durand", "Roux", "Faure"]
+CITIES = ["Paris", "Lyon", "Saint-Étienne", "Marseille", "Île-de-France", "Nice", "Lille", "Nantes"]
+DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d"]
+N_DATES = 20_000
+
+
+def _variants(values: np.ndarray, rng) -> np.ndarray:
+    """Même texte après normalisation : casse et espaces modifiés."""
+    kind = rng.integers(0, 3, len(values))
+    out = values.astype(object)
+    out[kind == 0] = np.char.upper(values[kind == 0].astype(str)).astype(object)
+    out[kind == 1] = np.char.add(np.char.add("  ", values[kind == 1].astype(str)), " ").astype(object)
+    return out
+
+
+def make_dirty_frame(n_rows: int, dup_rate: float = 0.1, null_rate: float = 0.05,
+                     outlier_rate: float = 0.01, seed: int = 0) -> pd.DataFrame:
+    """DataFrame de `n_rows` lignes aux taux demandés (fractions de 0 à 1)."""
+    rng = np.random.default_rng(seed)
+    n_base = max(1, n_rows - int(n_rows * dup_rate))
+
+    first = np.array(FIRST, dtype=object)[rng.integers(0, len(FIRST), n_base)]
+    last = np.array(LAST, dtype=object)[rng.integers(0, len(LAST), n_base)]
+    names = first + " " + last
+    cities = np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), n_base)]
+    ages = rng.integers(18, 90, n_base).astype(np.float64)
+    incomes = np.round(rng.lognormal(10, 0.5, n_base), 2)
+    days = rng.integers(0, N_DATES, n_base)
+    fmt = rng.integers(0, len(DATE_FORMATS), n_base)
+    emails = np.char.add(np.char.add("user", np.arange(n_base).astype(str)), "@exemple.fr").astype(object)
+
+    # outliers, avant duplication : une copie garde la même valeur aberrante
+    outliers = rng.random(n_base) < outlier_rate
+    ages[outliers] = rng.integers(150, 1000, outliers.sum())
+    incomes[outliers] *= rng.choice([-1, 1000], outliers.sum())
+
+    # dates : chaque jour formaté une fois dans chaque format
+    calendar = pd.Timestamp("1940-01-01") + pd.to_timedelta(np.arange(N_DATES), unit="D")
+    formatted = np.stack([calendar.strftime(f).to_numpy(dtype=object) for f in DATE_FORMATS], axis=1)
+
+    # valeurs manquantes, avant duplication : une copie reste un doublon
+    base = {"nom": names, "ville": cities, "age": ages, "revenu": incomes, "date_naissance": days, "E-mail": emails}
+    missing = {col: rng.random(n_base) < null_rate for col in base}
+
+    # doublons : lignes de base recopiées, texte et format de date modifiés
+    source = np.concatenate([np.arange(n_base), rng.integers(0, n_base, n_rows - n_base)])
+    copies = np.arange(n_rows) >= n_base
+    fmt = fmt[source]
+    fmt[copies] = (fmt[copies] + rng.integers(1, len(DATE_FORMATS), copies.sum())) % len(DATE_FORMATS)
+    columns = {"id": source + 1}
+    for col, values in base.items():
+        values = values[source]
+        if col in ("nom", "ville"):
+            values[copies] = _variants(values[copies], rng)
+        elif col == "date_naissance":
+            values = formatted[values, fmt]
+        columns[col] = pd.Series(values).mask(missing[col][source])
+    df = pd.DataFrame(columns)
+    # copies mélangées aux lignes de base
+    return df.iloc[rng.permutation(n_rows)].reset_index(drop=True)
+
+
+def write_dataset(df: pd.DataFrame, path: str, fmt: str):
+    """Écrit le jeu de données dans le format d'entrée demandé."""
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "xlsx":
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel est limité à {EXCEL_MAX_ROWS} lignes.")
+        write_xlsx(df, path, sheet_name="Sheet1")
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    elif fmt == "json":
+        df.to_json(path, orient="records", force_ascii=False)
+    else:
+        raise ValueError(f"Format inconnu : {fmt}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère des jeux de données sales.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--out", default=".")
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    parser.add_argument("--null-rate", type=float, default=0.05)
+    parser.add_argument("--outlier-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = make_dirty_frame(args.rows, args.dup_rate, args.null_rate, args.outlier_rate, args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    for fmt in args.formats:
+        path = os.path.join(args.out, f"dirty_{args.rows}.{fmt}")
+        write_dataset(df, path, fmt)
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
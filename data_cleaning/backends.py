@@ -0,0 +1,232 @@
+"""
+Moteurs d'exécution des plans de nettoyage (paramètre `engine`).
+
+Un moteur fournit les étapes du pipeline sur sa propre représentation des
+données :
+- load         : DataFrame pandas lu par load_file → représentation du moteur ;
+- normalize    : clés de dédoublonnage des colonnes comparées ;
+- dedup        : première occurrence de chaque clé ;
+- fill_missing : passe de remplissages fusionnés (pipeline.py) ;
+- outliers     : passe d'outliers fusionnés ;
+- export       : retour en DataFrame pandas pour les écrivains d'export.py.
+Lecture et écriture des fichiers restent communes : mêmes types à l'entrée,
+mêmes octets en sortie quel que soit le moteur.
+
+Moteurs :
+- pandas : moteur de référence (numpy) ;
+- polars : colonnes Arrow et opérations multithread (polars_backend.py,
+  dépendance optionnelle : pip install polars).
+
+Un moteur peut refuser des données ou une étape qu'il ne reproduit pas à
+l'identique (exception Unsupported : colonnes d'objets mélangés, doublons
+approximatifs…) : la suite du plan passe alors par pandas, sur le résultat
+converti. Conformité vérifiée par conformance.py (tests/test_backends.py,
+benchmarks/check_backends.py).
+
+CLEANING_ENGINE : moteur par défaut (pandas).
+"""
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from .bounds import detect_limits, numeric_block, treat_outliers
+from .compact import fill_numeric, fill_text, text_columns
+from .dedup_index import drop_duplicate_rows, normalized_hashes
+from .fuzzy import fuzzy_deduplicate
+from .metrics import stage
+
+ENGINES = ("pandas", "polars")
+CLEANING_ENGINE = os.environ.get("CLEANING_ENGINE", "pandas")
+
+
+def _no_progress(stage, fraction):
+    pass
+
+
+class Unsupported(Exception):
+    """Données ou étape que le moteur ne traite pas à l'identique : relais à pandas."""
+
+
+# ---------- RÉGLAGES COMMUNS AUX MOTEURS ----------
+
+def selected(available, columns) -> list:
+    """Colonnes demandées présentes dans `available` (toutes si `columns` vaut None)."""
+    available = list(available)
+    if columns is None:
+        return available
+    present = set(available)
+    return [c for c in columns if c in present]
+
+
+def outlier_spec(step: dict, col) -> tuple:
+    return step["specs"].get(col, step["default"])
+
+
+def fill_groups(available, numeric, text, steps: list) -> tuple:
+    """
+    Remplissages fusionnés : par colonne, la première étape qui la touche
+    décide. Renvoie ({(méthode, valeur): colonnes numériques}, colonnes
+    "null", {texte: colonnes texte}).
+    """
+    numeric_groups, null_cols, text_groups, done = {}, [], {}, set()
+    for step in steps:
+        for col in selected(available, step["columns"]):
+            if col in done:
+                continue
+            done.add(col)
+            method, value, text_value = step["specs"].get(col, step["default"])
+            if method == "null":
+                null_cols.append(col)
+            elif col in numeric:
+                numeric_groups.setdefault((method, value), []).append(col)
+            elif col in text and text_value is not None:
+                text_groups.setdefault(text_value, []).append(col)
+    return numeric_groups, null_cols, text_groups
+
+
+def outlier_targets(available, numeric: list, steps: list) -> tuple:
+    """
+    Colonnes d'une passe d'outliers et leurs bornes : (colonnes, basses,
+    hautes, groupes). Les bornes fixes sont remplies, les autres (NaN) sont
+    à calculer par groupe de réglage {(détecteur, seuil, facteur IQR,
+    méthode de quantiles, erreur): indices}.
+    """
+    columns, specs, quantiles = [], [], []
+    for step in steps:
+        for col in selected(available, step["columns"] if step["columns"] is not None else numeric):
+            if col in numeric:
+                columns.append(col)
+                specs.append(outlier_spec(step, col))
+                quantiles.append((step["quantile_method"], step["quantile_error"]))
+    lower = np.full(len(columns), np.nan)
+    upper = np.full(len(columns), np.nan)
+    groups = {}
+    for j, (spec, quantile) in enumerate(zip(specs, quantiles)):
+        if spec[0] == "fixed":
+            lower[j], upper[j] = spec[1:]
+        else:
+            groups.setdefault(spec[1:] + quantile, []).append(j)
+    return columns, lower, upper, groups
+
+
+def check_dedup_columns(available, columns):
+    if columns is not None:
+        available = set(available)
+        missing = [c for c in columns if c not in available]
+        if missing:
+            raise ValueError(f"Colonnes introuvables : {', '.join(map(str, missing))}")
+
+
+# ---------- MOTEURS ----------
+
+class Backend(ABC):
+    """Interface d'un moteur ; `run` exécute une passe du plan compilé."""
+
+    name = None
+
+    @abstractmethod
+    def load(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    @abstractmethod
+    def normalize(self, frame, columns=None, progress=_no_progress):
+        raise NotImplementedError
+
+    @abstractmethod
+    def dedup(self, frame, step: dict, progress=_no_progress):
+        raise NotImplementedError
+
+    @abstractmethod
+    def fill_missing(self, frame, steps: list):
+        raise NotImplementedError
+
+    @abstractmethod
+    def outliers(self, frame, steps: list):
+        raise NotImplementedError
+
+    @abstractmethod
+    def export(self, frame) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def run(self, frame, steps: list, progress=_no_progress):
+        op = steps[0]["op"]
+        if op == "dedup":
+            return self.dedup(frame, steps[0], progress)
+        name = "missing" if op == "fill_missing" else "outliers"
+        with stage(name, len(frame)) as record:
+            frame = self.fill_missing(frame, steps) if op == "fill_missing" else self.outliers(frame, steps)
+            record.rows_out = len(frame)
+        progress(name, 1.0)
+        return frame
+
+
+class PandasBackend(Backend):
+    """Moteur de référence : DataFrame pandas, empreintes et blocs numpy."""
+
+    name = "pandas"
+
+    def load(self, df: pd.DataFrame) -> pd.DataFrame:
+        # colonnes remplacées sur une copie superficielle : `df` (cache) reste intact
+        return df.copy(deep=False)
+
+    def normalize(self, frame, columns=None, progress=_no_progress) -> np.ndarray:
+        return normalized_hashes(frame, progress=progress, columns=columns)
+
+    def dedup(self, frame, step, progress=_no_progress):
+        if step["mode"] == "fuzzy":
+            return fuzzy_deduplicate(frame, step["columns"], step["block_on"], step["similarity"],
+                                     step["num_perm"], step["ngram"], step["keep_all"])
+        check_dedup_columns(frame.columns, step["columns"])
+        return drop_duplicate_rows(frame, progress=progress, columns=step["columns"])
+
+    def fill_missing(self, frame, steps):
+        numeric_groups, null_cols, text_groups = fill_groups(
+            frame.columns, set(frame.select_dtypes(include=[np.number]).columns),
+            set(text_columns(frame)), steps)
+        for (method, value), cols in numeric_groups.items():
+            frame = fill_numeric(frame, cols, method, value)
+        if null_cols:
+            frame = fill_text(frame, null_cols)
+        for text_value, cols in text_groups.items():
+            frame = fill_text(frame, cols, text_value)
+        return frame
+
+    def outliers(self, frame, steps):
+        numeric = frame.select_dtypes(include=[np.number]).columns.tolist()
+        columns, lower, upper, groups = outlier_targets(frame.columns, numeric, steps)
+        if not columns:
+            return frame
+        block = numeric_block(frame, columns)
+        for (detector, threshold, iqr_factor, method, error), idx in groups.items():
+            lower[idx], upper[idx] = detect_limits(block[:, idx], detector, threshold, iqr_factor, method, error)
+        frame, _ = treat_outliers(frame, columns, lower, upper, steps[0]["method"], block=block)
+        return frame
+
+    def export(self, frame) -> pd.DataFrame:
+        return frame
+
+
+PANDAS = PandasBackend()
+
+
+def check_engine(engine=None) -> str:
+    """Nom du moteur validé (CLEANING_ENGINE par défaut) ; lève ValueError."""
+    engine = (engine or CLEANING_ENGINE).lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Moteur d'exécution invalide : {engine} (attendu : {', '.join(ENGINES)}).")
+    if engine == "polars":
+        try:
+            from . import polars_backend  # noqa: F401
+        except ImportError:
+            raise ValueError("Moteur polars indisponible : installer polars (pip install polars).")
+    return engine
+
+
+def get_backend(engine=None) -> Backend:
+    engine = check_engine(engine)
+    if engine == "polars":
+        from .polars_backend import PolarsBackend
+        return PolarsBackend()
+    return PANDAS
@@ -0,0 +1,298 @@
+"""
+Nettoyage par lots (POST /batch).
+
+Plusieurs fichiers en une requête : envois multiples (champ `files` répété)
+et/ou archives ZIP, dont chaque fichier est traité à part. Chaque fichier
+passe par le pipeline complet de /clean-all-and-download (mêmes paramètres)
+dans un pool de processus (un par cœur par défaut) : les fichiers d'un lot
+sont nettoyés en parallèle, sans partager le verrou global de Python.
+
+La réponse est une archive ZIP : un résultat par fichier réussi, à son
+chemin d'origine, et `resume.json` (lignes en entrée / sortie, durée, ou
+erreur par fichier). Un fichier illisible ou invalide n'est pas bloquant :
+son erreur est rapportée dans le résumé, comme celles de load_file. Seuls
+des paramètres invalides (communs à tous les fichiers) font échouer le lot.
+"""
+import json
+import os
+import posixpath
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, CancelledError, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+
+from .backends import check_engine
+from .export import FORMATS, check_format, write_frame
+from .full_cleaning import clean_all, clean_all_steps, write_excel
+from .metrics import stage
+from .pipeline import compile_steps
+from .uploads import MAX_UPLOAD_BYTES, raw_file, too_large_message
+from .utils import load_file
+from .workers import PoolBusy, WorkerPool, offload
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", "1000"))
+BATCH_TIMEOUT = float(os.environ.get("BATCH_TIMEOUT_SECONDS", "3600"))
+BATCH_DIR = os.environ.get("BATCH_DIR", os.path.join(tempfile.gettempdir(), "data_cleaning_batch"))
+
+# formats déjà compressés : stockés tels quels dans l'archive
+STORED = ("xlsx", "parquet", "feather")
+
+router = APIRouter()
+
+batch_pool = WorkerPool("process", workers=BATCH_WORKERS, max_queue=BATCH_WORKERS * 4, timeout=BATCH_TIMEOUT)
+
+
+def clean_file(input_path: str, filename: str, output_path: str, fmt: str,
+               compression: Optional[str], params: dict) -> dict:
+    """
+    Nettoie un fichier du lot (exécuté dans un processus du pool) ; toute
+    erreur est rendue dans le résumé au lieu d'être levée.
+    """
+    start = time.perf_counter()
+    try:
+        with open(input_path, "rb") as fh:
+            df, _ = load_file(UploadFile(fh, filename=filename))
+    except Exception as e:
+        return {"status": "error", "error": f"Erreur de chargement : {e}"}
+    finally:
+        os.remove(input_path)
+
+    try:
+        df_clean = clean_all(df, **params)
+        if fmt == "xlsx":
+            write_excel(df_clean, output_path)
+        else:
+            write_frame(df_clean, output_path, fmt, compression)
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+    return {"status": "ok", "rows_in": len(df), "rows_out": len(df_clean),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+def _purge():
+    """Supprime les dossiers de lots abandonnés (délai dépassé, arrêt du serveur)."""
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    limit = time.time() - 2 * BATCH_TIMEOUT
+    for name in os.listdir(BATCH_DIR):
+        path = os.path.join(BATCH_DIR, name)
+        try:
+            if os.path.getmtime(path) < limit:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def _member_path(name: str) -> str:
+    """Chemin d'un fichier dans l'archive de résultats, sans « .. » ni racine."""
+    parts = [p for p in posixpath.normpath(name.replace("\\", "/")).split("/") if p not in ("", ".", "..")]
+    return "/".join(parts) or "fichier"
+
+
+# erreurs de lecture d'un membre d'archive (BadZipFile : CRC ou en-tête abîmé ;
+# zlib.error : données compressées abîmées ; RuntimeError : chiffré ;
+# NotImplementedError : compression non prise en charge)
+MEMBER_ERRORS = (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError, EOFError, OSError)
+
+
+def _collect(files: List[UploadFile], work_dir: str) -> list:
+    """
+    Fichiers du lot, dans l'ordre d'envoi (archives dépliées) : entrées
+    {"file": nom, "path": copie locale} ou {"file": nom, "error": ...}.
+    """
+    entries = []
+
+    def add(name, source, size=None):
+        if MAX_UPLOAD_BYTES and size is not None and size > MAX_UPLOAD_BYTES:
+            entries.append({"file": name, "error": too_large_message(size)})
+            return
+        # on garde l'extension : c'est elle qui choisit le lecteur
+        path = os.path.join(work_dir, f"{len(entries):05d}.{name.lower().rsplit('.', 1)[-1]}")
+        try:
+            with open(path, "wb") as fh:
+                shutil.copyfileobj(source, fh, 1 << 20)
+        except BaseException:
+            os.remove(path)  # copie partielle
+            raise
+        entries.append({"file": name, "path": path})
+
+    for upload in files:
+        source = raw_file(upload.file)
+        try:
+            if not upload.filename.lower().endswith(".zip"):
+                add(upload.filename, source)
+                continue
+            try:
+                archive = zipfile.ZipFile(source)
+            except zipfile.BadZipFile:
+                entries.append({"file": upload.filename, "error": "Archive ZIP illisible."})
+                continue
+            with archive:
+                for info in archive.infolist():
+                    base = posixpath.basename(info.filename)
+                    if info.is_dir() or base.startswith(".") or info.filename.startswith("__MACOSX/"):
+                        continue
+                    try:
+                        with archive.open(info) as member:
+                            add(info.filename, member, info.file_size)
+                    except MEMBER_ERRORS as e:
+                        # membre abîmé (CRC), chiffré, compression inconnue… : les autres continuent
+                        entries.append({"file": info.filename, "error": f"Fichier de l'archive illisible : {e}"})
+        finally:
+            upload.file.close()
+        if len(entries) > BATCH_MAX_FILES:
+            raise ValueError(f"Trop de fichiers dans le lot (maximum {BATCH_MAX_FILES}).")
+    return entries
+
+
+def _run(entries: list, fmt: str, compression: Optional[str], params: dict):
+    """
+    Nettoie les entrées dans le pool (au plus un fichier par processus à la
+    fois) et complète chacune avec son résultat : {"output": chemin} ou erreur.
+    """
+    extension = FORMATS[fmt][0]
+    todo = [e for e in entries if "path" in e]
+    running = {}
+    while todo or running:
+        while todo and len(running) < batch_pool.workers:
+            entry = todo[0]
+            entry["output"] = f"{entry['path']}.out.{extension}"
+            executor = batch_pool.executor
+            try:
+                future = batch_pool.submit(clean_file, entry["path"], entry["file"], entry["output"],
+                                           fmt, compression, params)
+            except PoolBusy:
+                break  # pool partagé avec d'autres lots : on attend qu'une place se libère
+            running[future] = (todo.pop(0), executor)
+        if not running:
+            time.sleep(0.1)
+            continue
+        done, _ = wait(running, timeout=1.0, return_when=FIRST_COMPLETED)
+        for future in done:
+            entry, executor = running.pop(future)
+            try:
+                entry.update(future.result())
+            except BrokenProcessPool:
+                # processus tué (mémoire…) : le pool est recréé pour la suite,
+                # sans toucher aux fichiers des autres lots
+                batch_pool.discard(executor)
+                entry.update(status="error", error="Traitement interrompu (processus arrêté).")
+            except CancelledError:
+                todo.insert(0, entry)  # annulé avant d'avoir commencé : renvoyé au pool
+
+
+def _archive(entries: list, fmt: str, zip_path: str) -> dict:
+    """Archive des résultats + resume.json ; renvoie le résumé."""
+    extension = FORMATS[fmt][0]
+    method = zipfile.ZIP_STORED if fmt in STORED else zipfile.ZIP_DEFLATED
+    summary, used = [], set()
+    with zipfile.ZipFile(zip_path, "w", method) as archive:
+        for entry in entries:
+            item = {"file": entry["file"]}
+            if entry.get("status") == "ok":
+                stem = _member_path(entry["file"]).rsplit(".", 1)[0]
+                name, n = f"{stem}.{extension}", 1
+                while name in used:  # même nom dans deux archives
+                    n += 1
+                    name = f"{stem}_{n}.{extension}"
+                used.add(name)
+                archive.write(entry["output"], name)
+                os.remove(entry["output"])
+                item.update(status="ok", output=name, rows_in=entry["rows_in"],
+                            rows_out=entry["rows_out"], seconds=entry["seconds"])
+            else:
+                item.update(status="error", error=entry.get("error", "Erreur inconnue."))
+            summary.append(item)
+        result = {
+            "files": len(summary),
+            "succeeded": sum(item["status"] == "ok" for item in summary),
+            "failed": sum(item["status"] == "error" for item in summary),
+            "results": summary,
+        }
+        archive.writestr("resume.json", json.dumps(result, ensure_ascii=False, indent=2))
+    return result
+
+
+@router.post("/batch")
+@offload(timeout=BATCH_TIMEOUT)
+def clean_batch(
+    files: List[UploadFile] = File(...),  # fichiers et/ou archives .zip
+    missing_method: str = Form("median"),
+    missing_value: Optional[str] = Form(None),
+    outlier_method: str = Form("delete"),
+    columns: Optional[str] = Form(None),
+    use_custom_bounds: bool = Form(False),
+    lower_bound: Optional[str] = Form(None),
+    upper_bound: Optional[str] = Form(None),
+    iqr_factor: float = Form(1.5),
+    column_bounds: Optional[str] = Form(None),  # {"colonne": [basse, haute]}
+    detector: str = Form("iqr"),  # iqr / mad / zscore
+    threshold: Optional[float] = Form(None),
+    quantile_method: str = Form("exact"),  # exact / sketch
+    quantile_error: Optional[float] = Form(None),
+    engine: Optional[str] = Form(None),  # pandas / polars
+    output_format: Optional[str] = Form(None),  # xlsx / parquet / feather / csv / ndjson
+    compression: Optional[str] = Form(None)
+):
+    """
+    Nettoie chaque fichier du lot comme /clean-all-and-download et renvoie
+    une archive ZIP des résultats avec resume.json (voir l'en-tête du module).
+    """
+    params = {
+        "missing_method": missing_method,
+        "missing_value": missing_value,
+        "outlier_method": outlier_method,
+        "columns": columns,
+        "use_custom_bounds": use_custom_bounds,
+        "lower_bound": lower_bound,
+        "upper_bound": upper_bound,
+        "iqr_factor": iqr_factor,
+        "column_bounds": column_bounds,
+        "detector": detector,
+        "threshold": threshold,
+        "quantile_method": quantile_method,
+        "quantile_error": quantile_error,
+    }
+    try:
+        fmt, compression = check_format(output_format, compression)
+        # paramètres communs vérifiés une fois, avant tout traitement
+        compile_steps(clean_all_steps(**params))
+        params["engine"] = check_engine(engine)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    _purge()
+    work_dir = tempfile.mkdtemp(dir=BATCH_DIR)
+    try:
+        entries = _collect(files, work_dir)
+        if not entries:
+            raise ValueError("Aucun fichier à traiter.")
+        with stage("batch") as record:
+            _run(entries, fmt, compression, params)
+            zip_path = os.path.join(work_dir, "resultats.zip")
+            summary = _archive(entries, fmt, zip_path)
+            record.rows_out = sum(item.get("rows_out", 0) for item in summary["results"])
+    except ValueError as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return {"error": str(e)}
+    except BaseException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    response = FileResponse(
+        zip_path,
+        media_type="application/zip",
+        filename="resultats.zip",
+        background=BackgroundTask(shutil.rmtree, work_dir, ignore_errors=True),
+    )
+    response.headers["X-Batch-Succeeded"] = str(summary["succeeded"])
+    response.headers["X-Batch-Failed"] = str(summary["failed"])
+    return response
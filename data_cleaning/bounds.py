@@ -0,0 +1,178 @@
+"""
+Détection et traitement des outliers sur un bloc de colonnes numériques.
+
+Les colonnes sélectionnées sont traitées ensemble comme une matrice numpy
+(lignes × colonnes) : bornes de toutes les colonnes en un appel
+(np.nanquantile ou esquisses KLL fusionnables, voir sketches.py), masque 2-D,
+puis suppression des lignes ou remplacement sur place.
+
+Détecteurs :
+- iqr    : [Q1 - f·IQR, Q3 + f·IQR] (f = iqr_factor, 1.5 par défaut) ;
+- mad    : médiane ± s·MAD / 0.6745 (z-score modifié d'Iglewicz et Hoaglin, s = 3.5) ;
+- zscore : moyenne ± s·écart-type (s = 3).
+Des bornes fixes (globales ou par colonne) remplacent le détecteur.
+"""
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .sketches import ColumnSketches
+
+QUANTILE_METHODS = ("exact", "sketch")
+QUANTILE_SKETCH_ERROR = float(os.environ.get("QUANTILE_SKETCH_ERROR", "0.01"))
+
+DETECTORS = ("iqr", "mad", "zscore")
+DEFAULT_THRESHOLDS = {"mad": 3.5, "zscore": 3.0}
+MAD_SCALE = 0.6745  # quantile 75 % de la loi normale centrée réduite
+
+SKETCH_CHUNK_ROWS = 1_000_000
+
+
+def check_quantile_method(method: str, error=None) -> tuple:
+    """(méthode, erreur) validées ; lève ValueError."""
+    method = (method or "exact").lower()
+    if method not in QUANTILE_METHODS:
+        raise ValueError(f"Méthode de quantiles invalide : {method} (attendu : exact, sketch).")
+    error = QUANTILE_SKETCH_ERROR if error is None else float(error)
+    if not 0 < error < 0.5:
+        raise ValueError("L'erreur de quantile doit être comprise entre 0 et 0.5.")
+    return method, error
+
+
+def check_detector(detector: str, threshold=None) -> tuple:
+    """(détecteur, seuil) validés ; le seuil de "iqr" est iqr_factor (None ici)."""
+    detector = (detector or "iqr").lower()
+    if detector not in DETECTORS:
+        raise ValueError(f"Détecteur d'outliers invalide : {detector} (attendu : {', '.join(DETECTORS)}).")
+    if detector == "iqr":
+        return detector, None
+    threshold = DEFAULT_THRESHOLDS[detector] if threshold is None else float(threshold)
+    if not threshold > 0:
+        raise ValueError("Le seuil du détecteur doit être positif.")
+    return detector, threshold
+
+
+def parse_column_bounds(text) -> dict:
+    """
+    Bornes par colonne au format JSON {"colonne": [basse, haute]} ;
+    null laisse le côté ouvert. Lève ValueError.
+    """
+    if not text or text == "null":
+        return {}
+    try:
+        raw = json.loads(text)
+        bounds = {}
+        for col, (lower, upper) in raw.items():
+            bounds[col] = (-np.inf if lower is None else float(lower),
+                           np.inf if upper is None else float(upper))
+    except Exception:
+        raise ValueError("Bornes par colonne invalides (attendu : {\"colonne\": [basse, haute]}).")
+    return bounds
+
+
+def numeric_block(df: pd.DataFrame, columns) -> np.ndarray:
+    """Matrice float64 (lignes × colonnes) des colonnes sélectionnées, toujours une copie."""
+    return df[list(columns)].to_numpy(dtype=np.float64, copy=True)
+
+
+def block_quantiles(block: np.ndarray, qs, method: str = "exact",
+                    error: float = QUANTILE_SKETCH_ERROR) -> np.ndarray:
+    """Quantiles de chaque colonne, tableau (len(qs), nb_colonnes)."""
+    if method == "exact":
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # colonne entièrement vide
+            return np.nanquantile(block, qs, axis=0)
+    sketches = ColumnSketches(range(block.shape[1]), error)
+    for start in range(0, len(block), SKETCH_CHUNK_ROWS):
+        part = block[start:start + SKETCH_CHUNK_ROWS]
+        sketches.update({j: part[:, j] for j in range(block.shape[1])})
+    found = sketches.quantiles(list(qs))
+    return np.array([[found[j][q] for j in range(block.shape[1])] for q in qs]).reshape(len(qs), -1)
+
+
+def detect_limits(block: np.ndarray, detector: str = "iqr", threshold=None, iqr_factor: float = 1.5,
+                  method: str = "exact", error: float = QUANTILE_SKETCH_ERROR) -> tuple:
+    """(bornes basses, bornes hautes) de chaque colonne du bloc."""
+    if detector == "iqr":
+        q1, q3 = block_quantiles(block, [0.25, 0.75], method, error)
+        iqr = q3 - q1
+        return q1 - iqr_factor * iqr, q3 + iqr_factor * iqr
+    if detector == "mad":
+        median = block_quantiles(block, [0.5], method, error)[0]
+        mad = block_quantiles(np.abs(block - median), [0.5], method, error)[0]
+        half = threshold * mad / MAD_SCALE
+        return median - half, median + half
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(block, axis=0)
+        std = np.nanstd(block, axis=0, ddof=1)
+    return mean - threshold * std, mean + threshold * std
+
+
+def column_limits(block: np.ndarray, columns, detector: str = "iqr", threshold=None,
+                  iqr_factor: float = 1.5, method: str = "exact", error: float = QUANTILE_SKETCH_ERROR,
+                  custom=None, column_bounds=None) -> tuple:
+    """
+    Bornes finales : bornes par colonne, sinon bornes globales `custom`
+    (basse, haute), sinon le détecteur (calculé seulement s'il sert).
+    """
+    columns = list(columns)
+    column_bounds = column_bounds or {}
+    lower = np.full(len(columns), np.nan)
+    upper = np.full(len(columns), np.nan)
+    detected = [j for j, c in enumerate(columns) if c not in column_bounds]
+    if custom is not None:
+        lower[detected], upper[detected] = custom
+    elif detected:
+        lower[detected], upper[detected] = detect_limits(
+            block[:, detected], detector, threshold, iqr_factor, method, error)
+    for j, c in enumerate(columns):
+        if c in column_bounds:
+            lower[j], upper[j] = column_bounds[c]
+    return lower, upper
+
+
+def treat_outliers(df: pd.DataFrame, columns, lower: np.ndarray, upper: np.ndarray,
+                   outlier_method: str = "delete", replacement=None, block=None) -> tuple:
+    """
+    Supprime les lignes (un seul masque 2-D) ou remplace les valeurs hors
+    bornes par la moyenne / médiane des valeurs dans les bornes, calculées
+    en un appel sur tout le bloc. `replacement` impose les valeurs (flux).
+    Renvoie (DataFrame, nombre de valeurs hors bornes par colonne).
+    """
+    columns = list(columns)
+    block = numeric_block(df, columns) if block is None else block
+    # NaN (valeur manquante ou borne indéfinie) : jamais hors bornes
+    mask = (block < lower) | (block > upper)
+    treated = dict(zip(columns, mask.sum(axis=0).tolist()))
+
+    if outlier_method == "delete":
+        return df[~mask.any(axis=1)], treated
+
+    df = df.copy(deep=False)  # colonnes remplacées, le DataFrame d'origine (cache) reste intact
+
+    if replacement is None:
+        # le bloc sert de tampon : valeurs hors bornes masquées sur place
+        block[mask] = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            replacement = np.nanmean(block, axis=0) if outlier_method == "mean" \
+                else np.nanmedian(block, axis=0)
+    replacement = np.asarray(replacement, dtype=np.float64)
+    np.copyto(block, np.broadcast_to(replacement, block.shape), where=mask)
+
+    for j, col in enumerate(columns):
+        if not mask[:, j].any() or np.isnan(replacement[j]):
+            continue
+        values = block[:, j]
+        # une colonne entière le reste si la valeur de remplacement est entière
+        if pd.api.types.is_integer_dtype(df[col].dtype) and float(replacement[j]).is_integer():
+            values = values.astype(df[col].dtype)
+        elif df[col].dtype == np.float32 and np.float32(replacement[j]) == replacement[j]:
+            # type compact (compact.py) conservé quand la valeur y tient exactement
+            values = values.astype(np.float32)
+        df[col] = values
+    return df, treated
@@ -0,0 +1,104 @@
+"""
+Types compacts au chargement (optionnel, COMPACT_DTYPES=1).
+
+pandas lit chaque nombre en int64 / float64 et chaque texte en objets
+Python. En mode compact :
+- les entiers descendent au plus petit type qui contient leurs valeurs
+  (int8 … int64, uint si positifs) ;
+- les flottants passent en float32 seulement si toutes les valeurs y sont
+  représentées exactement (aucune perte) ;
+- le texte peu varié (ex. ville) devient catégoriel : chaque valeur
+  distincte n'est stockée et normalisée qu'une fois ;
+- le reste du texte passe en chaînes Arrow (string[pyarrow]) si pyarrow
+  est installé.
+Les étapes suivantes (normalisation, valeurs manquantes, outliers) gardent
+ces types ; voir `text_columns` et `fill_text`.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .normalization import ARROW_STRING
+
+COMPACT_DTYPES = os.environ.get("COMPACT_DTYPES", "0") == "1"
+CATEGORY_RATIO = float(os.environ.get("COMPACT_CATEGORY_RATIO", "0.5"))
+
+
+def _compact_float(series: pd.Series) -> pd.Series:
+    values = series.to_numpy()
+    narrow = values.astype(np.float32)
+    with np.errstate(invalid="ignore"):
+        exact = (narrow.astype(np.float64) == values) | np.isnan(values)
+    return series.astype(np.float32) if exact.all() else series
+
+
+def compact_column(series: pd.Series, category_ratio: float = CATEGORY_RATIO) -> pd.Series:
+    """Version compacte d'une colonne, mêmes valeurs."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        unsigned = len(series) and series.min() >= 0
+        return pd.to_numeric(series, downcast="unsigned" if unsigned else "integer")
+    if dtype == np.float64:
+        return _compact_float(series)
+    if dtype == object:
+        # texte uniquement : une colonne mixte (nombres, dates…) reste telle quelle
+        if pd.api.types.infer_dtype(series, skipna=True) != "string":
+            return series
+        codes, uniques = pd.factorize(series)
+        if len(uniques) <= category_ratio * (codes >= 0).sum():
+            return pd.Series(pd.Categorical.from_codes(codes, uniques), index=series.index, name=series.name)
+        if ARROW_STRING is not None:
+            return series.astype(ARROW_STRING)
+    return series
+
+
+def compact_frame(df: pd.DataFrame, category_ratio: float = CATEGORY_RATIO) -> pd.DataFrame:
+    """Toutes les colonnes en types compacts (nouvelles colonnes, `df` intact)."""
+    return pd.DataFrame({col: compact_column(df[col], category_ratio) for col in df.columns},
+                        index=df.index)
+
+
+def fill_numeric(df: pd.DataFrame, columns, method: str, value=None) -> pd.DataFrame:
+    """
+    fillna des colonnes numériques par la médiane, la moyenne ou `value`
+    ("constant"). Les colonnes float32 sont calculées en float64 et ne le
+    restent que si la valeur de remplissage y tient exactement : mêmes
+    résultats qu'avec les types d'origine.
+    """
+    columns = list(columns)
+    narrow = [c for c in columns if df[c].dtype == np.float32]
+    wide = df[columns].astype({c: np.float64 for c in narrow}) if narrow else df[columns]
+    if method == "median":
+        fill = wide.median()
+    elif method == "mean":
+        fill = wide.mean()
+    else:
+        fill = pd.Series(value, index=columns, dtype=np.float64)
+    for col in narrow:
+        if df[col].isna().any() and np.float32(fill[col]) != fill[col]:
+            df[col] = wide[col]
+    df[columns] = df[columns].fillna(fill)
+    return df
+
+
+def text_columns(df: pd.DataFrame) -> list:
+    """Colonnes texte : objets, chaînes pandas / Arrow et catégorielles."""
+    return df.select_dtypes(include=["object", "string", "category"]).columns.tolist()
+
+
+def fill_text(df: pd.DataFrame, columns, value: str = "NULL") -> pd.DataFrame:
+    """
+    fillna(value) sur `columns` en gardant leurs types : une colonne
+    catégorielle reçoit `value` comme catégorie supplémentaire.
+    """
+    for col in columns:
+        series = df[col]
+        if not series.isna().any():
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+            series = series.cat.add_categories([value])
+        df[col] = series.fillna(value)
+    return df
@@ -0,0 +1,56 @@
+"""
+Conformité des moteurs d'exécution (backends.py) : plans de référence et
+comparaison des résultats, partagés par benchmarks/check_backends.py et
+tests/test_backends.py.
+
+Chaque plan est exécuté par pandas (référence) puis par un autre moteur,
+sur les variantes d'un même jeu de données (types pandas, types compacts,
+colonne d'objets mélangés : relais à pandas). Les résultats doivent être
+identiques (assert_same_frame) : valeurs, types, catégories, ordre des
+lignes et valeurs manquantes (NaN ou None) ; les flottants à 1e-9 près en
+relatif (ordre des additions).
+
+Les plans portent sur les colonnes nom, ville, age et revenu.
+"""
+import numpy as np
+import pandas as pd
+
+from .compact import compact_frame
+from .full_cleaning import clean_all_steps
+
+PLANS = {
+    "dedup": [{"op": "dedup"}],
+    "dedup nom+ville": [{"op": "dedup", "columns": ["nom", "ville"]}],
+    "clean-all": clean_all_steps(),
+    "clean-all mean/mad/median": clean_all_steps(missing_method="mean", outlier_method="median", detector="mad"),
+    "clean-all null/zscore/mean": clean_all_steps(missing_method="null", outlier_method="mean", detector="zscore"),
+    "clean-all sketch": clean_all_steps(quantile_method="sketch"),
+    "par colonne": [
+        {"op": "fill_missing", "columns": {"age": {"method": "constant", "value": 0.1}}, "text_value": "?"},
+        {"op": "fill_missing", "method": "mean"},
+        {"op": "outliers", "columns": ["age"], "bounds": [0, 120]},
+        {"op": "outliers", "columns": ["revenu"], "detector": "mad", "threshold": 5},
+    ],
+    "null puis dedup": [{"op": "fill_missing", "method": "null"}, {"op": "dedup"}],
+    "fuzzy": [{"op": "dedup", "mode": "fuzzy", "columns": ["nom"]}, {"op": "fill_missing"}],
+}
+
+
+def variants(df: pd.DataFrame) -> dict:
+    """Le jeu `df` en types pandas, en types compacts et avec une colonne d'objets mélangés."""
+    mixed = df.copy()
+    mixed["code"] = pd.Series(["A1", 7], dtype=object)[np.arange(len(df)) % 2].to_numpy()
+    return {"pandas": df, "compact": compact_frame(df), "mixte": mixed}
+
+
+def assert_same_frame(reference: pd.DataFrame, result: pd.DataFrame):
+    """Lève AssertionError si `result` diffère de `reference` (moteur pandas)."""
+    pd.testing.assert_frame_equal(reference, result, check_exact=False, rtol=1e-9)
+    # assert_frame_equal tolère None à la place de NaN (avertissement seulement)
+    for col in reference.columns:
+        if reference[col].dtype == object:
+            expected = reference[col][reference[col].isna()].map(type)
+            actual = result[col][result[col].isna()].map(type)
+            if not expected.equals(actual):
+                raise AssertionError(f"Valeurs manquantes différentes dans {col} : "
+                                     f"{sorted(set(map(str, actual)))} au lieu de {sorted(set(map(str, expected)))}")
@@ -0,0 +1,193 @@
+"""
+Jeux de données envoyés une seule fois.
+
+POST /datasets analyse le fichier et renvoie un identifiant dérivé de son
+contenu ; les autres routes acceptent ensuite `dataset_id` à la place du
+fichier. Les DataFrames analysés restent en mémoire dans un cache LRU borné
+(taille + durée de vie) ; une entrée évincée est déversée sur disque
+(Parquet si pyarrow est installé, pickle sinon) et rechargée au besoin.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+from fastapi import APIRouter, UploadFile, File
+
+from .utils import load_file
+from .workers import offload
+
+MAX_MEMORY_BYTES = int(os.environ.get("DATASET_CACHE_MB", "512")) * 1024 * 1024
+TTL_SECONDS = int(os.environ.get("DATASET_TTL_SECONDS", "1800"))
+STORE_TTL_SECONDS = int(os.environ.get("DATASET_STORE_TTL_SECONDS", "86400"))
+STORE_DIR = os.environ.get("DATASET_STORE_DIR", os.path.join(tempfile.gettempdir(), "data_cleaning_datasets"))
+
+router = APIRouter()
+
+
+def content_id(fileobj, filename: str) -> str:
+    """Empreinte SHA-256 du contenu (et de l'extension, qui décide du lecteur)."""
+    digest = hashlib.sha256(filename.lower().rsplit(".", 1)[-1].encode())
+    for block in iter(lambda: fileobj.read(1 << 20), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()[:32]
+
+
+class DatasetCache:
+    """Cache LRU des DataFrames analysés, borné en octets et en durée de vie."""
+
+    def __init__(self, max_bytes: int = MAX_MEMORY_BYTES, ttl: int = TTL_SECONDS,
+                 store_dir: str = STORE_DIR, store_ttl: int = STORE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store_dir = store_dir
+        self.store_ttl = store_ttl
+        self._entries = OrderedDict()  # id -> (df, type, taille, dernier accès)
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    # ---------- mémoire ----------
+
+    def put(self, dataset_id: str, df: pd.DataFrame, file_type: str):
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self._drop(dataset_id)
+            self._entries[dataset_id] = (df, file_type, size, time.monotonic())
+            self._bytes += size
+            self._evict()
+
+    def get(self, dataset_id: str):
+        """(DataFrame, type) ; lève KeyError si l'identifiant est inconnu ou expiré."""
+        with self._lock:
+            self._evict()
+            if dataset_id in self._entries:
+                df, file_type, size, _ = self._entries.pop(dataset_id)
+                self._entries[dataset_id] = (df, file_type, size, time.monotonic())
+                return df, file_type
+        df, file_type = self._load(dataset_id)
+        self.put(dataset_id, df, file_type)
+        return df, file_type
+
+    def __contains__(self, dataset_id: str) -> bool:
+        with self._lock:
+            return dataset_id in self._entries or self._path(dataset_id) is not None
+
+    def delete(self, dataset_id: str) -> bool:
+        with self._lock:
+            found = self._drop(dataset_id)
+            path = self._path(dataset_id)
+            if path:
+                os.remove(path)
+            return found or path is not None
+
+    def _drop(self, dataset_id: str) -> bool:
+        entry = self._entries.pop(dataset_id, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+        return entry is not None
+
+    def _evict(self):
+        """Déverse sur disque les entrées expirées puis les moins récentes au-delà du budget."""
+        now = time.monotonic()
+        expired = [k for k, (_, _, _, seen) in self._entries.items() if now - seen > self.ttl]
+        for dataset_id in expired:
+            self._spill(dataset_id)
+        # on garde toujours l'entrée la plus récente, même si elle dépasse le budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            self._spill(next(iter(self._entries)))
+
+    # ---------- disque ----------
+
+    def _spill(self, dataset_id: str):
+        df, file_type, _, _ = self._entries[dataset_id]
+        self._drop(dataset_id)
+        os.makedirs(self.store_dir, exist_ok=True)
+        base = os.path.join(self.store_dir, f"{dataset_id}.{file_type}")
+        try:
+            df.to_parquet(base + ".parquet", index=False)
+        except Exception:
+            # pyarrow absent ou colonnes mixtes non représentables en Parquet
+            with open(base + ".pkl", "wb") as fh:
+                pickle.dump(df, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _path(self, dataset_id: str) -> Optional[str]:
+        if not os.path.isdir(self.store_dir):
+            return None
+        now = time.time()
+        for name in os.listdir(self.store_dir):
+            path = os.path.join(self.store_dir, name)
+            if now - os.path.getmtime(path) > self.store_ttl:
+                os.remove(path)
+            elif name.startswith(dataset_id + "."):
+                return path
+        return None
+
+    def _load(self, dataset_id: str):
+        path = self._path(dataset_id)
+        if path is None:
+            raise KeyError(dataset_id)
+        file_type = path.rsplit(".", 2)[-2]
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)
+        else:
+            with open(path, "rb") as fh:
+                df = pickle.load(fh)
+        os.utime(path)
+        return df, file_type
+
+
+cache = DatasetCache()
+
+
+def load_input(file: Optional[UploadFile] = None, dataset_id: Optional[str] = None):
+    """
+    Remplace load_file dans les routes : fichier envoyé ou `dataset_id`
+    obtenu via POST /datasets. Lève ValueError comme load_file.
+    """
+    if dataset_id:
+        try:
+            return cache.get(dataset_id)
+        except KeyError:
+            raise ValueError(f"Dataset inconnu ou expiré : {dataset_id}")
+    if file is None:
+        raise ValueError("Veuillez fournir un fichier ou un dataset_id.")
+    return load_file(file)
+
+
+@router.post("/datasets")
+@offload
+def upload_dataset(file: UploadFile = File(...)):
+    """
+    Analyse le fichier une seule fois et renvoie son identifiant, à passer
+    ensuite en `dataset_id` aux autres routes.
+    """
+    dataset_id = content_id(file.file, file.filename)
+    try:
+        df, file_type = cache.get(dataset_id)
+    except KeyError:
+        try:
+            df, file_type = load_file(file)
+        except Exception as e:
+            return {"error": str(e)}
+        cache.put(dataset_id, df, file_type)
+
+    return {
+        "dataset_id": dataset_id,
+        "rows": len(df),
+        "columns": df.columns.tolist(),
+        "numeric_columns": df.select_dtypes(include=["number"]).columns.tolist(),
+    }
+
+
+@router.delete("/datasets/{dataset_id}")
+def delete_dataset(dataset_id: str):
+    """Libère un jeu de données (mémoire et disque)."""
+    if not cache.delete(dataset_id):
+        return {"error": f"Dataset inconnu ou expiré : {dataset_id}"}
+    return {"deleted": dataset_id}
@@ -0,0 +1,89 @@
+"""
+Analyse des dates colonne par colonne.
+
+Au lieu d'essayer les huit formats cellule par cellule (et de lever une
+exception à chaque échec), on travaille sur les valeurs distinctes :
+un échantillon sert à classer les formats, chaque format est ensuite
+appliqué d'un bloc aux valeurs encore non reconnues, et seules les
+dernières passent par l'analyse libre (dayfirst) de pandas.
+"""
+import numpy as np
+import pandas as pd
+
+DATE_FORMATS = ["%d/%m/%Y", "%Y/%m/%d", "%d-%m-%Y", "%Y-%m-%d",
+                "%d.%m.%Y", "%Y.%m.%d", "%d%m%Y", "%Y%m%d"]
+
+SAMPLE_SIZE = 1000
+
+
+def rank_formats(sample: pd.Index, formats=DATE_FORMATS) -> list:
+    """Trie les formats par nombre de valeurs reconnues dans l'échantillon."""
+    hits = [pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum() for fmt in formats]
+    # tri stable : à égalité, l'ordre historique des formats est conservé
+    order = sorted(range(len(formats)), key=lambda i: -hits[i])
+    return [formats[i] for i in order]
+
+
+def parse_unique_dates(values: pd.Index, sample_size: int = SAMPLE_SIZE) -> pd.DatetimeIndex:
+    """
+    Analyse des chaînes distinctes (déjà strip) : format gagnant en bloc,
+    puis les formats suivants sur le reste, puis l'analyse libre.
+    """
+    parsed = pd.Series(pd.NaT, index=range(len(values)), dtype="datetime64[ns]")
+    if len(values) == 0:
+        return pd.DatetimeIndex(parsed)
+
+    rng = np.random.default_rng(0)
+    sample = values if len(values) <= sample_size else values[rng.choice(len(values), sample_size, replace=False)]
+
+    remaining = np.arange(len(values))
+    for fmt in rank_formats(sample):
+        attempt = pd.to_datetime(values[remaining], format=fmt, errors="coerce")
+        ok = ~attempt.isna()
+        parsed.iloc[remaining[ok]] = attempt[ok]
+        remaining = remaining[~ok]
+        if len(remaining) == 0:
+            break
+
+    # Reliquat : analyse libre, valeur par valeur (une seule fois par valeur distincte)
+    for i in remaining:
+        try:
+            parsed.iloc[i] = pd.to_datetime(values[i], dayfirst=True, errors="coerce")
+        except Exception:
+            continue
+    return pd.DatetimeIndex(parsed)
+
+
+def _factorize(series: pd.Series):
+    """Codes + valeurs distinctes de str(x).strip() ; -1 pour les manquants."""
+    present = series.notna().to_numpy()
+    codes = np.full(len(series), -1, dtype=np.intp)
+    if not present.any():
+        return codes, pd.Index([], dtype=object)
+    text = series[present].astype(str).astype(object).str.strip()
+    sub_codes, uniques = pd.factorize(text)
+    codes[present] = sub_codes
+    return codes, pd.Index(uniques, dtype=object)
+
+
+def parse_date_column(series: pd.Series) -> pd.Series:
+    """Équivalent colonne de `series.apply(parse_date)`, en datetime64."""
+    if pd.api.types.is_datetime64_dtype(series):
+        return series
+    codes, uniques = _factorize(series)
+    parsed = parse_unique_dates(uniques)
+    values = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(values, index=series.index)
+
+
+def date_key_column(series: pd.Series, fmt: str = "%Y-%m-%d") -> pd.Series:
+    """
+    Clés de dates pour la déduplication : formatage fait une fois par
+    valeur distincte, "NULL" pour les dates manquantes ou non reconnues.
+    """
+    if pd.api.types.is_datetime64_dtype(series):
+        return series.dt.strftime(fmt).fillna("NULL")
+    codes, uniques = _factorize(series)
+    keys = np.asarray(parse_unique_dates(uniques).strftime(fmt).fillna("NULL"), dtype=object)
+    keys = np.append(keys, "NULL")  # le code -1 pointe sur ce dernier élément
+    return pd.Series(keys[codes], index=series.index)
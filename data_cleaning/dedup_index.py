@@ -0,0 +1,119 @@
+"""
+Index de dédoublonnage par empreintes.
+
+Chaque ligne normalisée est résumée par une empreinte 64 bits calculée de
+façon vectorisée (pd.util.hash_pandas_object) ; seules ces empreintes sont
+conservées, dans des tableaux numpy triés fusionnés au fil des ajouts.
+Le DataFrame normalisé n'existe donc jamais en entier : il est produit
+morceau par morceau puis jeté, et l'on renvoie les lignes d'origine.
+
+Deux lignes différentes n'entrent en collision qu'avec une probabilité de
+l'ordre de n² / 2^65 (≈ 3e-6 pour dix millions de lignes).
+"""
+import numpy as np
+import pandas as pd
+
+from .metrics import stage
+from .normalization import normalize_for_duplicates
+from .parallel_normalization import parallel_enabled, parallel_row_hashes
+
+CHUNK_ROWS = 100_000
+
+
+def row_hashes(df_norm: pd.DataFrame) -> np.ndarray:
+    """Empreinte uint64 de chaque ligne (l'index n'entre pas dans le calcul)."""
+    return pd.util.hash_pandas_object(df_norm, index=False).to_numpy()
+
+
+class DedupIndex:
+    """
+    Ensemble compact des empreintes déjà vues (8 octets par ligne unique).
+
+    Les empreintes sont rangées en séries triées de tailles croissantes
+    (fusion façon compteur binaire) : l'appartenance se teste par recherche
+    dichotomique, l'insertion coûte O(log n) amorti par empreinte.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def __contains__(self, value) -> bool:
+        return bool(self._seen(np.array([value], dtype=np.uint64))[0])
+
+    def _seen(self, hashes: np.ndarray) -> np.ndarray:
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.searchsorted(run, hashes)
+            pos[pos == len(run)] = 0
+            seen |= run[pos] == hashes
+        return seen
+
+    def add(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Enregistre un lot d'empreintes et renvoie le masque des premières
+        occurrences : ni vues dans un lot précédent, ni plus tôt dans ce lot.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        first = ~pd.Series(hashes).duplicated().to_numpy()
+        if self._runs:
+            first &= ~self._seen(hashes)
+
+        new = np.sort(hashes[first])
+        # fusion des séries de taille comparable pour en garder O(log n)
+        while self._runs and len(self._runs[-1]) <= len(new):
+            new = np.sort(np.concatenate([self._runs.pop(), new]), kind="mergesort")
+        if len(new):
+            self._runs.append(new)
+        return first
+
+
+def _no_progress(stage, fraction):
+    pass
+
+
+def normalized_hashes(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS, progress=_no_progress,
+                      columns=None) -> np.ndarray:
+    """
+    Empreintes des lignes normalisées de `df` (étape "normalize"), sur les
+    colonnes `columns` (toutes par défaut), par tranches de `chunk_rows` lignes.
+    """
+    positions = None if columns is None else [df.columns.get_loc(c) for c in columns]
+    with stage("normalize", len(df)) as record:
+        # gros fichiers : colonnes réparties sur les cœurs (parallel_normalization.py)
+        hashes = parallel_row_hashes(df, positions, progress) if parallel_enabled(len(df)) else None
+        if hashes is None:
+            hashes = np.empty(len(df), dtype=np.uint64)
+            selected = slice(None) if positions is None else positions
+            for start in range(0, len(df), chunk_rows):
+                part = df.iloc[start:start + chunk_rows, selected]
+                hashes[start:start + len(part)] = row_hashes(normalize_for_duplicates(part))
+                progress("normalize", (start + len(part)) / len(df))
+        record.rows_out = len(df)
+    return hashes
+
+
+def first_occurrences(df: pd.DataFrame, index: DedupIndex = None,
+                      chunk_rows: int = CHUNK_ROWS, progress=_no_progress, columns=None) -> np.ndarray:
+    """
+    Masque des lignes de `df` à conserver. La normalisation est faite par
+    tranches de `chunk_rows` lignes ; passer un `index` existant permet de
+    dédoublonner un flux de morceaux successifs. `progress(étape, fraction)`
+    suit les étapes "normalize" puis "dedup". `columns` : colonnes comparées
+    (toutes par défaut), les autres ne sont pas normalisées.
+    """
+    index = DedupIndex() if index is None else index
+    hashes = normalized_hashes(df, chunk_rows, progress, columns)
+    with stage("dedup", len(df)) as record:
+        keep = index.add(hashes)
+        record.rows_out = int(keep.sum())
+    progress("dedup", 1.0)
+    return keep
+
+
+def drop_duplicate_rows(df: pd.DataFrame, index: DedupIndex = None,
+                        chunk_rows: int = CHUNK_ROWS, progress=_no_progress, columns=None) -> pd.DataFrame:
+    """Lignes d'origine de `df` correspondant à la première occurrence de chaque doublon."""
+    return df[first_occurrences(df, index, chunk_rows, progress, columns)]
@@ -1,131 +1,89 @@
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import StreamingResponse
-from .utils import load_file
+from fastapi import APIRouter, UploadFile, File, Form, Header
+from typing import Optional
+from .datasets import load_input
+from .workers import offload
+from .export import check_format, frame_response
+from .fuzzy import NGRAM, NUM_PERM, SIMILARITY
+from .backends import check_engine
+from .pipeline import compile_steps, execute
+from .result_cache import result_cache
 import pandas as pd
-import io
-import unidecode
-import re
+import json
 
 router = APIRouter()
 
-def normalize_for_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+@router.post("/deduplicate")
+@offload
+def deduplicate(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Form(None),
+    mode: str = Form("exact"),  # exact / fuzzy
+    fuzzy_columns: Optional[str] = Form(None),  # ["nom", "prenom"] (défaut : colonnes texte)
+    block_on: Optional[str] = Form(None),  # ["ville"] : ne compare que les lignes du même bloc
+    similarity: float = Form(SIMILARITY),
+    num_perm: int = Form(NUM_PERM),
+    ngram: int = Form(NGRAM),
+    keep_all: bool = Form(False),
+    engine: Optional[str] = Form(None),  # pandas / polars
+    output_format: Optional[str] = Form(None),  # xlsx / parquet / feather / csv / ndjson
+    compression: Optional[str] = Form(None),
+    if_none_match: Optional[str] = Header(None)
+):
     """
-    Version PRO adaptée : normalise le texte, les dates et les nombres,
-    mais conserve les colonnes Email et Message intactes pour éviter de les casser.
+    Supprime les lignes dupliquées dans un fichier CSV, Excel ou JSON.
+    Retourne un fichier Excel propre et lisible (ou le format demandé).
+
+    mode=fuzzy : doublons approximatifs (MinHash LSH, voir fuzzy.py) ; chaque
+    ligne reçoit cluster_id et cluster_size, seul le premier représentant de
+    chaque grappe est gardé (toutes les lignes avec keep_all).
     """
-    df_norm = df.copy()
-
-    # Colonnes à ne pas toucher
-    protected_cols = ["E-mail", "Message"]
-
-    # ---------- FONCTIONS INTERNES ----------
-
-    def clean_text(x):
-        if pd.isna(x):
-            return ""
-        x = str(x).strip()
-        x = unidecode.unidecode(x)  # enlever les accents
-        x = re.sub(r"\s+", " ", x)  # espaces multiples → 1
-        x = x.lower()
-        x = re.sub(r"[^a-z0-9\s\-/]", "", x)  # garder lettres, chiffres, -, /
-        return x
-
-    def parse_date(x):
-        if pd.isna(x):
-            return None
-        x = str(x).strip()
-        for fmt in ["%d/%m/%Y", "%Y/%m/%d", "%d-%m-%Y", "%Y-%m-%d",
-                    "%d.%m.%Y", "%Y.%m.%d", "%d%m%Y", "%Y%m%d"]:
-            try:
-                return pd.to_datetime(x, format=fmt, errors="raise")
-            except:
-                continue
-        try:
-            return pd.to_datetime(x, dayfirst=True, errors='coerce')
-        except:
-            return None
-
-    def parse_number(x):
-        if pd.isna(x):
-            return None
-        x = str(x).strip().replace(" ", "")
-        if "," in x and "." not in x:
-            x = x.replace(",", ".")
-        elif x.count(",") > 1:
-            x = x.replace(",", "")
-        x = re.sub(r"[^\d\.-]", "", x)
+    try:
+        fmt, compression = check_format(output_format, compression)
+        engine = check_engine(engine)
+        if mode not in ("exact", "fuzzy"):
+            raise ValueError("Mode de dédoublonnage invalide (attendu : exact, fuzzy).")
         try:
-            return float(x)
-        except:
-            return None
-
-    # ---------- TRAITEMENT COLONNES ----------
-    for col in df_norm.columns:
-
-        # Ignorer les colonnes protégées
-        if col in protected_cols:
-            continue
-
-        # Colonnes texte
-        if df_norm[col].dtype == object:
-            df_norm[col] = df_norm[col].apply(clean_text)
+            fuzzy_columns = json.loads(fuzzy_columns) if fuzzy_columns else None
+            block_on = json.loads(block_on) if block_on else None
+        except ValueError:
+            raise ValueError("Format des colonnes invalide.")
+    except ValueError as e:
+        return {"error": str(e)}
 
-        # Colonnes date
-        if "date" in col.lower() or "birth" in col.lower() or "nais" in col.lower():
-            df_norm[col] = df_norm[col].apply(parse_date)
-            df_norm[col] = df_norm[col].dt.strftime("%Y-%m-%d")
-            df_norm[col] = df_norm[col].fillna("NULL")
-            continue
+    key = result_cache.key("deduplicate", file, dataset_id, dict(
+        mode=mode, fuzzy_columns=fuzzy_columns, block_on=block_on, similarity=similarity,
+        num_perm=num_perm, ngram=ngram, keep_all=keep_all, fmt=fmt, compression=compression,
+    ))
+    cached = result_cache.lookup(key, if_none_match, "deduplicated_data", fmt)
+    if cached is not None:
+        return cached
 
-        # Colonnes numériques
-        if pd.api.types.is_numeric_dtype(df_norm[col]):
-            df_norm[col] = pd.to_numeric(df_norm[col], errors="coerce")
-            continue
+    try:
+        df, _ = load_input(file, dataset_id)
+    except Exception as e:
+        return {"error": str(e)}
 
-        # Colonnes mixtes (texte + chiffres)
-        if df_norm[col].dtype == object:
-            df_norm[col] = df_norm[col].apply(clean_text)
-    return df_norm
+    # Suppression des doublons : comparaison sur les valeurs normalisées,
+    # mais ce sont les lignes d'origine (première occurrence) qui sont renvoyées
+    step = {"op": "dedup", "mode": mode}
+    if mode == "fuzzy":
+        step.update(columns=fuzzy_columns, block_on=block_on, similarity=similarity,
+                    num_perm=num_perm, ngram=ngram, keep_all=keep_all)
+    try:
+        df_clean = execute(df, compile_steps([step]), engine=engine)
+    except ValueError as e:
+        return {"error": str(e)}
 
+    # Excel lisible : colonnes numériques affichées sans décimales (format "0")
+    integer_columns = df_clean.select_dtypes(include=['number']).columns.tolist()
 
-@router.post("/deduplicate")
-async def deduplicate(file: UploadFile = File(...)):
-    """
-    Supprime les lignes dupliquées dans un fichier CSV, Excel ou JSON.
-    Retourne toujours un fichier Excel propre et lisible.
-    """
+    # Réponse envoyée morceau par morceau
     try:
-        df, _ = load_file(file)
-    except Exception as e:
+        return result_cache.store(key, frame_response(df_clean, "deduplicated_data", fmt, compression,
+                                                      integer_columns))
+    except ValueError as e:
         return {"error": str(e)}
 
-    # Normalisation pour améliorer la détection des doublons
-    df_norm = normalize_for_duplicates(df)
-
-    # Suppression des doublons
-    df_clean = df_norm.drop_duplicates().reset_index(drop=True)
-
-    # Conversion en Excel lisible
-    stream = io.BytesIO()
-    with pd.ExcelWriter(stream, engine='xlsxwriter') as writer:
-        for col in df_clean.select_dtypes(include=['number']).columns:
-            df_clean[col] = df_clean[col].apply(lambda x: f"{int(x):.0f}" if pd.notna(x) else "")
-        df_clean.to_excel(writer, index=False, sheet_name="Nettoye")
-        # Ajuster automatiquement la largeur des colonnes
-        for column in df_clean:
-            col_width = max(df_clean[column].astype(str).map(len).max(), len(column)) + 2
-            writer.sheets["Nettoye"].set_column(df_clean.columns.get_loc(column), df_clean.columns.get_loc(column), col_width)
-
-    stream.seek(0)
-
-    # Création de la réponse
-    response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response.headers["Content-Disposition"] = "attachment; filename=deduplicated_data.xlsx"
-    return response
-
 
 
 
@@ -0,0 +1,352 @@
+"""
+Formats de sortie des routes de nettoyage.
+
+Excel reste le format par défaut ; Parquet, Arrow IPC (Feather), CSV et
+NDJSON évitent l'aller-retour par xlsxwriter et la limite de 1 048 576
+lignes d'Excel. Parquet et Feather nécessitent pyarrow.
+"""
+import io
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import StreamingResponse
+
+from .metrics import stage
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# format -> (extension, type MIME)
+FORMATS = {
+    "xlsx": ("xlsx", XLSX_MEDIA_TYPE),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "feather": ("arrow", "application/vnd.apache.arrow.file"),
+    "csv": ("csv", "text/csv"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+}
+FORMAT_ALIASES = {"excel": "xlsx", "arrow": "feather", "ipc": "feather", "jsonl": "ndjson"}
+
+BATCH_ROWS = 50_000  # lignes par morceau de réponse
+XLSX_MAX_ROWS = 1_048_576  # lignes d'une feuille Excel, en-tête compris
+WIDTH_SAMPLE = 10_000  # valeurs examinées pour estimer la largeur d'une colonne Excel
+MAX_WIDTH = 50
+
+# compressions acceptées (la première est la valeur par défaut)
+COMPRESSIONS = {
+    "parquet": ("snappy", "zstd", "gzip", "brotli", "lz4", "none"),
+    "feather": ("lz4", "zstd", "none"),
+}
+
+
+def check_format(output_format: Optional[str], compression: Optional[str] = None,
+                 default: str = "xlsx") -> tuple:
+    """(format, compression) normalisés ; lève ValueError si la combinaison est invalide."""
+    fmt = (output_format or default).lower()
+    fmt = FORMAT_ALIASES.get(fmt, fmt)
+    if fmt not in FORMATS:
+        raise ValueError(f"Format de sortie invalide : {output_format} "
+                         f"(attendu : {', '.join(FORMATS)}).")
+    if fmt not in COMPRESSIONS:
+        if compression:
+            raise ValueError(f"Le format {fmt} n'accepte pas de compression.")
+        return fmt, None
+    compression = (compression or COMPRESSIONS[fmt][0]).lower()
+    if compression not in COMPRESSIONS[fmt]:
+        raise ValueError(f"Compression invalide pour {fmt} : {compression} "
+                         f"(attendu : {', '.join(COMPRESSIONS[fmt])}).")
+    return fmt, compression
+
+
+def arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colonnes objet aux types mélangés (ex. nombres + "NULL" après fillna)
+    converties en texte : Arrow exige un type par colonne.
+    """
+    mixed = [c for c in df.columns
+             if df[c].dtype == object and pd.api.types.infer_dtype(df[c], skipna=True) in ("mixed", "mixed-integer")]
+    if not mixed:
+        return df
+    df = df.copy(deep=False)
+    for col in mixed:
+        df[col] = df[col].map(lambda x: x if pd.isna(x) else str(x))
+    return df
+
+
+def _arrow_table(df: pd.DataFrame):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("Les formats Parquet et Feather nécessitent pyarrow.")
+    return pa.Table.from_pandas(arrow_safe(df), preserve_index=False)
+
+
+def write_frame(df: pd.DataFrame, target, fmt: str, compression: Optional[str] = None):
+    """Écrit `df` (hors Excel) dans un chemin ou un flux binaire."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(_arrow_table(df), target,
+                       compression=None if compression == "none" else compression)
+    elif fmt == "feather":
+        import pyarrow.feather as feather
+        feather.write_feather(_arrow_table(df), target,
+                              compression="uncompressed" if compression == "none" else compression)
+    elif fmt == "csv":
+        df.to_csv(target, index=False, encoding="utf-8")
+    elif fmt == "ndjson":
+        text = df.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        if isinstance(target, str):
+            with open(target, "w", encoding="utf-8") as fh:
+                fh.write(text)
+        else:
+            target.write(text.encode("utf-8"))
+    else:
+        raise ValueError(f"Format non géré par write_frame : {fmt}")
+
+
+class ChunkWriter:
+    """
+    Écriture incrémentale d'un fichier à partir de morceaux de DataFrame
+    (pipeline en flux). Le schéma Arrow est fixé par le premier morceau.
+    """
+
+    def __init__(self, path: str, fmt: str, compression: Optional[str] = None):
+        if fmt == "xlsx":
+            raise ValueError("Le format xlsx n'est pas disponible en mode streaming.")
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self._writer = None
+        self._fh = None
+
+    def write(self, chunk: pd.DataFrame):
+        if self.fmt == "csv":
+            header = self._fh is None
+            if header:
+                self._fh = open(self.path, "w", newline="", encoding="utf-8")
+            chunk.to_csv(self._fh, header=header, index=False)
+        elif self.fmt == "ndjson":
+            if self._fh is None:
+                self._fh = open(self.path, "w", encoding="utf-8")
+            if len(chunk):
+                self._fh.write(chunk.to_json(orient="records", lines=True, force_ascii=False,
+                                             date_format="iso"))
+        else:
+            if self._writer is not None and not len(chunk):
+                return
+            table = _arrow_table(chunk)
+            if self._writer is None:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                # colonne entièrement vide dans le premier morceau : on la suppose textuelle
+                self._schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ])
+                compression = None if self.compression == "none" else self.compression
+                if self.fmt == "parquet":
+                    self._writer = pq.ParquetWriter(self.path, self._schema, compression=compression)
+                else:
+                    options = pa.ipc.IpcWriteOptions(compression=compression)
+                    self._writer = pa.ipc.new_file(self.path, self._schema, options=options)
+            self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._fh is not None:
+            self._fh.close()
+
+
+class _Drain(io.RawIOBase):
+    """Sortie binaire vidée au fil de l'eau : les écrivains Arrow y écrivent, la réponse HTTP la draine."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _iter_arrow(table, fmt: str, compression: Optional[str], batch_rows: int):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _Drain()
+    codec = None if compression == "none" else compression
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, table.schema, compression=codec)
+    else:
+        writer = pa.ipc.new_file(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+    try:
+        # un groupe de lignes (Parquet) ou un lot (IPC) par tranche
+        for start in range(0, max(table.num_rows, 1), batch_rows):
+            writer.write_table(table.slice(start, batch_rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _iter_text(df: pd.DataFrame, fmt: str, batch_rows: int):
+    if fmt == "csv":
+        yield df.iloc[:0].to_csv(index=False).encode("utf-8")
+    for start in range(0, len(df), batch_rows):
+        part = df.iloc[start:start + batch_rows]
+        if fmt == "csv":
+            yield part.to_csv(header=False, index=False).encode("utf-8")
+        else:
+            yield part.to_json(orient="records", lines=True, force_ascii=False,
+                               date_format="iso").encode("utf-8")
+
+
+def whole_number_columns(df: pd.DataFrame) -> list:
+    """Colonnes numériques dont toutes les valeurs sont entières (test vectorisé)."""
+    return [col for col in df.select_dtypes(include=["number"]).columns
+            if (df[col].dropna() % 1 == 0).all()]
+
+
+def column_widths(df: pd.DataFrame, integer_columns=(), sample_rows: int = WIDTH_SAMPLE,
+                  max_width: int = MAX_WIDTH) -> list:
+    """
+    Largeur d'affichage de chaque colonne, sans convertir toutes les cellules :
+    min/max pour les colonnes entières, échantillon régulier de `sample_rows`
+    valeurs pour les autres.
+    """
+    step = max(1, len(df) // sample_rows)
+    widths = []
+    for col in df.columns:
+        series = df[col].dropna()
+        if col in integer_columns and len(series):
+            longest = max(len(f"{series.min():.0f}"), len(f"{series.max():.0f}"))
+        elif len(series):
+            longest = series.iloc[::step].astype(str).str.len().max()
+        else:
+            longest = 0
+        widths.append(min(max(longest, len(str(col))) + 2, max_width))
+    return widths
+
+
+def _cell_values(series: pd.Series, numeric: bool) -> list:
+    """Valeurs Python d'un bloc de colonne : manquantes à None (laissées vides), infinis en texte."""
+    values = series.astype(object).where(series.notna(), None)
+    if numeric:
+        infinite = series.isin([np.inf, -np.inf])
+        if infinite.any():
+            values[infinite] = np.where(series[infinite] > 0, "inf", "-inf")
+    return values.tolist()
+
+
+def write_xlsx(df: pd.DataFrame, target, integer_columns=(), sheet_name: str = "Nettoye",
+               batch_rows: int = BATCH_ROWS):
+    """
+    Classeur xlsxwriter en mode constant_memory : les lignes sont écrites
+    dans l'ordre et vidées sur disque au fur et à mesure, sans la copie
+    intermédiaire de DataFrame.to_excel ; les valeurs sont converties par
+    blocs de `batch_rows` lignes. Les nombres restent numériques ;
+    `integer_columns` sont affichées sans décimales par le format "0".
+    Les infinis sont écrits en texte "inf" / "-inf" (inf_rep de to_excel).
+    Lève ValueError si `df` dépasse la limite de lignes d'Excel.
+    """
+    import xlsxwriter
+
+    if len(df) + 1 > XLSX_MAX_ROWS:
+        raise ValueError(f"Trop de lignes pour Excel ({len(df)}, maximum {XLSX_MAX_ROWS - 1}) : "
+                         "choisir output_format=csv ou parquet.")
+
+    workbook = xlsxwriter.Workbook(target, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        integer = workbook.add_format({"num_format": "0"})
+        numeric = set(df.select_dtypes(include=["number"]).columns)
+        formats, writers = [], []
+        for idx, (col, width) in enumerate(zip(df.columns, column_widths(df, integer_columns))):
+            cell_format = integer if col in integer_columns else None
+            worksheet.set_column(idx, idx, width, cell_format)
+            formats.append(cell_format)
+            # write_number refuse les infinis : colonne écrite par write (texte ou nombre)
+            infinite = col in numeric and df[col].isin([np.inf, -np.inf]).any()
+            writers.append(worksheet.write_number if col in numeric and not infinite else worksheet.write)
+
+        # même en-tête que pandas.to_excel
+        header = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        worksheet.write_row(0, 0, [str(c) for c in df.columns], header)
+        # valeurs Python par blocs de lignes : mémoire bornée par le bloc, pas par le fichier
+        for start in range(0, len(df), batch_rows):
+            part = df.iloc[start:start + batch_rows]
+            columns = [_cell_values(part.iloc[:, j], col in numeric) for j, col in enumerate(part.columns)]
+            for row, values in enumerate(zip(*columns), start + 1):
+                for col, value in enumerate(values):
+                    if value is not None:
+                        writers[col](row, col, value, formats[col])
+    finally:
+        workbook.close()
+
+
+def _iter_file(fh, chunk_size: int = 1 << 20):
+    """Lit puis ferme un fichier temporaire déjà ouvert."""
+    with fh:
+        while chunk := fh.read(chunk_size):
+            yield chunk
+
+
+def _timed(chunks, rows: int):
+    """Étape "export" mesurée jusqu'au dernier morceau (après l'envoi des en-têtes)."""
+    with stage("export", rows) as record:
+        yield from chunks
+        record.rows_out = rows
+
+
+def stream_response(chunks, stem: str, fmt: str) -> StreamingResponse:
+    """Réponse HTTP envoyée morceau par morceau."""
+    extension, media_type = FORMATS[fmt]
+    response = StreamingResponse(chunks, media_type=media_type)
+    response.headers["Content-Disposition"] = f"attachment; filename={stem}.{extension}"
+    return response
+
+
+def frame_response(df: pd.DataFrame, stem: str, fmt: str, compression: Optional[str] = None,
+                   integer_columns=(), batch_rows: int = BATCH_ROWS) -> StreamingResponse:
+    """
+    Réponse HTTP pour `df` dans le format demandé, sans tampon BytesIO :
+    CSV/NDJSON par lots de lignes, Parquet par groupes de lignes, Feather par
+    lots IPC. Un classeur xlsx n'est lisible qu'une fois complet : il est
+    écrit en constant_memory dans un fichier temporaire puis relu par blocs.
+    Les erreurs (pyarrow absent…) sont levées ici, avant le premier octet.
+    """
+    if fmt == "xlsx":
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            with stage("export", len(df)) as record:
+                write_xlsx(df, path, integer_columns)
+                record.rows_out = len(df)
+            fh = open(path, "rb")
+        finally:
+            # supprimé dès l'ouverture : rien ne reste sur disque, même si
+            # la réponse n'est jamais lue (client parti avant le corps)
+            os.remove(path)
+        chunks = _iter_file(fh)
+    elif fmt in ("parquet", "feather"):
+        chunks = _timed(_iter_arrow(_arrow_table(df), fmt, compression, batch_rows), len(df))
+    else:
+        chunks = _timed(_iter_text(df, fmt, batch_rows), len(df))
+    return stream_response(chunks, stem, fmt)
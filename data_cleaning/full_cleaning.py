@@ -1,222 +1,208 @@
-from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, UploadFile, File, Form, Header
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
 from typing import Optional
 import pandas as pd
 import numpy as np
-import io, json
-import unidecode
-from .utils import load_file
-import re
-
+import json, os, tempfile
+from .datasets import load_input
+from .workers import offload
+from .streaming import clean_csv_stream
+from .bounds import parse_column_bounds
+from .export import FORMATS, check_format, frame_response, whole_number_columns, write_xlsx
+from .backends import check_engine
+from .pipeline import compile_steps, execute
+from .result_cache import result_cache
+
+STAGES = ["normalize", "dedup", "missing", "outliers", "export"]
 
 router = APIRouter()
 
-def normalize_for_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+
+def _no_progress(stage, fraction):
+    pass
+
+
+def clean_all_steps(
+    missing_method: str = "median",
+    missing_value: Optional[str] = None,
+    outlier_method: str = "delete",
+    columns: Optional[str] = None,
+    use_custom_bounds: bool = False,
+    lower_bound: Optional[str] = None,
+    upper_bound: Optional[str] = None,
+    iqr_factor: float = 1.5,
+    column_bounds: Optional[str] = None,
+    detector: str = "iqr",
+    threshold: Optional[float] = None,
+    quantile_method: str = "exact",
+    quantile_error: Optional[float] = None,
+) -> list:
     """
-    Version PRO adaptée : normalise le texte, les dates et les nombres,
-    mais conserve les colonnes Email et Message intactes pour éviter de les casser.
+    Plan prédéfini du pipeline complet (paramètres de /clean-all-and-download) :
+    normalisation + doublons → valeurs manquantes → outliers. Lève ValueError.
     """
-    df_norm = df.copy()
-
-    # Colonnes à ne pas toucher
-    protected_cols = ["E-mail", "Message"]
-
-    # ---------- FONCTIONS INTERNES ----------
-
-    def clean_text(x):
-        if pd.isna(x):
-            return ""
-        x = str(x).strip()
-        x = unidecode.unidecode(x)  # enlever les accents
-        x = re.sub(r"\s+", " ", x)  # espaces multiples → 1
-        x = x.lower()
-        x = re.sub(r"[^a-z0-9\s\-/]", "", x)  # garder lettres, chiffres, -, /
-        return x
-
-    def parse_date(x):
-        if pd.isna(x):
-            return None
-        x = str(x).strip()
-        for fmt in ["%d/%m/%Y", "%Y/%m/%d", "%d-%m-%Y", "%Y-%m-%d",
-                    "%d.%m.%Y", "%Y.%m.%d", "%d%m%Y", "%Y%m%d"]:
-            try:
-                return pd.to_datetime(x, format=fmt, errors="raise")
-            except:
-                continue
-        try:
-            return pd.to_datetime(x, dayfirst=True, errors='coerce')
-        except:
-            return None
-
-    def parse_number(x):
-        if pd.isna(x):
-            return None
-        x = str(x).strip().replace(" ", "")
-        if "," in x and "." not in x:
-            x = x.replace(",", ".")
-        elif x.count(",") > 1:
-            x = x.replace(",", "")
-        x = re.sub(r"[^\d\.-]", "", x)
+    selected_cols = None
+    if columns and columns != "null":
         try:
-            return float(x)
-        except:
-            return None
-
-    # ---------- TRAITEMENT COLONNES ----------
-    for col in df_norm.columns:
-
-        # Ignorer les colonnes protégées
-        if col in protected_cols:
-            continue
-
-        # Colonnes texte
-        if df_norm[col].dtype == object:
-            df_norm[col] = df_norm[col].apply(clean_text)
+            selected_cols = json.loads(columns)
+        except ValueError:
+            raise ValueError("Format des colonnes invalide.")
 
-        # Colonnes date
-        if "date" in col.lower() or "birth" in col.lower() or "nais" in col.lower():
-            df_norm[col] = df_norm[col].apply(parse_date)
-            df_norm[col] = df_norm[col].dt.strftime("%Y-%m-%d")
-            df_norm[col] = df_norm[col].fillna("NULL")
-            continue
+    custom = None
+    if use_custom_bounds:
+        if lower_bound is None or lower_bound == "" or upper_bound is None or upper_bound == "":
+            raise ValueError("Bornes personnalisées manquantes.")
+        try:
+            custom = [float(lower_bound), float(upper_bound)]
+        except ValueError:
+            raise ValueError("Bornes personnalisées invalides.")
+
+    return [
+        # === 1️⃣ NORMALISATION + DÉDOUBLONNAGE INTELLIGENT ===
+        # (clés normalisées par empreintes, lignes d'origine conservées)
+        {"op": "dedup"},
+        # === 2️⃣ TRAITEMENT VALEURS MANQUANTES === (texte → "NULL", catégories comprises)
+        {"op": "fill_missing", "method": missing_method, "value": missing_value},
+        # === 3️⃣ TRAITEMENT OUTLIERS === (colonnes numériques sélectionnées, toutes par défaut)
+        {"op": "outliers", "method": outlier_method, "columns": selected_cols, "bounds": custom,
+         "column_bounds": parse_column_bounds(column_bounds), "detector": detector, "threshold": threshold,
+         "iqr_factor": iqr_factor, "quantile_method": quantile_method, "quantile_error": quantile_error},
+    ]
+
+
+def clean_all(
+    df: pd.DataFrame,
+    missing_method: str = "median",
+    missing_value: Optional[str] = None,
+    outlier_method: str = "delete",
+    columns: Optional[str] = None,
+    use_custom_bounds: bool = False,
+    lower_bound: Optional[str] = None,
+    upper_bound: Optional[str] = None,
+    iqr_factor: float = 1.5,
+    column_bounds: Optional[str] = None,
+    detector: str = "iqr",
+    threshold: Optional[float] = None,
+    quantile_method: str = "exact",
+    quantile_error: Optional[float] = None,
+    engine: Optional[str] = None,
+    progress=_no_progress,
+) -> pd.DataFrame:
+    """
+    Pipeline complet : normalisation → doublons → valeurs manquantes → outliers.
+    Lève ValueError pour un paramètre invalide ; `progress(étape, fraction)`
+    est appelé au fil des étapes de STAGES. Détecteurs d'outliers, bornes par
+    colonne et quantiles exacts ou par esquisses : voir bounds.py ; exécution
+    du plan : voir pipeline.py ; `engine` : moteur d'exécution (backends.py).
+    """
+    passes = compile_steps(clean_all_steps(
+        missing_method, missing_value, outlier_method, columns,
+        use_custom_bounds, lower_bound, upper_bound, iqr_factor,
+        column_bounds, detector, threshold, quantile_method, quantile_error,
+    ))
+    return execute(df, passes, progress, engine)
 
-        # Colonnes numériques
-        if pd.api.types.is_numeric_dtype(df_norm[col]):
-            df_norm[col] = pd.to_numeric(df_norm[col], errors="coerce")
-            continue
 
-        # Colonnes mixtes (texte + chiffres)
-        if df_norm[col].dtype == object:
-            df_norm[col] = df_norm[col].apply(clean_text)
-    return df_norm
+def write_excel(df_clean: pd.DataFrame, target):
+    """Export Excel propre (chemin ou flux binaire) : entiers affichés sans décimales."""
+    write_xlsx(df_clean, target, whole_number_columns(df_clean))
 
 
 @router.post("/clean-all-and-download")
-async def clean_all_and_download(
-    file: UploadFile = File(...),
-    missing_method: str = Form("median"),       
+@offload
+def clean_all_and_download(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Form(None),
+    missing_method: str = Form("median"),
     missing_value: Optional[str] = Form(None),  # Changé en Optional[str]
-    outlier_method: str = Form("delete"),       
+    outlier_method: str = Form("delete"),
     columns: Optional[str] = Form(None),
     use_custom_bounds: bool = Form(False),
     lower_bound: Optional[str] = Form(None),    # Changé en Optional[str]
     upper_bound: Optional[str] = Form(None),    # Changé en Optional[str]
-    iqr_factor: float = Form(1.5)
+    iqr_factor: float = Form(1.5),
+    column_bounds: Optional[str] = Form(None),  # {"colonne": [basse, haute]}
+    detector: str = Form("iqr"),  # iqr / mad / zscore
+    threshold: Optional[float] = Form(None),
+    quantile_method: str = Form("exact"),  # exact / sketch
+    quantile_error: Optional[float] = Form(None),
+    streaming: bool = Form(False),
+    engine: Optional[str] = Form(None),  # pandas / polars (hors streaming)
+    output_format: Optional[str] = Form(None),  # xlsx / parquet / feather / csv / ndjson
+    compression: Optional[str] = Form(None),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Pipeline complet : normalisation → doublons → valeurs manquantes → outliers."""
 
+    # Par défaut : Excel, ou CSV en mode streaming
     try:
-        df, _ = load_file(file)
-    except Exception as e:
-        return {"error": f"Erreur de chargement : {e}"}
-
-    df_clean = df.copy()
-
-    # === 1️⃣ NORMALISATION + DÉDOUBLONNAGE INTELLIGENT ===
-    df_clean = normalize_for_duplicates(df_clean)
-    df_clean = df_clean.drop_duplicates().reset_index(drop=True)
-
-    # === 2️⃣ TRAITEMENT VALEURS MANQUANTES ===
-    numeric_cols = df_clean.select_dtypes(include=[np.number]).columns.tolist()
-    text_cols = df_clean.select_dtypes(include=["object", "string"]).columns.tolist()
-
-    if missing_method == "median":
-        df_clean[numeric_cols] = df_clean[numeric_cols].fillna(df_clean[numeric_cols].median())
-    elif missing_method == "mean":
-        df_clean[numeric_cols] = df_clean[numeric_cols].fillna(df_clean[numeric_cols].mean())
-    elif missing_method == "constant":
-        if missing_value is None or missing_value == "":
-            return {"error": "Valeur constante manquante."}
+        fmt, compression = check_format(output_format, compression, "csv" if streaming else "xlsx")
+        engine = check_engine(engine)
+    except ValueError as e:
+        return {"error": str(e)}
+    if streaming:
+        if file is None or not file.filename.lower().endswith(".csv"):
+            return {"error": "Le mode streaming nécessite l'envoi d'un fichier CSV."}
+        if fmt == "xlsx":
+            return {"error": "Le format xlsx n'est pas disponible en mode streaming."}
+
+    # Résultat déjà calculé pour ce fichier et ces paramètres : renvoyé tel quel
+    key = result_cache.key("clean-all-and-download", file, dataset_id, dict(
+        missing_method=missing_method, missing_value=missing_value, outlier_method=outlier_method,
+        columns=columns, use_custom_bounds=use_custom_bounds, lower_bound=lower_bound,
+        upper_bound=upper_bound, iqr_factor=iqr_factor, column_bounds=column_bounds,
+        detector=detector, threshold=threshold, quantile_method=quantile_method,
+        quantile_error=quantile_error, streaming=streaming, fmt=fmt, compression=compression,
+    ))
+    cached = result_cache.lookup(key, if_none_match, "donnees_nettoyees", fmt)
+    if cached is not None:
+        return cached
+
+    # Mode flux : CSV lu par morceaux, résultat écrit au fil de l'eau
+    if streaming:
+        extension, media_type = FORMATS[fmt]
+        fd, output_path = tempfile.mkstemp(suffix="." + extension)
+        os.close(fd)
         try:
-            constant_val = float(missing_value)
-        except ValueError:
-            return {"error": "Valeur constante invalide."}
-        df_clean[numeric_cols] = df_clean[numeric_cols].fillna(constant_val)
-    elif missing_method == "null":
-        # df_clean[numeric_cols] = df_clean[numeric_cols].fillna("NULL")
-            df_clean = df_clean.fillna("NULL")
-
-    else:
-        return {"error": "Méthode de valeurs manquantes invalide."}
+            clean_csv_stream(
+                file.file, output_path, missing_method, missing_value, outlier_method, columns,
+                use_custom_bounds, lower_bound, upper_bound, iqr_factor,
+                column_bounds=column_bounds, detector=detector, threshold=threshold,
+                quantile_method=quantile_method, quantile_error=quantile_error,
+                output_format=fmt, compression=compression,
+            )
+        except Exception as e:
+            os.remove(output_path)
+            return {"error": str(e)}
+        result_cache.store_file(key, output_path)
+        response = FileResponse(
+            output_path,
+            media_type=media_type,
+            filename="donnees_nettoyees." + extension,
+            background=BackgroundTask(os.remove, output_path),
+        )
+        if key is not None:
+            response.headers["ETag"] = f'"{key}"'
+        return response
 
-    # Texte → "NULL"
-    df_clean[text_cols] = df_clean[text_cols].fillna("NULL")
+    try:
+        df, _ = load_input(file, dataset_id)
+    except Exception as e:
+        return {"error": f"Erreur de chargement : {e}"}
 
-    # === 3️⃣ TRAITEMENT OUTLIERS ===
-    if columns and columns != "null":
-        try:
-            selected_cols = json.loads(columns)
-        except:
-            return {"error": "Format des colonnes invalide."}
-    else:
-        selected_cols = numeric_cols
-
-    # Vérification
-    numeric_available = df_clean.select_dtypes(include=[np.number]).columns.tolist()
-    cols_to_check = [c for c in selected_cols if c in numeric_available]
-
-    # Si des colonnes numériques sont sélectionnées, traiter les outliers
-    if cols_to_check:
-        masks = {}
-        for col in cols_to_check:
-            if use_custom_bounds:
-                if lower_bound is None or lower_bound == "" or upper_bound is None or upper_bound == "":
-                    return {"error": "Bornes personnalisées manquantes."}
-                try:
-                    col_lower = float(lower_bound)
-                    col_upper = float(upper_bound)
-                except ValueError:
-                    return {"error": "Bornes personnalisées invalides."}
-            else:
-                Q1, Q3 = df_clean[col].quantile([0.25, 0.75])
-                IQR = Q3 - Q1
-                col_lower = Q1 - iqr_factor * IQR
-                col_upper = Q3 + iqr_factor * IQR
-
-            masks[col] = (df_clean[col] < col_lower) | (df_clean[col] > col_upper)
-
-        # Application
-        if outlier_method == "delete":
-            global_mask = np.column_stack([masks[c] for c in cols_to_check]).any(axis=1)
-            df_clean = df_clean[~global_mask].reset_index(drop=True)
-        elif outlier_method in ("mean", "median"):
-            for col in cols_to_check:
-                mask = masks[col]
-                valid_vals = df_clean.loc[~mask, col]
-                if len(valid_vals) == 0:
-                    continue
-                replacement = valid_vals.mean() if outlier_method == "mean" else valid_vals.median()
-                df_clean.loc[mask, col] = replacement
-        else:
-            return {"error": "Méthode d'outliers invalide."}
-
-    # === 4️⃣ EXPORT EXCEL PROPRE ===
-    stream = io.BytesIO()
-    with pd.ExcelWriter(stream, engine='xlsxwriter') as writer:
-        # Formater les nombres sans décimales si ce sont des entiers
-        df_display = df_clean.copy()
-        for col in df_display.select_dtypes(include=['number']).columns:
-            # Vérifier si la colonne contient principalement des entiers
-            if (df_display[col].dropna() % 1 == 0).all():
-                df_display[col] = df_display[col].apply(lambda x: f"{int(x):d}" if pd.notna(x) else "")
-        
-        df_display.to_excel(writer, index=False, sheet_name="Nettoye")
-        
-        # Ajuster automatiquement la largeur des colonnes
-        worksheet = writer.sheets["Nettoye"]
-        for idx, col in enumerate(df_display.columns):
-            max_len = max(
-                df_display[col].astype(str).str.len().max(),
-                len(col)
-            ) + 2
-            worksheet.set_column(idx, idx, min(max_len, 50))
-
-    stream.seek(0)
-
-    # Création de la réponse
-    response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response.headers["Content-Disposition"] = "attachment; filename=donnees_nettoyees.xlsx"
-    return response
\ No newline at end of file
+    try:
+        df_clean = clean_all(
+            df, missing_method, missing_value, outlier_method, columns,
+            use_custom_bounds, lower_bound, upper_bound, iqr_factor,
+            column_bounds, detector, threshold, quantile_method, quantile_error, engine,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+
+    # === 4️⃣ EXPORT (Excel propre par défaut), envoyé morceau par morceau ===
+    try:
+        return result_cache.store(key, frame_response(df_clean, "donnees_nettoyees", fmt, compression,
+                                                      whole_number_columns(df_clean)))
+    except ValueError as e:
+        return {"error": str(e)}
@@ -0,0 +1,224 @@
+"""
+Dédoublonnage approximatif (« Jean Dupont » / « Jean Dupond »).
+
+Les colonnes choisies sont normalisées comme pour le dédoublonnage exact
+puis concaténées ; chaque texte distinct est découpé en n-grammes de
+caractères et résumé par une signature MinHash. Le LSH (bandes de la
+signature) ne propose comme candidates que les paires qui partagent une
+bande, éventuellement à l'intérieur d'un même bloc (colonnes `block_on`
+égales après normalisation) : pas de comparaison deux à deux. Les paires
+candidates dont la similarité de Jaccard estimée atteint le seuil sont
+reliées ; les composantes connexes forment les grappes.
+
+Tout est vectorisé (numpy) : coût quasi linéaire en nombre de lignes.
+"""
+import numpy as np
+import pandas as pd
+
+from .dedup_index import row_hashes
+from .metrics import stage
+from .normalization import PROTECTED_COLS, is_text_column, normalize_for_duplicates
+
+NUM_PERM = 128
+NGRAM = 3
+SIMILARITY = 0.7
+LSH_RECALL = 0.95
+GRAM_BATCH = 1 << 16  # n-grammes hachés à la fois (× NUM_PERM entiers en mémoire)
+EDGE_BATCH = 1 << 16
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def default_columns(df: pd.DataFrame) -> list:
+    """Colonnes textuelles hors colonnes protégées."""
+    return [c for c in df.columns if is_text_column(df[c]) and c not in PROTECTED_COLS]
+
+
+def check_fuzzy_params(df: pd.DataFrame, columns, block_on, similarity: float,
+                       num_perm: int, ngram: int) -> tuple:
+    """(colonnes, colonnes de blocage) validées ; lève ValueError."""
+    columns = list(columns) if columns else default_columns(df)
+    block_on = list(block_on or [])
+    missing = [c for c in columns + block_on if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes introuvables : {', '.join(map(str, missing))}")
+    if not columns:
+        raise ValueError("Aucune colonne à comparer pour le dédoublonnage approximatif.")
+    if not 0 < similarity <= 1:
+        raise ValueError("Le seuil de similarité doit être compris entre 0 et 1.")
+    if not 1 <= ngram <= 7:
+        raise ValueError("La taille des n-grammes doit être comprise entre 1 et 7.")
+    if not 8 <= num_perm <= 1024:
+        raise ValueError("Le nombre de permutations MinHash doit être compris entre 8 et 1024.")
+    return columns, block_on
+
+
+def lsh_params(similarity: float, num_perm: int, recall: float = LSH_RECALL) -> tuple:
+    """
+    (bandes, lignes par bande) : une paire de similarité `similarity` doit
+    être candidate avec une probabilité ≥ `recall`, P = 1 - (1 - s^r)^b ;
+    parmi ces réglages, le plus sélectif (r maximal) limite les faux
+    positifs, de toute façon écartés par la vérification.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - similarity ** rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+def key_texts(df: pd.DataFrame, columns) -> pd.Series:
+    """Texte normalisé de chaque ligne (colonnes séparées par une espace)."""
+    norm = normalize_for_duplicates(df[columns])
+    parts = []
+    for col in columns:
+        values = norm[col]
+        values = values.where(values.notna() & (values.astype(str) != "NULL"), "")
+        parts.append(values.astype(str))
+    text = parts[0]
+    for part in parts[1:]:
+        text = text + " " + part
+    return text.str.strip()
+
+
+def shingles(texts: np.ndarray, ngram: int = NGRAM) -> tuple:
+    """
+    N-grammes (octets) de chaque texte, sous forme d'entiers : renvoie
+    (grammes, nombre de grammes par texte). Les textes sont bordés d'une
+    espace pour que les textes courts aient au moins un gramme.
+    """
+    padded = [f" {t} " for t in texts]
+    lengths = np.fromiter((len(p.encode("utf-8")) for p in padded), dtype=np.int64, count=len(padded))
+    buf = np.frombuffer("".join(padded).encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    counts = np.maximum(lengths - ngram + 1, 0)
+    starts = np.cumsum(lengths) - lengths
+    # position de départ de chaque gramme dans le tampon concaténé
+    first = np.cumsum(counts) - counts
+    pos = np.repeat(starts - first, counts) + np.arange(counts.sum())
+    grams = np.zeros(len(pos), dtype=np.uint64)
+    for j in range(ngram):
+        grams = (grams << np.uint64(8)) | buf[pos + j]
+    return grams, counts
+
+
+def minhash(grams: np.ndarray, counts: np.ndarray, num_perm: int = NUM_PERM, seed: int = 0) -> np.ndarray:
+    """
+    Signatures MinHash (textes × num_perm, uint32) ; `counts` > 0 pour chaque
+    texte. Hachage multiply-shift : (a·x + b) mod 2^64, 32 bits de poids fort.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None] * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    signatures = np.empty((len(counts), num_perm), dtype=np.uint32)
+
+    # lots de textes entiers, d'environ GRAM_BATCH grammes chacun
+    cuts = np.unique(np.searchsorted(offsets, np.arange(0, offsets[-1], GRAM_BATCH), side="right") - 1)
+    cuts = np.append(cuts, len(counts))
+    for lo, hi in zip(cuts[:-1], cuts[1:]):
+        part = grams[offsets[lo]:offsets[hi]]
+        # (permutations × grammes) : la réduction se fait sur l'axe contigu
+        hashed = (a * part + b) >> np.uint64(32)
+        signatures[lo:hi] = np.minimum.reduceat(hashed, offsets[lo:hi] - offsets[lo], axis=1).T
+    return signatures
+
+
+def candidate_pairs(signatures: np.ndarray, bands: int, rows: int, block_keys=None):
+    """Paires (i, j) partageant au moins une bande (et le même bloc)."""
+    left, right = [], []
+    for band in range(bands):
+        cols = signatures[:, band * rows:(band + 1) * rows]
+        key = np.zeros(len(signatures), dtype=np.uint64) if block_keys is None else block_keys.copy()
+        for j in range(cols.shape[1]):
+            key = (key ^ cols[:, j].astype(np.uint64)) * _MIX
+        order = np.argsort(key, kind="stable")
+        same = key[order][1:] == key[order][:-1]
+        # chaîne des textes de même clé : suffisant pour les composantes connexes
+        left.append(order[:-1][same])
+        right.append(order[1:][same])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pairs = np.unique(np.stack([np.concatenate(left), np.concatenate(right)], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def similar_pairs(signatures: np.ndarray, left: np.ndarray, right: np.ndarray, similarity: float):
+    """Filtre des paires candidates : Jaccard estimé (part de minima égaux) ≥ seuil."""
+    keep = np.zeros(len(left), dtype=bool)
+    for start in range(0, len(left), EDGE_BATCH):
+        sl = slice(start, start + EDGE_BATCH)
+        agree = (signatures[left[sl]] == signatures[right[sl]]).mean(axis=1)
+        keep[sl] = agree >= similarity
+    return left[keep], right[keep]
+
+
+def connected_components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Plus petit indice de la composante de chaque nœud (accrochage + saut de pointeurs)."""
+    labels = np.arange(n)
+    while True:
+        lu, lv = labels[left], labels[right]
+        low = np.minimum(lu, lv)
+        hooked = labels.copy()
+        np.minimum.at(hooked, lu, low)
+        np.minimum.at(hooked, lv, low)
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+def fuzzy_clusters(df: pd.DataFrame, columns=None, block_on=None, similarity: float = SIMILARITY,
+                   num_perm: int = NUM_PERM, ngram: int = NGRAM) -> np.ndarray:
+    """
+    Numéro de grappe de chaque ligne (0, 1, … dans l'ordre d'apparition).
+    Les lignes dont les colonnes comparées sont toutes vides restent seules.
+    """
+    columns, block_on = check_fuzzy_params(df, columns, block_on, similarity, num_perm, ngram)
+    keys = pd.DataFrame({"text": key_texts(df, columns).to_numpy()})
+    if block_on:
+        keys["block"] = row_hashes(normalize_for_duplicates(df[block_on]))
+
+    # couples (texte, bloc) identiques : une seule signature
+    codes = keys.groupby(list(keys.columns), sort=False).ngroup().to_numpy()
+    first = np.flatnonzero(~keys.duplicated().to_numpy())
+    uniques = keys["text"].to_numpy(dtype=object)[first]
+    block_keys = keys["block"].to_numpy()[first] if block_on else None
+
+    labels = np.arange(len(uniques))
+    filled = np.fromiter((len(u) > 0 for u in uniques), dtype=bool, count=len(uniques))
+    if filled.sum() > 1:
+        idx = np.flatnonzero(filled)
+        grams, counts = shingles(uniques[idx], ngram)
+        signatures = minhash(grams, counts, num_perm)
+        bands, rows = lsh_params(similarity, num_perm)
+        left, right = candidate_pairs(signatures, bands, rows,
+                                      None if block_keys is None else block_keys[idx])
+        left, right = similar_pairs(signatures, left, right, similarity)
+        labels[idx] = idx[connected_components(len(idx), left, right)]
+
+    row_labels = labels[codes]
+    # lignes vides : chacune sa grappe
+    empty = ~filled[codes]
+    row_labels = np.where(empty, len(uniques) + np.arange(len(codes)), row_labels)
+    return pd.factorize(row_labels)[0]
+
+
+def fuzzy_deduplicate(df: pd.DataFrame, columns=None, block_on=None, similarity: float = SIMILARITY,
+                      num_perm: int = NUM_PERM, ngram: int = NGRAM, keep_all: bool = False) -> pd.DataFrame:
+    """
+    Lignes d'origine avec `cluster_id` et `cluster_size` : premier
+    représentant de chaque grappe, ou toutes les lignes si `keep_all`.
+    """
+    with stage("fuzzy", len(df)) as record:
+        clusters = fuzzy_clusters(df, columns, block_on, similarity, num_perm, ngram)
+        sizes = np.bincount(clusters)
+        out = df.assign(cluster_id=clusters, cluster_size=sizes[clusters])
+        if not keep_all:
+            out = out[~pd.Series(clusters).duplicated().to_numpy()]
+        record.rows_out = len(out)
+    return out
@@ -0,0 +1,307 @@
+"""
+Tâches de nettoyage asynchrones.
+
+POST /jobs accepte les mêmes paramètres que /clean-all-and-download et
+répond immédiatement avec un identifiant. Le traitement tourne dans un pool
+local ; son état et l'avancement de chaque étape (normalize, dedup, missing,
+outliers, export) sont conservés dans une base SQLite, sans courtier externe.
+Le client interroge GET /jobs/{id} puis télécharge GET /jobs/{id}/result.
+"""
+import contextlib
+import functools
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.responses import FileResponse
+
+from .backends import check_engine
+from .bounds import check_detector, check_quantile_method, parse_column_bounds
+from .datasets import cache, load_input
+from .export import FORMATS, check_format, write_frame
+from .full_cleaning import STAGES, clean_all, write_excel
+from .metrics import stage
+from .streaming import clean_csv_stream
+from .workers import WorkerPool, PoolBusy, offload
+
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(tempfile.gettempdir(), "data_cleaning_jobs"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_QUEUE = int(os.environ.get("JOB_QUEUE", "32"))
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", "86400"))
+
+# identifie ce processus serveur, même si le PID est réutilisé après un redémarrage
+INSTANCE = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+router = APIRouter()
+
+job_pool = WorkerPool("thread", workers=JOB_WORKERS, max_queue=JOB_QUEUE)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """État des tâches dans SQLite (une connexion par appel : sûr entre threads et processus)."""
+
+    def __init__(self, directory: str = JOBS_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "jobs.sqlite3")
+        with self._db() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    stages TEXT NOT NULL,
+                    error TEXT,
+                    input_path TEXT,
+                    result_path TEXT,
+                    owner TEXT,
+                    created REAL,
+                    updated REAL
+                )
+            """)
+            # tâches laissées en cours par un processus qui n'existe plus
+            for job_id, owner in db.execute(
+                "SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall():
+                pid = int(owner.split("-")[0])
+                if owner != INSTANCE and (pid == os.getpid() or not _pid_alive(pid)):
+                    db.execute(
+                        "UPDATE jobs SET status = 'failed', error = ? WHERE id = ?",
+                        ("Interrompue par un redémarrage du serveur.", job_id),
+                    )
+
+    @contextlib.contextmanager
+    def _db(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def create(self, job_id: str, params: dict, input_path: Optional[str]):
+        now = time.time()
+        with self._db() as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, params, stages, input_path, owner, created, updated)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(params), json.dumps(dict.fromkeys(STAGES, 0.0)),
+                 input_path, INSTANCE, now, now),
+            )
+
+    def update(self, job_id: str, **fields):
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._db() as db:
+            db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def progress(self, job_id: str, stage: str, fraction: float):
+        with self._db() as db:
+            db.execute(
+                "UPDATE jobs SET stages = json_set(stages, ?, ?), updated = ? WHERE id = ?",
+                (f"$.{stage}", round(float(fraction), 4), time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._db() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["stages"] = json.loads(job["stages"])
+        return job
+
+    def purge(self, ttl: int = JOB_TTL_SECONDS):
+        """Supprime les tâches terminées (et leurs fichiers) plus vieilles que `ttl`."""
+        limit = time.time() - ttl
+        with self._db() as db:
+            old = [r[0] for r in db.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated < ?", (limit,)
+            ).fetchall()]
+            db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in old])
+        for job_id in old:
+            shutil.rmtree(os.path.join(self.directory, job_id), ignore_errors=True)
+
+
+@functools.lru_cache(maxsize=None)
+def get_store() -> JobStore:
+    return JobStore()
+
+
+def run_job(job_id: str):
+    """Exécute une tâche dans le pool ; toute erreur est enregistrée dans la base."""
+    store = get_store()
+    job = store.get(job_id)
+    params = dict(job["params"])
+    input_path = job["input_path"]
+    dataset_id = params.pop("dataset_id")
+    streaming = params.pop("streaming")
+    filename = params.pop("filename")
+    fmt = params.pop("output_format")
+    compression = params.pop("compression")
+    engine = params.pop("engine", None)
+    result_path = os.path.join(store.directory, job_id, "donnees_nettoyees." + FORMATS[fmt][0])
+    progress = functools.partial(store.progress, job_id)
+    store.update(job_id, status="running")
+
+    try:
+        if streaming:
+            with open(input_path, "rb") as source:
+                clean_csv_stream(source, result_path, output_format=fmt, compression=compression,
+                                 progress=progress, **params)
+        else:
+            if input_path:
+                with open(input_path, "rb") as fh:
+                    df, _ = load_input(UploadFile(fh, filename=filename))
+            else:
+                df, _ = load_input(dataset_id=dataset_id)
+            df_clean = clean_all(df, engine=engine, progress=progress, **params)
+            with stage("export", len(df_clean)) as record:
+                if fmt == "xlsx":
+                    write_excel(df_clean, result_path)
+                else:
+                    write_frame(df_clean, result_path, fmt, compression)
+                record.rows_out = len(df_clean)
+            progress("export", 1.0)
+        store.update(job_id, status="done", result_path=result_path)
+    except Exception as e:
+        store.update(job_id, status="failed", error=str(e))
+    finally:
+        if input_path and os.path.exists(input_path):
+            os.remove(input_path)
+
+
+@router.post("/jobs")
+@offload
+def submit_job(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Form(None),
+    missing_method: str = Form("median"),
+    missing_value: Optional[str] = Form(None),
+    outlier_method: str = Form("delete"),
+    columns: Optional[str] = Form(None),
+    use_custom_bounds: bool = Form(False),
+    lower_bound: Optional[str] = Form(None),
+    upper_bound: Optional[str] = Form(None),
+    iqr_factor: float = Form(1.5),
+    column_bounds: Optional[str] = Form(None),
+    detector: str = Form("iqr"),
+    threshold: Optional[float] = Form(None),
+    quantile_method: str = Form("exact"),
+    quantile_error: Optional[float] = Form(None),
+    streaming: bool = Form(False),
+    engine: Optional[str] = Form(None),  # pandas / polars (hors streaming)
+    output_format: Optional[str] = Form(None),
+    compression: Optional[str] = Form(None)
+):
+    """
+    Lance /clean-all-and-download en tâche de fond et renvoie l'identifiant
+    à interroger sur GET /jobs/{job_id}.
+    """
+    if file is None and not dataset_id:
+        return {"error": "Veuillez fournir un fichier ou un dataset_id."}
+    if file is None and dataset_id not in cache:
+        return {"error": f"Dataset inconnu ou expiré : {dataset_id}"}
+    if streaming and (file is None or not file.filename.lower().endswith(".csv")):
+        return {"error": "Le mode streaming nécessite l'envoi d'un fichier CSV."}
+    try:
+        fmt, compression = check_format(output_format, compression, "csv" if streaming else "xlsx")
+        check_quantile_method(quantile_method, quantile_error)
+        check_detector(detector, threshold)
+        parse_column_bounds(column_bounds)
+        engine = check_engine(engine)
+    except ValueError as e:
+        return {"error": str(e)}
+    if streaming and fmt == "xlsx":
+        return {"error": "Le format xlsx n'est pas disponible en mode streaming."}
+
+    store = get_store()
+    store.purge()
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(store.directory, job_id)
+    os.makedirs(job_dir)
+
+    input_path = None
+    if file is not None:
+        # on garde l'extension : c'est elle qui choisit le lecteur
+        input_path = os.path.join(job_dir, "input." + file.filename.lower().rsplit(".", 1)[-1])
+        with open(input_path, "wb") as fh:
+            shutil.copyfileobj(file.file, fh, 1 << 20)
+
+    params = {
+        "dataset_id": None if file is not None else dataset_id,
+        "filename": file.filename if file is not None else None,
+        "streaming": streaming,
+        "output_format": fmt,
+        "compression": compression,
+        "engine": engine,
+        "missing_method": missing_method,
+        "missing_value": missing_value,
+        "outlier_method": outlier_method,
+        "columns": columns,
+        "use_custom_bounds": use_custom_bounds,
+        "lower_bound": lower_bound,
+        "upper_bound": upper_bound,
+        "iqr_factor": iqr_factor,
+        "column_bounds": column_bounds,
+        "detector": detector,
+        "threshold": threshold,
+        "quantile_method": quantile_method,
+        "quantile_error": quantile_error,
+    }
+    store.create(job_id, params, input_path)
+    try:
+        job_pool.submit(run_job, job_id)
+    except PoolBusy:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        store.update(job_id, status="failed", error="File de tâches pleine.")
+        return {"error": "File de tâches pleine, réessayez plus tard."}
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """État de la tâche et avancement (0 → 1) de chaque étape."""
+    job = get_store().get(job_id)
+    if job is None:
+        return {"error": f"Tâche inconnue : {job_id}"}
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "stages": job["stages"],
+        "error": job["error"],
+        "created": job["created"],
+        "updated": job["updated"],
+    }
+
+
+@router.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    """Télécharge le fichier nettoyé d'une tâche terminée."""
+    job = get_store().get(job_id)
+    if job is None:
+        return {"error": f"Tâche inconnue : {job_id}"}
+    if job["status"] != "done":
+        return {"error": f"Résultat indisponible (statut : {job['status']})."}
+    path = job["result_path"]
+    extension = path.rsplit(".", 1)[-1]
+    media_type = next(m for ext, m in FORMATS.values() if ext == extension)
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
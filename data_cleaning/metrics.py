@@ -0,0 +1,300 @@
+"""
+Instrumentation des routes et des étapes du pipeline.
+
+- `stage(nom, rows_in)` chronomètre une étape (lecture, normalisation,
+  dédoublonnage, valeurs manquantes, outliers, export) : durée, lignes en
+  entrée et en sortie, variation de la mémoire résidente du processus
+  (processus entier : les requêtes parallèles s'y mélangent).
+- `MetricsMiddleware` mesure la latence de chaque route et ajoute l'en-tête
+  `Server-Timing` (étapes de la requête + total) aux réponses.
+- GET /metrics expose le tout au format texte Prometheus : histogrammes de
+  latence par route, histogrammes de durée et compteurs par étape.
+- Profilage à la demande (PROFILING_ENABLED=1) : une requête envoyée avec
+  l'en-tête `X-Profile: 1` est échantillonnée (piles du thread de
+  traitement toutes les PROFILE_INTERVAL_MS ms) ; la réponse porte
+  `X-Profile-Id`, et GET /profiles/{id} renvoie les piles agrégées au
+  format « collapsed » (flamegraph.pl, speedscope).
+"""
+import collections
+import contextlib
+import contextvars
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "data_cleaning_profiles"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+router = APIRouter()
+
+# étapes de la requête en cours (liste partagée avec le thread de traitement)
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+_request_profile = contextvars.ContextVar("request_profile", default=None)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """Mémoire résidente actuelle (octets) ; à défaut, le pic (ru_maxrss)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Histogram:
+    """Histogramme cumulatif Prometheus (bornes fixes, +Inf implicite)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class StageRecord:
+    """Mesure d'une étape ; `rows_out` se renseigne dans le bloc `with`."""
+
+    __slots__ = ("name", "rows_in", "rows_out", "seconds", "memory_delta")
+
+    def __init__(self, name: str, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = 0.0
+        self.memory_delta = 0
+
+
+class MetricsRegistry:
+    """Agrégats de tout le processus, protégés par un verrou."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = collections.defaultdict(Histogram)  # (méthode, route) -> Histogram
+        self.requests = collections.Counter()  # (méthode, route, statut) -> nombre
+        self.stage_seconds = collections.defaultdict(Histogram)  # étape -> Histogram
+        self.stage_rows_in = collections.Counter()
+        self.stage_rows_out = collections.Counter()
+        self.stage_memory = collections.defaultdict(lambda: [0, 0.0])  # étape -> [nombre, somme]
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        with self._lock:
+            self.latency[(method, route)].observe(seconds)
+            self.requests[(method, route, status)] += 1
+
+    def observe_stage(self, record: StageRecord):
+        with self._lock:
+            self.stage_seconds[record.name].observe(record.seconds)
+            if record.rows_in is not None:
+                self.stage_rows_in[record.name] += record.rows_in
+            if record.rows_out is not None:
+                self.stage_rows_out[record.name] += record.rows_out
+            memory = self.stage_memory[record.name]
+            memory[0] += 1
+            memory[1] += record.memory_delta
+
+    def render(self) -> str:
+        """Format texte d'exposition Prometheus (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            lines += ["# HELP http_request_duration_seconds Latence des requêtes par route.",
+                      "# TYPE http_request_duration_seconds histogram"]
+            for (method, route), hist in sorted(self.latency.items()):
+                lines += _histogram_lines("http_request_duration_seconds",
+                                          f'method="{method}",route="{_escape(route)}"', hist)
+            lines += ["# HELP http_requests_total Requêtes par route et statut.",
+                      "# TYPE http_requests_total counter"]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",'
+                             f'status="{status}"}} {count}')
+
+            lines += ["# HELP cleaning_stage_duration_seconds Durée des étapes du pipeline.",
+                      "# TYPE cleaning_stage_duration_seconds histogram"]
+            for name, hist in sorted(self.stage_seconds.items()):
+                lines += _histogram_lines("cleaning_stage_duration_seconds", f'stage="{name}"', hist)
+            for metric, counter, text in (
+                ("cleaning_stage_rows_in_total", self.stage_rows_in, "Lignes en entrée des étapes."),
+                ("cleaning_stage_rows_out_total", self.stage_rows_out, "Lignes en sortie des étapes."),
+            ):
+                lines += [f"# HELP {metric} {text}", f"# TYPE {metric} counter"]
+                lines += [f'{metric}{{stage="{name}"}} {count}' for name, count in sorted(counter.items())]
+            lines += ["# HELP cleaning_stage_memory_delta_bytes Variation de la mémoire résidente pendant l'étape.",
+                      "# TYPE cleaning_stage_memory_delta_bytes summary"]
+            for name, (count, total) in sorted(self.stage_memory.items()):
+                lines.append(f'cleaning_stage_memory_delta_bytes_sum{{stage="{name}"}} {total}')
+                lines.append(f'cleaning_stage_memory_delta_bytes_count{{stage="{name}"}} {count}')
+        lines.append(f"process_resident_memory_bytes {current_rss()}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _histogram_lines(metric: str, labels: str, hist: Histogram) -> list:
+    lines = [f'{metric}_bucket{{{labels},le="{bound}"}} {count}'
+             for bound, count in zip(hist.buckets, hist.counts)]
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {hist.count}')
+    lines.append(f"{metric}_sum{{{labels}}} {hist.sum}")
+    lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+@contextlib.contextmanager
+def stage(name: str, rows_in=None):
+    """
+    Chronomètre une étape : `with stage("missing", len(df)) as s: ...;
+    s.rows_out = len(df_clean)`. La mesure part dans /metrics et, pendant
+    une requête, dans son en-tête Server-Timing.
+    """
+    record = StageRecord(name, rows_in)
+    rss = current_rss()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        record.memory_delta = current_rss() - rss
+        registry.observe_stage(record)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages.append(record)
+
+
+def server_timing(stages, total: float) -> str:
+    """Valeur de l'en-tête Server-Timing : durée cumulée par étape (ms), puis le total."""
+    durations = {}
+    for record in stages:
+        durations[record.name] = durations.get(record.name, 0.0) + record.seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class Sampler:
+    """Profileur par échantillonnage d'un thread : compte ses piles d'appels."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def run_profiled(func, *args, **kwargs):
+    """
+    Exécute une route dans le thread de traitement ; si la requête a demandé
+    un profil, ce thread est échantillonné pendant l'appel.
+    """
+    profile_id = _request_profile.get()
+    if profile_id is None:
+        return func(*args, **kwargs)
+    with Sampler(threading.get_ident()) as sampler:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(os.path.join(PROFILE_DIR, profile_id + ".txt"), "w") as fh:
+                fh.write(sampler.collapsed())
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : latence par route, Server-Timing, profilage à la demande."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stages = []
+        stages_token = _request_stages.set(stages)
+        profile_id = None
+        if PROFILING_ENABLED and (b"x-profile", b"1") in scope.get("headers", []):
+            profile_id = uuid.uuid4().hex
+        profile_token = _request_profile.set(profile_id)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stages, time.perf_counter() - start).encode()))
+                headers.append((b"timing-allow-origin", b"*"))
+                if profile_id is not None:
+                    headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stages.reset(stages_token)
+            _request_profile.reset(profile_token)
+            # route déclarée (ex. /jobs/{job_id}) : pas une série par identifiant
+            route = getattr(scope.get("route"), "path", "inconnue")
+            registry.observe_request(scope["method"], route, status, time.perf_counter() - start)
+
+
+@router.get("/metrics")
+def metrics():
+    """Métriques au format texte Prometheus."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    """Piles échantillonnées d'une requête profilée (format collapsed)."""
+    path = os.path.join(PROFILE_DIR, os.path.basename(profile_id) + ".txt")
+    if not os.path.exists(path):
+        return {"error": f"Profil inconnu : {profile_id}"}
+    with open(path) as fh:
+        return PlainTextResponse(fh.read())
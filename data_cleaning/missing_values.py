@@ -1,46 +1,59 @@
-from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
-from .utils import load_file
+from fastapi import APIRouter, UploadFile, File, Form, Header
+from typing import Optional
+from .datasets import load_input
+from .workers import offload
+from .export import check_format, frame_response
+from .backends import check_engine
+from .pipeline import compile_steps, execute
+from .result_cache import result_cache
 import pandas as pd
-import numpy as np
-import io
 
 router = APIRouter()
 
 @router.post("/fill-missing")
-async def fill_missing(
-    file: UploadFile = File(...),
+@offload
+def fill_missing(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Form(None),
     method: str = Form("median"),  # median / mean / constant / null
-    value: float = Form(None)
+    value: float = Form(None),
+    engine: Optional[str] = Form(None),  # pandas / polars
+    output_format: Optional[str] = Form(None),  # xlsx / parquet / feather / csv / ndjson
+    compression: Optional[str] = Form(None),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Remplit les valeurs manquantes dans les colonnes numériques
     selon la méthode choisie.
     """
     try:
-        df, _ = load_file(file)
-    except Exception as e:
+        fmt, compression = check_format(output_format, compression)
+        engine = check_engine(engine)
+    except ValueError as e:
         return {"error": str(e)}
 
-    df_clean = df.copy()
-    num_cols = df_clean.select_dtypes(include=[np.number]).columns
-    text_cols = df_clean.select_dtypes(include=["object", "string"]).columns
+    if method == "constant" and value is None:
+        return {"error": "Veuillez fournir une valeur constante."}
+    if method not in ("median", "mean", "constant", "null"):
+        return {"error": "Méthode invalide."}
 
-    if method == "median":
-        df_clean[num_cols] = df_clean[num_cols].fillna(df_clean[num_cols].median())
-    elif method == "mean":
-        df_clean[num_cols] = df_clean[num_cols].fillna(df_clean[num_cols].mean())
-    elif method == "constant":
-        if value is None:
-            return {"error": "Veuillez fournir une valeur constante."}
-        df_clean[num_cols] = df_clean[num_cols].fillna(value)
-    elif method == "null":
-        # df_clean[num_cols] = df_clean[num_cols].fillna(pd.NA)
-        df_clean = df_clean.fillna("NULL")
+    key = result_cache.key("fill-missing", file, dataset_id, dict(
+        method=method, value=value, fmt=fmt, compression=compression))
+    cached = result_cache.lookup(key, if_none_match, "filled_data", fmt)
+    if cached is not None:
+        return cached
 
-    else:
-        return {"error": "Méthode invalide."}
-    df_clean[text_cols] = df_clean[text_cols].fillna("NULL")
+    try:
+        df, _ = load_input(file, dataset_id)
+    except Exception as e:
+        return {"error": str(e)}
+
+    # Plan prédéfini : colonnes numériques selon `method`, texte → "NULL"
+    try:
+        df_clean = execute(df, compile_steps([{"op": "fill_missing", "method": method, "value": value}]),
+                           engine=engine)
+    except ValueError as e:
+        return {"error": str(e)}
 
     # stream = io.StringIO()
     # df_clean.to_csv(stream, index=False)
@@ -50,23 +63,12 @@ async def fill_missing(
     # response.headers["Content-Disposition"] = "attachment; filename=filled_data.xlsx"
     # return response
     
-    # Conversion en Excel lisible
-    stream = io.BytesIO()
-    with pd.ExcelWriter(stream, engine='xlsxwriter') as writer:
-        for col in df_clean.select_dtypes(include=['number']).columns:
-            df_clean[col] = df_clean[col].apply(lambda x: f"{int(x):.0f}" if pd.notna(x) else "")
-        df_clean.to_excel(writer, index=False, sheet_name="Nettoye")
-        # Ajuster automatiquement la largeur des colonnes
-        for column in df_clean:
-            col_width = max(df_clean[column].astype(str).map(len).max(), len(column)) + 2
-            writer.sheets["Nettoye"].set_column(df_clean.columns.get_loc(column), df_clean.columns.get_loc(column), col_width)
+    # Excel lisible : colonnes numériques affichées sans décimales (format "0")
+    integer_columns = df_clean.select_dtypes(include=['number']).columns.tolist()
 
-    stream.seek(0)
-
-    # Création de la réponse
-    response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response.headers["Content-Disposition"] = "attachment; filename=deduplicated_data.xlsx"
-    return response
+    # Réponse envoyée morceau par morceau
+    try:
+        return result_cache.store(key, frame_response(df_clean, "filled_data", fmt, compression,
+                                                      integer_columns))
+    except ValueError as e:
+        return {"error": str(e)}
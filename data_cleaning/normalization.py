@@ -0,0 +1,229 @@
+"""
+Moteur de normalisation partagé pour la détection des doublons.
+
+Les colonnes sont traitées d'un bloc (accesseurs .str de pandas, noyaux
+pyarrow quand ils sont disponibles) au lieu d'appeler clean_text cellule
+par cellule. Les clés produites sont identiques octet pour octet à celles
+de l'ancienne implémentation.
+
+Chaque colonne texte est factorisée : seules ses valeurs distinctes sont
+normalisées, puis redistribuées par les codes ; le temps suit le nombre de
+valeurs distinctes (villes, noms…) plutôt que le nombre de lignes. Les clés
+des colonnes peu variées sont gardées d'une requête à l'autre dans un cache
+LRU borné (TEXT_CACHE_ENTRIES valeurs, 0 : désactivé).
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import unidecode
+from .dates import DATE_FORMATS, date_key_column
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRING = "string[pyarrow]"
+except ImportError:  # pyarrow est optionnel : on reste sur le chemin objet
+    ARROW_STRING = None
+
+# Colonnes à ne pas toucher
+PROTECTED_COLS = ["E-mail", "Message"]
+
+# Après unidecode tout est ASCII : \s de `re` y vaut exactement cette classe.
+# On l'écrit explicitement pour que RE2 (pyarrow) ait la même sémantique.
+_SPACES = r"[ \t\n\x0b\x0c\r\x1c-\x1f]+"
+_FORBIDDEN = r"[^a-z0-9 \-/]"
+
+TEXT_CACHE_ENTRIES = int(os.environ.get("TEXT_CACHE_ENTRIES", "200000"))
+# au-delà de cette part de valeurs distinctes (identifiants, codes…), la
+# colonne ne passe pas par le cache : elle en chasserait les noms récurrents
+CACHE_DISTINCT_RATIO = 0.5
+
+
+# ---------- FONCTIONS CELLULE (référence) ----------
+
+def clean_text(x):
+    if pd.isna(x):
+        return ""
+    x = str(x).strip()
+    x = unidecode.unidecode(x)  # enlever les accents
+    x = re.sub(r"\s+", " ", x)  # espaces multiples → 1
+    x = x.lower()
+    x = re.sub(r"[^a-z0-9\s\-/]", "", x)  # garder lettres, chiffres, -, /
+    return x
+
+
+def parse_date(x):
+    if pd.isna(x):
+        return None
+    x = str(x).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return pd.to_datetime(x, format=fmt, errors="raise")
+        except:
+            continue
+    try:
+        return pd.to_datetime(x, dayfirst=True, errors='coerce')
+    except:
+        return None
+
+
+# ---------- MOTEUR COLONNE ----------
+
+def is_text_column(series: pd.Series) -> bool:
+    """Colonne texte au sens de la normalisation (objet, chaîne pandas ou catégorielle de texte)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return is_text_column(pd.Series(series.cat.categories, dtype=series.cat.categories.dtype))
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+
+class KeyCache:
+    """Cache LRU (valeur brute → clé normalisée) partagé entre requêtes, borné en nombre de valeurs."""
+
+    def __init__(self, max_entries: int = TEXT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, values) -> list:
+        """Clés connues, None pour les valeurs absentes."""
+        with self._lock:
+            keys = []
+            for value in values:
+                key = self._entries.get(value)
+                if key is not None:
+                    self._entries.move_to_end(value)
+                keys.append(key)
+        return keys
+
+    def store(self, values, keys):
+        with self._lock:
+            for value, key in zip(values, keys):
+                self._entries[value] = key
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# une passe de nettoyage ou deux (twice) : clés différentes
+text_keys = {False: KeyCache(), True: KeyCache()}
+
+
+def _clean_strings(text: pd.Series, twice: bool) -> np.ndarray:
+    """Noyau vectorisé sur des chaînes Python (aucune valeur manquante)."""
+    # str(x).strip() : sémantique Python conservée sur la colonne objet
+    text = text.str.strip()
+
+    # unidecode uniquement sur les valeurs qui ne sont pas déjà ASCII
+    non_ascii = ~text.map(str.isascii).astype(bool)
+    if non_ascii.any():
+        text[non_ascii] = [unidecode.unidecode(v) for v in text[non_ascii]]
+
+    if ARROW_STRING is not None:
+        text = text.astype(ARROW_STRING)
+    text = text.str.replace(_SPACES, " ", regex=True)
+    text = text.str.lower()
+    text = text.str.replace(_FORBIDDEN, "", regex=True)
+    if twice:
+        text = text.str.strip(" ").str.replace(" +", " ", regex=True)
+    return text.to_numpy(dtype=object)
+
+
+def clean_distinct(values: np.ndarray, twice: bool = False, cached: bool = True) -> np.ndarray:
+    """Clés de chaînes distinctes ; `cached` : consulte et alimente le cache LRU."""
+    if not cached or not TEXT_CACHE_ENTRIES or len(values) > TEXT_CACHE_ENTRIES:
+        return _clean_strings(pd.Series(values, dtype=object), twice)
+    cache = text_keys[twice]
+    keys = np.array(cache.lookup(values), dtype=object)
+    missing = np.flatnonzero(pd.isna(keys))
+    if len(missing):
+        fresh = _clean_strings(pd.Series(values[missing], dtype=object), twice)
+        keys[missing] = fresh
+        cache.store(values[missing], fresh)
+    return keys
+
+
+def clean_text_column(series: pd.Series, twice: bool = False) -> pd.Series:
+    """
+    Équivalent vectorisé de `series.apply(clean_text)`.
+
+    `twice=True` reproduit `apply(clean_text)` appliqué deux fois : clean_text
+    n'est pas idempotent (le filtrage final peut laisser des espaces en bord
+    ou doublés), la seconde passe revient à un strip + fusion des espaces.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # chaque catégorie n'est nettoyée qu'une fois, puis redistribuée par les codes
+        categories = series.cat.categories.astype(object).astype(str).to_numpy(dtype=object)
+        cleaned = clean_distinct(categories, twice)
+        codes = series.cat.codes.to_numpy()
+        present = codes >= 0
+        result = np.full(len(series), "", dtype=object)
+        # seuls les codes présents indexent `cleaned` (vide si aucune catégorie)
+        result[present] = cleaned[codes[present]]
+        return pd.Series(result, index=series.index)
+
+    result = np.full(len(series), "", dtype=object)
+    present = series.notna().to_numpy()
+    if not present.any():
+        return pd.Series(result, index=series.index)
+
+    # str(x) d'abord : 1 et 1.0 (égaux pour Python) restent deux valeurs distinctes
+    text = series[present].astype(str).to_numpy(dtype=object)
+    codes, uniques = pd.factorize(text)
+    cached = len(uniques) <= CACHE_DISTINCT_RATIO * len(text)
+    result[present] = clean_distinct(uniques, twice, cached)[codes]
+    return pd.Series(result, index=series.index)
+
+
+def is_date_name(name) -> bool:
+    """Colonne de dates d'après son nom (date, birth, naissance…)."""
+    name = name.lower()
+    return "date" in name or "birth" in name or "nais" in name
+
+
+def normalize_column(name, series: pd.Series) -> pd.Series:
+    """
+    Clé de déduplication d'une colonne : elle ne dépend que de la colonne
+    elle-même (nom et valeurs), d'où la normalisation en parallèle.
+    """
+    # Ignorer les colonnes protégées
+    if name in PROTECTED_COLS:
+        return series
+
+    is_text = is_text_column(series)
+    is_date = is_date_name(name)
+
+    # Colonnes date (le texte est nettoyé une fois avant l'analyse)
+    if is_date:
+        values = clean_text_column(series) if is_text else series
+        return date_key_column(values)
+
+    # Colonnes numériques
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors="coerce")
+
+    # Colonnes texte / mixtes : l'ancienne version nettoyait deux fois
+    if is_text:
+        return clean_text_column(series, twice=True)
+    return series
+
+
+def normalize_for_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Version PRO adaptée : normalise le texte, les dates et les nombres,
+    mais conserve les colonnes Email et Message intactes pour éviter de les casser.
+    """
+    df_norm = df.copy()
+
+    for col in df_norm.columns:
+        if col not in PROTECTED_COLS:
+            df_norm[col] = normalize_column(col, df_norm[col])
+    return df_norm
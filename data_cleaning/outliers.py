@@ -1,28 +1,64 @@
-from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
-from .utils import load_file
+from fastapi import APIRouter, UploadFile, File, Form, Header
+from typing import Optional
+from .datasets import load_input
+from .workers import offload
+from .export import check_format, frame_response
+from .schema import schema_of, sniff_upload
+from .bounds import check_detector, check_quantile_method, parse_column_bounds
+from .backends import check_engine
+from .pipeline import compile_steps, execute
+from .result_cache import result_cache
 import pandas as pd
 import numpy as np
 import json
-import io
 
 router = APIRouter()
 
 @router.post("/remove-outliers")
-async def remove_outliers(
-    file: UploadFile = File(...),
+@offload
+def remove_outliers(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Form(None),
     method: str = Form("delete"),  # delete / mean / median
     columns: str = Form(None),
     use_custom_bounds: bool = Form(False),
     lower_bound: float = Form(None),
     upper_bound: float = Form(None),
-    iqr_factor: float = Form(1.5)
+    column_bounds: Optional[str] = Form(None),  # {"colonne": [basse, haute]}
+    detector: str = Form("iqr"),  # iqr / mad / zscore
+    threshold: Optional[float] = Form(None),
+    iqr_factor: float = Form(1.5),
+    quantile_method: str = Form("exact"),  # exact / sketch
+    quantile_error: Optional[float] = Form(None),
+    engine: Optional[str] = Form(None),  # pandas / polars
+    output_format: Optional[str] = Form(None),  # xlsx / parquet / feather / csv / ndjson
+    compression: Optional[str] = Form(None),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Détecte et traite les valeurs aberrantes selon la méthode choisie.
     """
     try:
-        df, _ = load_file(file)
+        fmt, compression = check_format(output_format, compression)
+        engine = check_engine(engine)
+        quantile_method, quantile_error = check_quantile_method(quantile_method, quantile_error)
+        detector, threshold = check_detector(detector, threshold)
+        per_column = parse_column_bounds(column_bounds)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    key = result_cache.key("remove-outliers", file, dataset_id, dict(
+        method=method, columns=columns, use_custom_bounds=use_custom_bounds,
+        lower_bound=lower_bound, upper_bound=upper_bound, column_bounds=column_bounds,
+        detector=detector, threshold=threshold, iqr_factor=iqr_factor,
+        quantile_method=quantile_method, quantile_error=quantile_error, fmt=fmt, compression=compression,
+    ))
+    cached = result_cache.lookup(key, if_none_match, "outliers_data", fmt)
+    if cached is not None:
+        return cached
+
+    try:
+        df, _ = load_input(file, dataset_id)
     except Exception as e:
         return {"error": str(e)}
 
@@ -34,67 +70,57 @@ async def remove_outliers(
     if not cols_to_check:
         return {"error": "Aucune colonne numérique valide trouvée."}
 
-    df_clean = df.copy()
-    masks = {}
-
-    # Calcul des bornes pour chaque colonne
-    for col in cols_to_check:
-        if use_custom_bounds:
-            if lower_bound is None or upper_bound is None:
-                return {"error": "Bornes personnalisées manquantes."}
-            col_lower, col_upper = lower_bound, upper_bound
-        else:
-            Q1, Q3 = df[col].quantile([0.25, 0.75])
-            IQR = Q3 - Q1
-            col_lower = Q1 - iqr_factor * IQR
-            col_upper = Q3 + iqr_factor * IQR
-
-        masks[col] = (df[col] < col_lower) | (df[col] > col_upper)
-
-    if method == "delete":
-        combined_mask = np.column_stack([masks[c] for c in cols_to_check]).any(axis=1)
-        df_clean = df_clean[~combined_mask].reset_index(drop=True)
-    elif method in ("mean", "median"):
-        for col in cols_to_check:
-            mask = masks[col]
-            if mask.any():
-                replacement = df.loc[~mask, col].mean() if method == "mean" else df.loc[~mask, col].median()
-                df_clean.loc[mask, col] = replacement
-    else:
+    if method not in ("delete", "mean", "median"):
         return {"error": "Méthode d'outliers invalide."}
+    custom = None
+    if use_custom_bounds:
+        if lower_bound is None or upper_bound is None:
+            return {"error": "Bornes personnalisées manquantes."}
+        custom = [lower_bound, upper_bound]
 
-     # Conversion en Excel lisible
-    stream = io.BytesIO()
-    with pd.ExcelWriter(stream, engine='xlsxwriter') as writer:
-        for col in df_clean.select_dtypes(include=['number']).columns:
-            df_clean[col] = df_clean[col].apply(lambda x: f"{int(x):.0f}" if pd.notna(x) else "")
-        df_clean.to_excel(writer, index=False, sheet_name="Nettoye")
-        # Ajuster automatiquement la largeur des colonnes
-        for column in df_clean:
-            col_width = max(df_clean[column].astype(str).map(len).max(), len(column)) + 2
-            writer.sheets["Nettoye"].set_column(df_clean.columns.get_loc(column), df_clean.columns.get_loc(column), col_width)
+    # Plan prédéfini : une étape outliers sur les colonnes retenues
+    try:
+        passes = compile_steps([{
+            "op": "outliers", "method": method, "columns": cols_to_check, "bounds": custom,
+            "column_bounds": per_column, "detector": detector, "threshold": threshold,
+            "iqr_factor": iqr_factor, "quantile_method": quantile_method, "quantile_error": quantile_error,
+        }])
+        df_clean = execute(df, passes, engine=engine)
+    except ValueError as e:
+        return {"error": str(e)}
 
-    stream.seek(0)
+    # Excel lisible : colonnes numériques affichées sans décimales (format "0")
+    integer_columns = df_clean.select_dtypes(include=['number']).columns.tolist()
 
-    # Création de la réponse
-    response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response.headers["Content-Disposition"] = "attachment; filename=deduplicated_data.xlsx"
-    return response
+    # Réponse envoyée morceau par morceau
+    try:
+        return result_cache.store(key, frame_response(df_clean, "outliers_data", fmt, compression,
+                                                      integer_columns))
+    except ValueError as e:
+        return {"error": str(e)}
 
 @router.post("/get-numeric-columns")
-async def get_numeric_columns(file: UploadFile = File(...)):
+@offload
+def get_numeric_columns(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Form(None)
+):
     """
-    Retourne la liste des colonnes numériques du fichier pour le frontend.
+    Retourne la liste des colonnes numériques du fichier pour le frontend,
+    avec le schéma (types, valeurs manquantes, cardinalité). Le fichier
+    n'est pas lu en entier : en-tête et échantillon, voir schema.py.
     """
     try:
-        df, _ = load_file(file)
+        if dataset_id:
+            schema = schema_of(load_input(dataset_id=dataset_id)[0])
+        elif file is not None:
+            schema = sniff_upload(file)
+        else:
+            raise ValueError("Veuillez fournir un fichier ou un dataset_id.")
     except Exception as e:
         return {"error": str(e)}
 
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    numeric_cols = [col["name"] for col in schema["columns"] if col["kind"] == "numeric"]
     if not numeric_cols:
         return {"error": "Aucune colonne numérique trouvée."}
-    return {"numeric_columns": numeric_cols}
+    return {"numeric_columns": numeric_cols, **schema}
@@ -0,0 +1,230 @@
+"""
+Normalisation parallèle pour la déduplication : colonnes et tranches de
+lignes réparties sur un pool de processus.
+
+Chaque colonne se normalise indépendamment des autres (normalize_column)
+et l'empreinte d'une ligne (pd.util.hash_pandas_object) combine celles de
+ses colonnes. Un processus calcule donc directement l'empreinte de sa
+tâche (une colonne, une tranche de lignes) : le texte normalisé ne revient
+jamais au processus principal, qui ne fait que combiner les empreintes.
+
+Aucune copie sérialisée (pickle) des données : les colonnes texte sont
+écrites une fois au format Arrow IPC dans un fichier en mémoire partagée
+(/dev/shm), que chaque processus projette en mémoire et lit sans copie ;
+les empreintes reviennent par un tableau numpy partagé de la même façon.
+Si /dev/shm est plein (64 Mo par défaut sous Docker), les fichiers vont
+dans le dossier temporaire, puis à défaut le calcul reste séquentiel.
+Les colonnes numériques (to_numeric est immédiat) et le texte qu'Arrow ne
+représente pas à l'identique (objets mélangés) restent traités dans le
+processus principal pendant ce temps.
+
+NORMALIZE_WORKERS processus (nb de cœurs par défaut, 1 : désactivé), à
+partir de NORMALIZE_PARALLEL_ROWS lignes. Résultat identique à
+row_hashes(normalize_for_duplicates(df)).
+"""
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, CancelledError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from .normalization import ARROW_STRING, PROTECTED_COLS, is_text_column, normalize_column
+from .workers import PoolBusy, WorkerPool, in_pool_process
+
+NORMALIZE_WORKERS = int(os.environ.get("NORMALIZE_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_ROWS = int(os.environ.get("NORMALIZE_PARALLEL_ROWS", "200000"))
+TASK_ROWS = 100_000  # lignes par tâche au plus (mémoire d'un processus)
+MIN_TASK_ROWS = 10_000  # en deçà, le lancement d'une tâche coûte plus qu'il ne rapporte
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+normalize_pool = WorkerPool("process", workers=NORMALIZE_WORKERS, max_queue=NORMALIZE_WORKERS * 4)
+
+
+def _no_progress(stage, fraction):
+    pass
+
+
+def parallel_enabled(n_rows: int, pool: WorkerPool = None) -> bool:
+    pool = pool or normalize_pool
+    # pyarrow requis ; pas de pool imbriqué dans un processus de /batch
+    return (ARROW_STRING is not None and pool.workers > 1 and n_rows >= PARALLEL_ROWS
+            and not in_pool_process())
+
+
+def column_hashes(series: pd.Series) -> np.ndarray:
+    """Empreinte uint64 de chaque valeur, celle que hash_pandas_object donne à la colonne d'un DataFrame."""
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+def combine_hashes(hashes) -> np.ndarray:
+    """
+    Empreintes de lignes à partir de celles des colonnes, dans l'ordre des
+    colonnes : même combinaison que hash_pandas_object(df, index=False).
+    """
+    mult = np.uint64(1000003)
+    out = np.zeros_like(hashes[0]) + np.uint64(0x345678)
+    for i, h in enumerate(hashes):
+        inverse_i = len(hashes) - i
+        out ^= h
+        out *= mult
+        mult += np.uint64(82520 + inverse_i + inverse_i)
+    out += np.uint64(97531)
+    return out
+
+
+def _to_arrow(series: pd.Series):
+    """Colonne texte en tableau Arrow (chaînes ou dictionnaire de chaînes), None si la conversion n'est pas fidèle."""
+    import pyarrow as pa
+
+    try:
+        array = pa.array(series, from_pandas=True)
+    except Exception:  # objets mélangés, chaînes non encodables…
+        return None
+    value_type = array.type.value_type if pa.types.is_dictionary(array.type) else array.type
+    if pa.types.is_string(value_type) or pa.types.is_large_string(value_type):
+        return array
+    return None
+
+
+def _shared_files(table, shape: tuple) -> tuple:
+    """
+    Écrit `table` (Arrow IPC) et réserve le tableau d'empreintes `shape`,
+    en mémoire partagée puis, si elle est pleine, dans le dossier temporaire.
+    Renvoie (fichier Arrow, fichier d'empreintes) ; lève OSError si aucun
+    dossier ne convient.
+    """
+    import pyarrow as pa
+
+    directories = list(dict.fromkeys(d for d in (SHARED_DIR, tempfile.gettempdir()) if d))
+    for directory in directories:
+        paths = []
+        try:
+            for suffix in (".arrow", ".hashes"):
+                fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+                os.close(fd)
+                paths.append(path)
+            with pa.OSFile(paths[0], "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            with open(paths[1], "r+b") as fh:
+                size = 8 * shape[0] * shape[1]
+                if hasattr(os, "posix_fallocate"):
+                    # place réservée tout de suite : sur un tmpfs plein, l'écriture
+                    # par memmap tuerait le processus (SIGBUS) au lieu de lever OSError
+                    os.posix_fallocate(fh.fileno(), 0, size)
+                else:
+                    fh.truncate(size)
+            return tuple(paths)
+        except OSError:
+            for path in paths:
+                os.remove(path)
+            if directory == directories[-1]:
+                raise
+
+
+def hash_task(arrow_path: str, hashes_path: str, shape: tuple, field: int, name,
+              start: int, stop: int):
+    """
+    Normalise la tranche [start, stop) d'une colonne du fichier Arrow partagé
+    et écrit ses empreintes dans le tableau partagé (ligne `field`).
+    """
+    import pyarrow as pa
+
+    with pa.memory_map(arrow_path) as source:
+        # lecture sans copie : les tampons Arrow pointent dans le fichier projeté
+        column = pa.ipc.open_file(source).read_all().column(field)
+        values = column.slice(start, stop - start).to_pandas()
+        del column
+    out = np.memmap(hashes_path, dtype=np.uint64, mode="r+", shape=shape)
+    out[field, start:stop] = column_hashes(normalize_column(name, values))
+    out.flush()
+    del out
+
+
+def parallel_row_hashes(df: pd.DataFrame, positions=None, progress=_no_progress,
+                        pool: WorkerPool = None):
+    """
+    Empreintes des lignes de `df` (colonnes `positions`, toutes par défaut),
+    normalisées en parallèle. None s'il n'y a pas de colonne texte à répartir
+    ou pas de place pour les fichiers partagés.
+    """
+    import pyarrow as pa
+
+    pool = pool or normalize_pool
+    positions = range(df.shape[1]) if positions is None else positions
+    n_rows = len(df)
+    columns = [(df.columns[j], df.iloc[:, j]) for j in positions]
+    shared, local = [], []
+    for k, (name, series) in enumerate(columns):
+        array = None
+        if name not in PROTECTED_COLS and is_text_column(series):
+            array = _to_arrow(series)
+        if array is None:
+            local.append(k)
+        else:
+            shared.append((k, array))
+    if not shared:
+        return None
+
+    table = pa.table({str(k): array for k, array in shared})
+    fields = [k for k, _ in shared]
+    del shared, array  # les tableaux Arrow ne vivent plus que dans la table
+    shape = (len(fields), n_rows)
+    try:
+        arrow_path, hashes_path = _shared_files(table, shape)
+    except OSError:
+        return None  # plus de place : normalisation séquentielle
+    del table
+    try:
+        out = np.memmap(hashes_path, dtype=np.uint64, mode="r+", shape=shape)
+
+        task_rows = min(TASK_ROWS, max(MIN_TASK_ROWS, -(-n_rows * len(fields) // (4 * pool.workers))))
+        tasks = [(arrow_path, hashes_path, shape, f, columns[k][0], start, min(start + task_rows, n_rows))
+                 for f, k in enumerate(fields) for start in range(0, n_rows, task_rows)]
+        total, done = len(tasks) + len(local), 0
+        local_hashes = {}
+        running, broken = {}, False
+        while tasks or running or local:
+            while tasks and not broken and len(running) < 2 * pool.workers:
+                executor = pool.executor
+                try:
+                    future = pool.submit(hash_task, *tasks[0])
+                except PoolBusy:
+                    break  # pool occupé par d'autres requêtes : on avance sur place
+                running[future] = (tasks.pop(0), executor)
+            if local:
+                # colonnes gardées ici, traitées pendant que le pool travaille
+                k = local.pop(0)
+                local_hashes[k] = column_hashes(normalize_column(*columns[k]))
+                done += 1
+            elif running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task, executor = running.pop(future)
+                    try:
+                        future.result()
+                    except BrokenProcessPool:
+                        # processus arrêté : le reste est fait ici, le pool sera recréé
+                        # (sans annuler les tâches des autres requêtes)
+                        if not broken:
+                            pool.discard(executor)
+                            broken = True
+                        hash_task(*task)
+                    except CancelledError:  # pool arrêté avant la tâche : faite ici
+                        hash_task(*task)
+                    done += 1
+            else:
+                hash_task(*tasks.pop(0))
+                done += 1
+            progress("normalize", done / total)
+
+        result = combine_hashes([
+            local_hashes[k] if k in local_hashes else out[fields.index(k)] for k in range(len(columns))
+        ])
+        del out
+        return result
+    finally:
+        os.remove(arrow_path)
+        os.remove(hashes_path)
@@ -0,0 +1,311 @@
+"""
+Plans de nettoyage déclaratifs (POST /pipeline).
+
+Un plan est une liste ordonnée d'étapes JSON (ou {"steps": [...]}) :
+- {"op": "dedup", "mode": "exact", "columns": [...]} : doublons après
+  normalisation, sur les colonnes données (toutes par défaut) ; "mode":
+  "fuzzy" accepte aussi block_on, similarity, num_perm, ngram, keep_all ;
+- {"op": "fill_missing", "method": "median", "value": 0, "text_value": "NULL",
+  "columns": [...]} : méthode median / mean / constant (value) / null pour
+  les colonnes numériques, text_value (null : aucun) pour le texte ;
+- {"op": "outliers", "method": "delete", "columns": [...], "detector": "iqr",
+  "threshold": ..., "iqr_factor": 1.5, "bounds": [basse, haute],
+  "column_bounds": {...}, "quantile_method": "exact", "quantile_error": ...}.
+Dans fill_missing et outliers, "columns" peut être un objet d'options par
+colonne : {"age": {"method": "constant", "value": 0}} ou
+{"revenu": {"detector": "mad"}, "age": {"bounds": [0, 120]}}.
+
+Le planificateur fusionne en une passe les étapes consécutives dont le
+résultat ne dépend pas de l'ordre : remplissages successifs (par colonne,
+la première étape qui la touche décide), outliers remplacés sur des colonnes
+disjointes (un seul bloc numérique), suppressions dont les étapes suivantes
+n'ont que des bornes fixes (un seul masque), dédoublonnages exacts répétés.
+Une étape ne lit et ne normalise que ses colonnes.
+
+L'exécution garde au plus une copie de travail : le DataFrame d'entrée (qui
+peut venir du cache des datasets) n'est jamais modifié, les colonnes
+remplacées le sont sur une copie superficielle, et une suppression de
+lignes remplace la copie précédente au lieu de s'y ajouter.
+
+Les passes sont exécutées par le moteur choisi (`engine` : pandas ou
+polars, voir backends.py), avec le même résultat.
+
+Les routes /deduplicate, /fill-missing, /remove-outliers et
+/clean-all-and-download exécutent des plans prédéfinis.
+"""
+import json
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, UploadFile, File, Form
+
+from .backends import PANDAS, Unsupported, check_engine, get_backend, outlier_spec
+from .bounds import check_detector, check_quantile_method
+from .datasets import load_input
+from .export import check_format, frame_response, whole_number_columns
+from .fuzzy import NGRAM, NUM_PERM, SIMILARITY
+from .workers import offload
+
+OPS = ("dedup", "fill_missing", "outliers")
+FILL_METHODS = ("median", "mean", "constant", "null")
+OUTLIER_METHODS = ("delete", "mean", "median")
+
+router = APIRouter()
+
+
+def _no_progress(stage, fraction):
+    pass
+
+
+# ---------- VALIDATION DES ÉTAPES ----------
+
+def _column_options(value) -> tuple:
+    """(colonnes ou None, options par colonne) de la clé "columns"."""
+    if value is None:
+        return None, {}
+    if isinstance(value, dict):
+        if not all(isinstance(opts, dict) for opts in value.values()):
+            raise ValueError("Options par colonne invalides (attendu : {\"colonne\": {...}}).")
+        return list(value), value
+    if isinstance(value, list):
+        return value, {}
+    raise ValueError("Format des colonnes invalide.")
+
+
+def _bounds(value) -> tuple:
+    """[basse, haute] → (basse, haute) ; null laisse le côté ouvert."""
+    try:
+        lower, upper = value
+        return (-np.inf if lower is None else float(lower), np.inf if upper is None else float(upper))
+    except (TypeError, ValueError):
+        raise ValueError("Bornes invalides (attendu : [basse, haute]).")
+
+
+def _fill_spec(options: dict) -> tuple:
+    """(méthode, valeur, texte) d'un remplissage, validés."""
+    method = options.get("method", "median")
+    if method not in FILL_METHODS:
+        raise ValueError("Méthode de valeurs manquantes invalide.")
+    value = None
+    if method == "constant":
+        value = options.get("value")
+        if value is None or value == "":
+            raise ValueError("Valeur constante manquante.")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError("Valeur constante invalide.")
+    text_value = options.get("text_value", "NULL")
+    return method, value, None if text_value is None else str(text_value)
+
+
+def _detect_spec(options: dict) -> tuple:
+    """Réglage d'une colonne : ("fixed", basse, haute) ou ("detect", détecteur, seuil, facteur IQR)."""
+    if options.get("bounds") is not None:
+        return ("fixed",) + _bounds(options["bounds"])
+    detector, threshold = check_detector(options.get("detector"), options.get("threshold"))
+    try:
+        iqr_factor = float(options.get("iqr_factor", 1.5))
+    except (TypeError, ValueError):
+        raise ValueError("Facteur IQR invalide.")
+    return ("detect", detector, threshold, iqr_factor)
+
+
+def check_step(step) -> dict:
+    """Étape du plan validée et complétée ; lève ValueError."""
+    if not isinstance(step, dict) or step.get("op") not in OPS:
+        raise ValueError(f"Opération invalide (attendu : {', '.join(OPS)}).")
+    op = step["op"]
+    columns, per_column = _column_options(step.get("columns"))
+
+    if op == "dedup":
+        mode = step.get("mode", "exact")
+        if mode not in ("exact", "fuzzy"):
+            raise ValueError("Mode de dédoublonnage invalide (attendu : exact, fuzzy).")
+        block_on = step.get("block_on")
+        if block_on is not None and not isinstance(block_on, list):
+            raise ValueError("Format des colonnes invalide.")
+        try:
+            similarity = float(step.get("similarity", SIMILARITY))
+            num_perm = int(step.get("num_perm", NUM_PERM))
+            ngram = int(step.get("ngram", NGRAM))
+        except (TypeError, ValueError):
+            raise ValueError("Réglages du dédoublonnage approximatif invalides (similarity, num_perm, ngram).")
+        return {
+            "op": op, "mode": mode, "columns": columns, "block_on": block_on,
+            "similarity": similarity, "num_perm": num_perm, "ngram": ngram,
+            "keep_all": bool(step.get("keep_all", False)),
+        }
+
+    if op == "fill_missing":
+        default = _fill_spec(step)
+        specs = {}
+        for col, opts in per_column.items():
+            merged = {**step, **opts}
+            if "method" in opts and "value" not in opts:
+                merged.pop("value", None)
+            specs[col] = _fill_spec(merged)
+        return {"op": op, "columns": columns, "default": default, "specs": specs}
+
+    method = step.get("method", "delete")
+    if method not in OUTLIER_METHODS:
+        raise ValueError("Méthode d'outliers invalide.")
+    quantile_method, quantile_error = check_quantile_method(
+        step.get("quantile_method"), step.get("quantile_error"))
+    column_bounds = step.get("column_bounds") or {}
+    if not isinstance(column_bounds, dict):
+        raise ValueError("Bornes par colonne invalides (attendu : {\"colonne\": [basse, haute]}).")
+    specs = {col: ("fixed",) + _bounds(b) for col, b in column_bounds.items()}
+    for col, opts in per_column.items():
+        if opts:
+            merged = {**step, **opts}
+            if "detector" in opts and "threshold" not in opts:
+                merged.pop("threshold", None)
+            if "bounds" not in opts:
+                merged.pop("bounds", None)
+            specs[col] = _detect_spec(merged)
+    default = _detect_spec(step)
+    return {"op": op, "method": method, "columns": columns, "default": default, "specs": specs,
+            "quantile_method": quantile_method, "quantile_error": quantile_error}
+
+
+def parse_plan(plan) -> list:
+    """Plan JSON (texte, liste ou {"steps": [...]}) → étapes validées."""
+    if isinstance(plan, str):
+        try:
+            plan = json.loads(plan)
+        except ValueError:
+            raise ValueError("Plan JSON invalide.")
+    if isinstance(plan, dict):
+        plan = plan.get("steps")
+    if not isinstance(plan, list) or not plan:
+        raise ValueError("Le plan doit être une liste d'étapes non vide.")
+    steps = []
+    for position, step in enumerate(plan, 1):
+        try:
+            steps.append(check_step(step))
+        except ValueError as e:
+            raise ValueError(f"Étape {position} : {e}")
+    return steps
+
+
+# ---------- PLANIFICATEUR ----------
+
+def _mergeable(previous: dict, step: dict) -> bool:
+    """`step` peut-elle rejoindre la passe de `previous` sans changer le résultat ?"""
+    if previous["op"] != step["op"]:
+        return False
+    if step["op"] == "fill_missing":
+        # un remplissage ne change ni les lignes ni les autres colonnes
+        return True
+    if step["op"] == "dedup":
+        return step["mode"] == previous["mode"] == "exact" and step["columns"] == previous["columns"]
+    if step["method"] != previous["method"]:
+        return False
+    if step["method"] == "delete":
+        # bornes fixes : indépendantes des lignes supprimées avant
+        if step["columns"] is None:
+            return step["default"][0] == "fixed"
+        return all(outlier_spec(step, c)[0] == "fixed" for c in step["columns"])
+    # remplacement : statistiques par colonne, sur les mêmes lignes
+    return (previous["columns"] is not None and step["columns"] is not None
+            and not set(previous["columns"]) & set(step["columns"]))
+
+
+def compile_plan(steps: list) -> list:
+    """Passes d'exécution : listes d'étapes consécutives fusionnées."""
+    passes = []
+    for step in steps:
+        if passes and _mergeable(passes[-1][-1], step):
+            passes[-1].append(step)
+        else:
+            passes.append([step])
+    return passes
+
+
+def describe_passes(passes: list) -> list:
+    """Plan compilé, pour `explain` : opération et étapes regroupées par passe."""
+    out, position = [], 0
+    for steps in passes:
+        out.append({
+            "op": steps[0]["op"],
+            "steps": list(range(position + 1, position + len(steps) + 1)),
+            "columns": None if any(s["columns"] is None for s in steps)
+            else [c for s in steps for c in s["columns"]],
+        })
+        position += len(steps)
+    return out
+
+
+# ---------- EXÉCUTION ----------
+
+def execute(df: pd.DataFrame, passes: list, progress=_no_progress, engine: Optional[str] = None) -> pd.DataFrame:
+    """
+    Exécute un plan compilé avec le moteur `engine` (backends.py). `df`
+    n'est pas modifié ; le résultat a un index 0..n-1. Lève ValueError pour
+    une colonne ou un paramètre invalide.
+    """
+    backend = get_backend(engine)
+    try:
+        work = backend.load(df)
+    except Unsupported:
+        backend, work = PANDAS, PANDAS.load(df)
+    for steps in passes:
+        try:
+            work = backend.run(work, steps, progress)
+        except Unsupported:
+            # étape hors du moteur : la suite du plan passe par pandas
+            backend, work = PANDAS, backend.export(work)
+            work = backend.run(work, steps, progress)
+    work = backend.export(work)
+    index = work.index
+    if not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1):
+        work.index = pd.RangeIndex(len(work))  # lignes supprimées : pas de reset_index (copie)
+    return work
+
+
+def compile_steps(steps: list) -> list:
+    """Plan prédéfini (étapes des routes) validé et compilé ; ValueError sans numéro d'étape."""
+    return compile_plan([check_step(step) for step in steps])
+
+
+@router.post("/pipeline")
+@offload
+def pipeline(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Form(None),
+    plan: str = Form(...),  # [{"op": "dedup"}, {"op": "fill_missing", "method": "median"}, ...]
+    explain: bool = Form(False),
+    engine: Optional[str] = Form(None),  # pandas / polars (CLEANING_ENGINE par défaut)
+    output_format: Optional[str] = Form(None),  # xlsx / parquet / feather / csv / ndjson
+    compression: Optional[str] = Form(None)
+):
+    """
+    Exécute un plan de nettoyage déclaratif (voir l'en-tête du module).
+    `explain=true` renvoie les passes compilées sans rien exécuter.
+    """
+    try:
+        fmt, compression = check_format(output_format, compression)
+        engine = check_engine(engine)
+        passes = compile_plan(parse_plan(plan))
+    except ValueError as e:
+        return {"error": str(e)}
+    if explain:
+        return {"passes": describe_passes(passes)}
+
+    try:
+        df, _ = load_input(file, dataset_id)
+    except Exception as e:
+        return {"error": str(e)}
+
+    try:
+        df_clean = execute(df, passes, engine=engine)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    try:
+        return frame_response(df_clean, "donnees_nettoyees", fmt, compression,
+                              whole_number_columns(df_clean))
+    except ValueError as e:
+        return {"error": str(e)}
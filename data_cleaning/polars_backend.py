@@ -0,0 +1,306 @@
+"""
+Moteur polars (engine=polars) : mêmes étapes et mêmes résultats que le
+moteur pandas (backends.py), sur des colonnes Arrow traitées en parallèle.
+
+- load : DataFrame pandas → polars ; le type pandas de chaque colonne est
+  gardé à part et rendu à l'export (catégories comprises), comme la
+  valeur manquante des colonnes d'objets (NaN ou None, polars n'a que
+  null). Colonnes d'objets mélangés, types sans équivalent, noms non
+  textuels ou en double : Unsupported, le plan passe par pandas.
+- normalize : même clé que normalize_column. Le texte est normalisé une fois
+  par valeur distincte (même noyau et même cache LRU que pandas) puis
+  redistribué par polars ; les dates passent par date_key_column par
+  tranches de CHUNK_ROWS lignes comme dans dedup_index (le classement des
+  formats dépend des valeurs vues ensemble) ; les flottants sont comparés
+  bit à bit, comme les empreintes pandas (0.0 et -0.0 restent distincts).
+- dedup : is_first_distinct sur les clés elles-mêmes (pas d'empreintes).
+- fill_missing / outliers : statistiques (médiane, moyenne, quantiles
+  linéaires, écart-type) et masques en expressions polars ; les quantiles
+  par esquisses (quantile_method=sketch) restent calculés par bounds.py.
+
+Les statistiques en virgule flottante peuvent différer de pandas au
+dernier bit près (ordre des additions).
+"""
+from functools import reduce
+from operator import or_
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow  # noqa: F401  (conversions pandas ↔ polars)
+
+from .backends import (
+    Backend, Unsupported, check_dedup_columns, fill_groups, outlier_targets,
+)
+from .bounds import MAD_SCALE, detect_limits
+from .dedup_index import CHUNK_ROWS
+from .metrics import stage
+from .normalization import (
+    CACHE_DISTINCT_RATIO, PROTECTED_COLS, clean_distinct, is_date_name, normalize_column,
+)
+
+
+def _no_progress(stage, fraction):
+    pass
+
+
+def _is_numeric(dtype) -> bool:
+    """Numérique au sens de select_dtypes(np.number)."""
+    return isinstance(dtype, np.dtype) and dtype.kind in "iuf"
+
+
+def _is_text(dtype) -> bool:
+    """Texte au sens de compact.text_columns."""
+    return dtype == object or isinstance(dtype, (pd.StringDtype, pd.CategoricalDtype))
+
+
+def _supported(series: pd.Series) -> bool:
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.api.types.infer_dtype(dtype.categories, skipna=True) == "string"
+    if isinstance(dtype, pd.StringDtype) or dtype == object:
+        return True
+    return isinstance(dtype, np.dtype) and (
+        (dtype.kind in "iuf" and dtype != np.float16) or dtype.kind == "b" or dtype == "datetime64[ns]")
+
+
+def _null_value(series: pd.Series):
+    """Valeur manquante d'une colonne d'objets : NaN (défaut, celui de read_csv) ou None."""
+    missing = series[series.isna()]
+    if not len(missing):
+        return np.nan
+    if all(value is None for value in missing):
+        return None
+    if all(isinstance(value, float) for value in missing):
+        return np.nan
+    raise Unsupported("valeurs manquantes mélangées")
+
+
+def _floats(col) -> pl.Expr:
+    return pl.col(col).cast(pl.Float64)
+
+
+def _stats(data: pl.DataFrame, exprs: list) -> np.ndarray:
+    """Agrégats calculés en une passe ; NaN pour un résultat indéfini."""
+    row = data.select([e.alias(str(i)) for i, e in enumerate(exprs)]).row(0)
+    return np.array([np.nan if v is None else v for v in row], dtype=np.float64)
+
+
+class Frame:
+    """DataFrame polars et types pandas à rendre à l'export."""
+
+    def __init__(self, data: pl.DataFrame, dtypes: dict, deferred: dict = None, nulls: dict = None):
+        self.data = data
+        self.dtypes = dtypes  # {colonne: type pandas courant}
+        # {colonne: valeur} : fillna vers une colonne objet, fait à l'export
+        self.deferred = deferred or {}
+        # {colonne objet: NaN ou None} : valeur manquante rendue à l'export
+        self.nulls = nulls or {}
+
+    def __len__(self):
+        return self.data.height
+
+    def update(self, data: pl.DataFrame = None, dtypes: dict = None, deferred: dict = None) -> "Frame":
+        return Frame(self.data if data is None else data,
+                     self.dtypes if dtypes is None else dtypes,
+                     self.deferred if deferred is None else deferred, self.nulls)
+
+
+class PolarsBackend(Backend):
+    """Moteur polars : colonnes Arrow, agrégats et filtres multithread."""
+
+    name = "polars"
+
+    def load(self, df: pd.DataFrame) -> Frame:
+        if not all(isinstance(c, str) for c in df.columns) or df.columns.has_duplicates:
+            raise Unsupported("noms de colonnes")
+        if not all(_supported(df[c]) for c in df.columns):
+            raise Unsupported("type de colonne")
+        try:
+            data = pl.from_pandas(df)
+        except Exception:  # objets mélangés (nombres et texte…)
+            raise Unsupported("conversion")
+        dtypes = dict(df.dtypes.items())
+        text = [c for c, dtype in dtypes.items() if _is_text(dtype)]
+        if any(data.schema[c] not in (pl.String, pl.Categorical) for c in text):
+            raise Unsupported("objets non textuels")
+        nulls = {c: _null_value(df[c]) for c, dtype in dtypes.items() if dtype == object}
+        # catégories rendues à l'export : polars ne garde que le texte
+        return Frame(data.with_columns(pl.col(text).cast(pl.String)) if text else data, dtypes,
+                     nulls=nulls)
+
+    # ---------- DÉDOUBLONNAGE ----------
+
+    def _pandas_slice(self, frame: Frame, col, start: int, stop: int) -> pd.Series:
+        series = frame.data[col].slice(start, stop - start).to_pandas()
+        return series.astype(object) if _is_text(frame.dtypes[col]) else series
+
+    def _key(self, frame: Frame, col) -> pl.Series:
+        """Clé de normalize_column pour une colonne, en série polars."""
+        series, dtype = frame.data[col], frame.dtypes[col]
+        if col not in PROTECTED_COLS:
+            if is_date_name(col):
+                n = len(frame)
+                keys = [normalize_column(col, self._pandas_slice(frame, col, start, min(start + CHUNK_ROWS, n)))
+                        .to_numpy(dtype=object) for start in range(0, n, CHUNK_ROWS)]
+                return pl.Series(np.concatenate(keys) if keys else [], dtype=pl.String)
+            if _is_text(dtype):
+                values = series.drop_nulls()
+                uniques = values.unique()
+                cached = len(uniques) <= CACHE_DISTINCT_RATIO * len(values)
+                keys = clean_distinct(np.array(uniques.to_list(), dtype=object), True, cached)
+                # valeur manquante : clé ""
+                return series.replace_strict(uniques, pl.Series(keys, dtype=pl.String),
+                                             default=None, return_dtype=pl.String).fill_null("")
+        if _is_numeric(dtype) and dtype.kind == "f":
+            # bits du float64, comme les empreintes de hash_pandas_object
+            return pl.Series(series.cast(pl.Float64).to_numpy().view(np.uint64))
+        return series
+
+    def normalize(self, frame: Frame, columns=None, progress=_no_progress) -> pl.DataFrame:
+        """Clés de dédoublonnage, une colonne par colonne comparée."""
+        columns = frame.data.columns if columns is None else list(columns)
+        if not columns or any(c in frame.deferred for c in columns):
+            raise Unsupported("clés")
+        with stage("normalize", len(frame)) as record:
+            keys = []
+            for k, col in enumerate(columns):
+                keys.append(self._key(frame, col).alias(f"k{k}"))
+                progress("normalize", (k + 1) / len(columns))
+            record.rows_out = len(frame)
+        return pl.DataFrame(keys)
+
+    def dedup(self, frame: Frame, step: dict, progress=_no_progress) -> Frame:
+        if step["mode"] == "fuzzy":
+            raise Unsupported("dédoublonnage approximatif")
+        check_dedup_columns(frame.data.columns, step["columns"])
+        keys = self.normalize(frame, step["columns"], progress)
+        with stage("dedup", len(frame)) as record:
+            keep = keys.select(pl.struct(pl.all()).is_first_distinct()).to_series()
+            frame = frame.update(frame.data.filter(keep))
+            record.rows_out = len(frame)
+        progress("dedup", 1.0)
+        return frame
+
+    # ---------- VALEURS MANQUANTES ----------
+
+    def fill_missing(self, frame: Frame, steps: list) -> Frame:
+        dtypes, deferred = dict(frame.dtypes), dict(frame.deferred)
+        available = [c for c in frame.data.columns if c not in deferred]  # déjà sans manquant pour pandas
+        numeric_groups, null_cols, text_groups = fill_groups(
+            available, {c for c in available if _is_numeric(dtypes[c])},
+            {c for c in available if _is_text(dtypes[c])}, steps)
+        nulls = frame.data.null_count().row(0, named=True)
+
+        targets = [(method, value, col) for (method, value), cols in numeric_groups.items()
+                   for col in cols if nulls[col]]
+        computed = [(i, getattr(_floats(col), method)()) for i, (method, _, col) in enumerate(targets)
+                    if method in ("median", "mean")]
+        stats = dict(zip([i for i, _ in computed], _stats(frame.data, [e for _, e in computed]))) if computed else {}
+
+        updates = []
+        for i, (method, value, col) in enumerate(targets):
+            fill = np.float64(stats[i] if i in stats else value)  # comparé en float64 ci-dessous
+            if np.isnan(fill):
+                continue  # colonne entièrement vide : fillna(NaN) ne change rien
+            target = frame.data.schema[col]
+            if dtypes[col] == np.float32 and np.float32(fill) != fill:
+                # même règle que compact.fill_numeric : float64 si la valeur n'y tient pas
+                target, dtypes[col] = pl.Float64, np.dtype(np.float64)
+            updates.append(pl.col(col).cast(target).fill_null(pl.lit(fill).cast(target)))
+
+        text_fills = [(col, "NULL") for col in null_cols] + \
+                     [(col, text_value) for text_value, cols in text_groups.items() for col in cols]
+        for col, text_value in text_fills:
+            if not nulls[col]:
+                continue
+            dtype = dtypes[col]
+            if not _is_text(dtype):
+                # "null" sur une colonne non texte : elle devient objet (nombres et "NULL")
+                deferred[col], dtypes[col] = text_value, np.dtype(object)
+                continue
+            if isinstance(dtype, pd.CategoricalDtype) and text_value not in dtype.categories:
+                dtypes[col] = pd.CategoricalDtype(list(dtype.categories) + [text_value], dtype.ordered)
+            updates.append(pl.col(col).fill_null(pl.lit(text_value)))
+
+        data = frame.data.with_columns(updates) if updates else frame.data
+        return frame.update(data, dtypes, deferred)
+
+    # ---------- OUTLIERS ----------
+
+    def _limits(self, data: pl.DataFrame, cols: list, detector: str, threshold, iqr_factor: float) -> tuple:
+        """Bornes exactes des détecteurs de bounds.detect_limits, en agrégats polars."""
+        if detector == "iqr":
+            q = _stats(data, [_floats(c).quantile(p, "linear") for p in (0.25, 0.75) for c in cols])
+            q1, q3 = q[:len(cols)], q[len(cols):]
+            iqr = q3 - q1
+            return q1 - iqr_factor * iqr, q3 + iqr_factor * iqr
+        if detector == "mad":
+            median = _stats(data, [_floats(c).median() for c in cols])
+            mad = _stats(data, [(_floats(c) - m).abs().median() for c, m in zip(cols, median)])
+            half = threshold * mad / MAD_SCALE
+            return median - half, median + half
+        mean = _stats(data, [_floats(c).mean() for c in cols])
+        std = _stats(data, [_floats(c).std(ddof=1) for c in cols])
+        return mean - threshold * std, mean + threshold * std
+
+    def outliers(self, frame: Frame, steps: list) -> Frame:
+        dtypes, data = dict(frame.dtypes), frame.data
+        numeric = [c for c in data.columns if _is_numeric(dtypes[c])]
+        columns, lower, upper, groups = outlier_targets(data.columns, numeric, steps)
+        if not columns:
+            return frame
+        for (detector, threshold, iqr_factor, method, error), idx in groups.items():
+            cols = [columns[j] for j in idx]
+            if method == "exact":
+                lower[idx], upper[idx] = self._limits(data, cols, detector, threshold, iqr_factor)
+            else:
+                block = data.select([_floats(c) for c in cols]).to_numpy()
+                lower[idx], upper[idx] = detect_limits(block, detector, threshold, iqr_factor, method, error)
+
+        # NaN (valeur manquante ou borne indéfinie) : jamais hors bornes
+        outside = []
+        for col, low, high in zip(columns, lower, upper):
+            tests = ([_floats(col) < low] if not np.isnan(low) else []) + \
+                    ([_floats(col) > high] if not np.isnan(high) else [])
+            outside.append(reduce(or_, tests).fill_null(False) if tests else pl.lit(False))
+
+        if steps[0]["method"] == "delete":
+            return frame.update(data.filter(~pl.any_horizontal(outside)))
+
+        # remplacement par la moyenne / médiane des valeurs dans les bornes
+        statistic = steps[0]["method"]
+        counts = _stats(data, [mask.sum() for mask in outside])
+        replacement = _stats(data, [getattr(_floats(c).filter(~mask), statistic)()
+                                    for c, mask in zip(columns, outside)])
+        updates = []
+        for col, mask, count, value in zip(columns, outside, counts, replacement):
+            if not count or np.isnan(value):
+                continue
+            values = pl.when(mask).then(pl.lit(value)).otherwise(_floats(col))
+            dtype = dtypes[col]
+            # une colonne entière le reste si la valeur de remplacement est entière
+            if dtype.kind in "iu" and float(value).is_integer():
+                values = values.cast(data.schema[col])
+            elif dtype == np.float32 and np.float32(value) == value:
+                values = values.cast(pl.Float32)
+            else:
+                dtypes[col] = np.dtype(np.float64)
+            updates.append(values.alias(col))
+        return frame.update(data.with_columns(updates) if updates else data, dtypes)
+
+    # ---------- EXPORT ----------
+
+    def export(self, frame: Frame) -> pd.DataFrame:
+        df = frame.data.to_pandas()
+        for col, dtype in frame.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                df[col] = pd.Categorical(df[col], categories=dtype.categories, ordered=dtype.ordered)
+            elif isinstance(dtype, pd.StringDtype):
+                df[col] = df[col].astype(dtype)
+            elif dtype == object and frame.nulls.get(col, np.nan) is not None and df[col].hasnans:
+                # to_pandas rend None : NaN comme pandas
+                df[col] = df[col].fillna(np.nan)
+        for col, value in frame.deferred.items():
+            df[col] = df[col].fillna(value)
+        return df
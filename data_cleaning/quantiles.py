@@ -0,0 +1,117 @@
+"""
+Statistiques d'ordre exactes en mémoire bornée.
+
+Les valeurs ne sont jamais chargées d'un bloc : `scan()` les relit
+morceau par morceau. Une passe construit un histogramme sur 16 bits de la
+clé triable de chaque flottant, la passe suivante ne garde que les
+candidats du bon seau puis les trie. En pratique deux passes suffisent.
+"""
+import math
+import numpy as np
+
+RADIX_BITS = 16
+BUFFER_ROWS = 1 << 20
+
+_SIGN = np.uint64(1 << 63)
+_DIGIT_MASK = np.uint64((1 << RADIX_BITS) - 1)
+
+
+def _sortable_keys(values) -> np.ndarray:
+    """Clés uint64 dont l'ordre est celui des flottants (-0.0 ramené à 0.0)."""
+    bits = (np.asarray(values, dtype=np.float64) + 0.0).view(np.uint64)
+    return np.where(bits & _SIGN, ~bits, bits | _SIGN)
+
+
+def _from_keys(keys: np.ndarray) -> np.ndarray:
+    keys = np.asarray(keys, dtype=np.uint64)
+    return np.where(keys & _SIGN, keys & ~_SIGN, ~keys).view(np.float64)
+
+
+def select_ranks(scan, targets: dict, buffer_rows: int = BUFFER_ROWS) -> dict:
+    """
+    Valeurs de rang donné (0 = minimum) pour plusieurs colonnes à la fois.
+
+    `scan()` renvoie un itérable de dict {colonne: ndarray float64 sans NaN} ;
+    `targets` associe à chaque colonne la liste des rangs voulus.
+    """
+    # état par (colonne, rang) : préfixe fixé, nb de bits fixés,
+    # nb de valeurs sous le préfixe, nb de candidats (None = inconnu)
+    pending = {(col, r): (0, 0, 0, None) for col, ranks in targets.items() for r in set(ranks)}
+    result = {col: {} for col in targets}
+
+    while pending:
+        collect = {key for key, st in pending.items() if st[3] is not None and st[3] <= buffer_rows}
+        hists, buffers = {}, {key: [] for key in collect}
+
+        for chunk in scan():
+            keys_by_col = {}
+            for key, (prefix, bits, _, _) in pending.items():
+                col = key[0]
+                if col not in keys_by_col:
+                    keys_by_col[col] = _sortable_keys(chunk[col])
+                keys = keys_by_col[col]
+                if bits:
+                    keys = keys[(keys >> np.uint64(64 - bits)) == np.uint64(prefix)]
+                if key in collect:
+                    buffers[key].append(keys)
+                else:
+                    digits = (keys >> np.uint64(64 - bits - RADIX_BITS)) & _DIGIT_MASK
+                    hist = np.bincount(digits.astype(np.intp), minlength=1 << RADIX_BITS)
+                    hists[key] = hists[key] + hist if key in hists else hist
+
+        for key in list(pending):
+            col, rank = key
+            prefix, bits, below, _ = pending.pop(key)
+            if key in collect:
+                candidates = np.sort(np.concatenate(buffers[key]))
+                result[col][rank] = float(_from_keys(candidates[rank - below:rank - below + 1])[0])
+                continue
+
+            cumulative = np.cumsum(hists[key])
+            digit = int(np.searchsorted(cumulative, rank - below, side="right"))
+            below += int(cumulative[digit - 1]) if digit else 0
+            prefix, bits = (prefix << RADIX_BITS) | digit, bits + RADIX_BITS
+            if bits == 64:  # toutes les clés candidates sont identiques
+                result[col][rank] = float(_from_keys([prefix])[0])
+            else:
+                pending[key] = (prefix, bits, below, int(hists[key][digit]))
+    return result
+
+
+def quantile_ranks(n: int, q: float) -> tuple:
+    """Rangs encadrants et fraction, comme l'interpolation linéaire de pandas."""
+    pos = q * (n - 1)
+    return math.floor(pos), math.ceil(pos), pos - math.floor(pos)
+
+
+def interpolate(lower: float, upper: float, frac: float) -> float:
+    """Même arithmétique que np.quantile entre deux statistiques d'ordre."""
+    return float(np.quantile(np.array([lower, upper]), frac))
+
+
+def exact_quantiles(scan, counts: dict, qs: dict, buffer_rows: int = BUFFER_ROWS) -> dict:
+    """
+    Quantiles exacts {colonne: {q: valeur}} ; `counts` donne le nombre de
+    valeurs non manquantes par colonne, `qs` les quantiles voulus.
+    La médiane suit np.median (moyenne des deux valeurs centrales).
+    """
+    targets = {}
+    for col, wanted in qs.items():
+        if counts.get(col, 0) == 0:
+            continue
+        targets[col] = [r for q in wanted for r in quantile_ranks(counts[col], q)[:2]]
+    stats = select_ranks(scan, targets, buffer_rows)
+
+    result = {}
+    for col, wanted in qs.items():
+        result[col] = {}
+        for q in wanted:
+            if col not in stats:
+                result[col][q] = np.nan
+                continue
+            lo, hi, frac = quantile_ranks(counts[col], q)
+            if q == 0.5:
+                result[col][q] = float(np.mean([stats[col][lo], stats[col][hi]]))
+            else:
+                result[col][q] = interpolate(stats[col][lo], stats[col][hi], frac)
+    return result
@@ -0,0 +1,261 @@
+"""
+Moteurs de lecture de load_file, avec repli automatique.
+
+Pour chaque format, les moteurs sont essayés dans l'ordre configuré ; un
+moteur absent (ImportError) ou qui ne sait pas lire le fichier passe la
+main au suivant, le dernier lève l'erreur habituelle.
+
+- CSV   : "pandas" (lecteur C, un seul thread) par défaut ; "pyarrow"
+  (lecteur Arrow multithread), à activer par CSV_ENGINES=pyarrow,pandas.
+  Son résultat est ramené aux types de pandas (dates laissées en texte,
+  valeurs manquantes à NaN) mais pas à l'identique : entiers au-delà
+  d'int64 en flottants arrondis, jetons "0x10" ou "+5" lus comme nombres,
+  dernier chiffre de certains flottants à 17 chiffres significatifs
+  (pyarrow arrondit correctement, pandas non).
+- Excel : "calamine" (python-calamine, Rust) puis "pandas" (openpyxl / xlrd).
+- JSON  : "single" (un seul décodage, orjson si installé, forme détectée une
+  fois) puis "pandas" (pd.read_json, puis json.load + json_normalize).
+
+Les ordres par défaut excel et json viennent de benchmarks/bench_readers.py
+(résultats identiques à pandas) ; ils se changent par
+CSV_ENGINES, EXCEL_ENGINES et JSON_ENGINES (noms séparés par des virgules).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pandas import json_normalize
+
+from .uploads import mapped
+
+try:
+    import orjson
+except ImportError:  # décodeur optionnel : json de la bibliothèque standard
+    orjson = None
+
+CSV_ENGINES = os.environ.get("CSV_ENGINES", "pandas").split(",")
+EXCEL_ENGINES = os.environ.get("EXCEL_ENGINES", "calamine,pandas").split(",")
+JSON_ENGINES = os.environ.get("JSON_ENGINES", "single,pandas").split(",")
+
+# valeurs manquantes reconnues par pd.read_csv
+_NA_VALUES = sorted(pd._libs.parsers.STR_NA_VALUES)
+
+
+# ---------- CSV ----------
+
+def read_csv_pandas(source, nrows=None) -> pd.DataFrame:
+    return pd.read_csv(source, nrows=nrows)
+
+
+def read_csv_pyarrow(source, nrows=None) -> pd.DataFrame:
+    """
+    Lecteur Arrow multithread. Les types sont ceux du premier bloc ; si la
+    suite du fichier les contredit autrement qu'un entier devenu décimal
+    (pandas donnerait alors une colonne aux types mélangés), ou si une date
+    n'apparaît qu'après le premier bloc, on se replie sur pandas. `nrows` :
+    premières lignes seulement (types déduits sur tout `source`).
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pc
+
+    convert = pc.ConvertOptions(null_values=_NA_VALUES, strings_can_be_null=True,
+                                true_values=["True", "TRUE", "true"],
+                                false_values=["False", "FALSE", "false"])
+    with mapped(source) as data:
+        buffer = pa.py_buffer(data)
+        # lecteur fermé tout de suite : sa lecture anticipée tiendrait sinon le tampon
+        with pc.open_csv(pa.BufferReader(buffer), convert_options=convert) as reader:
+            schema = reader.schema
+        names = schema.names
+        if len(set(names)) != len(names) or "" in names:
+            raise ValueError("En-tête à renommer (colonnes vides ou en double) : lecteur pandas.")
+        # pandas ne reconnaît pas les dates sans parse_dates : elles restent du texte
+        convert.column_types = {f.name: pa.string() for f in schema if pa.types.is_temporal(f.type)}
+        table = pc.read_csv(pa.BufferReader(buffer), convert_options=convert)
+        del buffer
+
+    for before, after in zip(schema, table.schema):
+        expected = convert.column_types.get(before.name, before.type)
+        if pa.types.is_temporal(after.type) or not (
+                expected == after.type or pa.types.is_null(expected)
+                or pa.types.is_integer(expected) and pa.types.is_floating(after.type)):
+            raise ValueError(f"Types de la colonne {after.name} à départager : lecteur pandas.")
+
+    if table.num_rows == 0:
+        raise ValueError("Fichier sans lignes : lecteur pandas.")
+    if nrows is not None:
+        table = table.slice(0, nrows)
+    # colonne entièrement vide : float64 (NaN) comme pandas
+    table = table.cast(pa.schema([
+        pa.field(f.name, pa.float64()) if pa.types.is_null(f.type) else f for f in table.schema
+    ]))
+    df = table.to_pandas()
+    for col in df.columns:
+        if df[col].dtype == object and df[col].hasnans:
+            df[col] = df[col].fillna(np.nan)  # None → NaN, comme pd.read_csv
+    return df
+
+
+# ---------- Excel ----------
+
+def read_excel_pandas(source, nrows=None) -> pd.DataFrame:
+    return pd.read_excel(source, nrows=nrows)
+
+
+def read_excel_calamine(source, nrows=None) -> pd.DataFrame:
+    return pd.read_excel(source, engine="calamine", nrows=nrows)
+
+
+# ---------- JSON ----------
+
+def read_json_pandas(source) -> pd.DataFrame:
+    """Ancien chemin : pd.read_json, puis second décodage si la forme ne lui convient pas."""
+    try:
+        # 🔹 JSON déjà bien structuré
+        return pd.read_json(source)
+    except ValueError:
+        # 🔹 JSON imbriqué ou complexe
+        source.seek(0)
+        data = json.load(source)
+        if isinstance(data, dict):
+            # Cas: {"data": [ {...}, {...} ]}
+            for key, val in data.items():
+                if isinstance(val, list):
+                    return json_normalize(val)
+        elif isinstance(data, list):
+            # Cas: [ {...}, {...} ]
+            return json_normalize(data)
+        raise ValueError("Format JSON non supporté.")
+
+
+def _is_default_date(col) -> bool:
+    """Colonnes que pd.read_json tente de convertir en dates (keep_default_dates)."""
+    if not isinstance(col, str):
+        return False
+    col = col.lower()
+    return (col.endswith(("_at", "_time")) or col in ("modified", "date", "datetime")
+            or col.startswith("timestamp"))
+
+
+def _epoch_dates(data: pd.Series):
+    """Dates epoch comme pd.read_json (s, ms, us puis ns) ; None si la colonne n'en est pas."""
+    if not len(data):
+        return None
+    values = data
+    if values.dtype == object:
+        try:
+            values = data.astype("int64")
+        except OverflowError:
+            return None
+        except (TypeError, ValueError):
+            pass
+    if issubclass(values.dtype.type, np.number):
+        # 31536000 : un an en secondes, seuil de pd.read_json
+        if not (values.isna() | (values > 31536000)).all():
+            return None
+    for unit in ("s", "ms", "us", "ns"):
+        try:
+            return pd.to_datetime(values, errors="raise", unit=unit)
+        except (ValueError, OverflowError, TypeError):
+            continue
+    return None
+
+
+def json_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Conversions implicites de pd.read_json : dates epoch des colonnes
+    *_at / *_time / date…, nombres écrits en texte, flottants entiers en int64.
+    """
+    for col in df.columns:
+        data = df[col]
+        if _is_default_date(col):
+            dates = _epoch_dates(data)
+            if dates is not None:
+                df[col] = dates
+                continue
+        if data.dtype == object:
+            try:
+                data = data.astype("float64")
+            except (TypeError, ValueError):
+                pass
+        if len(data) and data.dtype in ("float", "object"):
+            try:
+                ints = data.astype("int64")
+                if (ints == data).all():
+                    data = ints
+            except (TypeError, ValueError, OverflowError):
+                pass
+        df[col] = data
+    return df
+
+
+def _plain_labels(columns) -> bool:
+    """Noms de colonnes que pd.read_json garde tels quels (ni nombres, ni dates)."""
+    labels = pd.Index(columns)
+    for convert in (pd.to_numeric, pd.to_datetime):
+        try:
+            convert(labels)
+            return False
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return True
+
+
+def read_json_single(source) -> pd.DataFrame:
+    """
+    Un seul décodage, puis la forme, détectée une fois :
+    - liste d'enregistrements ou objet de colonnes → DataFrame, types comme pd.read_json ;
+    - sinon, comme l'ancien repli : première liste de l'objet (ex. {"data": [...]})
+      ou liste entière → json_normalize.
+    Les formes que pd.read_json traite à part (objets d'objets, noms de colonnes
+    numériques ou dates) passent au moteur pandas.
+    """
+    with mapped(source) as raw:
+        data = orjson.loads(raw) if orjson is not None else json.loads(bytes(raw))
+    if isinstance(data, dict) and any(isinstance(v, dict) for v in data.values()):
+        raise ValueError("Objet d'objets : lecteur pandas.")
+    if not isinstance(data, (list, dict)):
+        raise ValueError("Format JSON non supporté.")
+    try:
+        df = pd.DataFrame(data)
+    except (TypeError, ValueError):
+        # colonnes de tailles différentes, scalaires seuls…
+        df = None
+    if df is not None:
+        if not _plain_labels(df.columns):
+            raise ValueError("Noms de colonnes à convertir : lecteur pandas.")
+        return json_dtypes(df)
+    if isinstance(data, dict):
+        for val in data.values():
+            if isinstance(val, list):
+                return json_normalize(val)
+        raise ValueError("Format JSON non supporté.")
+    return json_normalize(data)
+
+
+ENGINES = {
+    "csv": {"pyarrow": read_csv_pyarrow, "pandas": read_csv_pandas},
+    "excel": {"calamine": read_excel_calamine, "pandas": read_excel_pandas},
+    "json": {"single": read_json_single, "pandas": read_json_pandas},
+}
+DEFAULT_ORDER = {"csv": CSV_ENGINES, "excel": EXCEL_ENGINES, "json": JSON_ENGINES}
+
+
+def read_with_fallback(source, kind: str, engines=None, **options) -> pd.DataFrame:
+    """
+    Lit `source` (fichier binaire repositionnable, lu sur place) avec le premier moteur
+    qui réussit ; l'erreur du dernier moteur est propagée. `options` (nrows pour
+    CSV et Excel) sont transmises au moteur.
+    """
+    names = [name.strip() for name in (engines or DEFAULT_ORDER[kind]) if name.strip()]
+    unknown = [name for name in names if name not in ENGINES[kind]]
+    if unknown or not names:
+        raise ValueError(f"Moteur de lecture inconnu : {', '.join(unknown) or '(aucun)'}")
+    for i, name in enumerate(names):
+        source.seek(0)
+        try:
+            return ENGINES[kind][name](source, **options)
+        except Exception:
+            if i == len(names) - 1:
+                raise
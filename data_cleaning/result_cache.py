@@ -0,0 +1,212 @@
+"""
+Cache des résultats de nettoyage, adressé par le contenu.
+
+Pour /clean-all-and-download, /deduplicate, /fill-missing et
+/remove-outliers, un résultat est identifié par l'empreinte SHA-256 de
+l'entrée (contenu du fichier envoyé, ou dataset_id qui en est déjà
+l'empreinte), de la route et des paramètres normalisés (format et
+compression résolus, JSON réécrit), ainsi que des réglages de chargement
+qui changent le résultat (types compacts, ordre des moteurs de lecture).
+Le moteur d'exécution n'en fait pas partie : mêmes résultats avec pandas
+ou polars.
+
+Le fichier produit est recopié sur disque pendant son envoi et publié une
+fois complet ; une requête identique le renvoie tel quel, sans lecture du
+fichier (au-delà de son empreinte) ni export. Chaque réponse porte cette
+empreinte en ETag : un client qui la renvoie dans If-None-Match reçoit 304
+sans corps, que le résultat soit encore sur disque ou non ; If-None-Match: *
+ne vaut 304 que si le résultat est sur disque (RFC 9110).
+
+Taille totale bornée (RESULT_CACHE_MB, 0 : cache et ETag désactivés) : les
+résultats servis le moins récemment (date de modification, mise à jour à
+chaque service) sont supprimés d'abord.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Optional
+
+from anyio.to_thread import run_sync
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+from . import compact, readers, utils
+from .datasets import content_id
+from .export import stream_response
+
+RESULT_CACHE_BYTES = int(os.environ.get("RESULT_CACHE_MB", "1024")) * 1024 * 1024
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "data_cleaning_results"))
+# à changer quand le contenu des résultats change pour des entrées identiques
+KEY_VERSION = 1
+STALE_SECONDS = 3600  # copie en cours abandonnée (arrêt du serveur)
+
+
+def _canonical(value):
+    """Paramètre JSON (colonnes, bornes…) réécrit : espaces et ordre des clés sans effet."""
+    if isinstance(value, str) and value[:1] in ("[", "{"):
+        try:
+            return json.dumps(json.loads(value), sort_keys=True)
+        except ValueError:
+            pass
+    return value
+
+
+def _load_settings() -> dict:
+    """Réglages de load_file qui changent les données lues, relus à chaque appel."""
+    return {"compact": utils.COMPACT_DTYPES, "category_ratio": compact.CATEGORY_RATIO,
+            "readers": readers.DEFAULT_ORDER}
+
+
+def _etags(header: str) -> set:
+    """Valeurs d'un en-tête If-None-Match (les ETags faibles W/ comparés comme forts)."""
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+class ResultCache:
+    """Résultats sur disque, un fichier par empreinte, borné en octets."""
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def key(self, endpoint: str, file=None, dataset_id: Optional[str] = None, params: dict = None) -> Optional[str]:
+        """Empreinte du résultat ; None si le cache est désactivé ou sans entrée."""
+        if not self.max_bytes:
+            return None
+        # même priorité que load_input : dataset_id, sinon le fichier
+        if dataset_id:
+            source = dataset_id
+        elif file is not None:
+            source = content_id(file.file, file.filename)
+        else:
+            return None
+        params = {name: _canonical(value) for name, value in (params or {}).items()}
+        digest = hashlib.sha256(json.dumps(
+            [KEY_VERSION, _load_settings(), endpoint, source, params], sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def lookup(self, key: Optional[str], if_none_match: Optional[str], stem: str, fmt: str):
+        """Réponse 304 ou résultat gardé ; None s'il faut calculer."""
+        if key is None:
+            return None
+        etag = f'"{key}"'
+        if if_none_match and etag in _etags(if_none_match):
+            return Response(status_code=304, headers={"ETag": etag})
+        try:
+            # ouvert tout de suite : une éviction pendant l'envoi ne coupe pas la réponse
+            fh = open(self._path(key), "rb")
+        except FileNotFoundError:
+            return None
+        if if_none_match and if_none_match.strip() == "*":
+            fh.close()  # "*" : le résultat existe déjà
+            return Response(status_code=304, headers={"ETag": etag})
+        size = os.fstat(fh.fileno()).st_size
+        try:
+            os.utime(self._path(key))  # servi récemment : évincé en dernier
+        except FileNotFoundError:
+            pass
+
+        def chunks():
+            with fh:
+                while chunk := fh.read(1 << 20):
+                    yield chunk
+
+        response = stream_response(chunks(), stem, fmt)
+        response.headers["ETag"] = etag
+        response.headers["Content-Length"] = str(size)
+        return response
+
+    def store(self, key: Optional[str], response: StreamingResponse) -> StreamingResponse:
+        """Ajoute l'ETag et garde une copie du corps, publiée quand l'envoi est complet."""
+        if key is None:
+            return response
+        response.headers["ETag"] = f'"{key}"'
+        response.body_iterator = self._tee(key, response.body_iterator)
+        return response
+
+    def _temporary(self) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f".tmp-{uuid.uuid4().hex}")
+
+    def store_file(self, key: Optional[str], path: str):
+        """Garde un résultat déjà écrit (mode streaming) : lien physique, copie à défaut."""
+        if key is None:
+            return
+        tmp = self._temporary()
+        try:
+            try:
+                os.link(path, tmp)
+            except OSError:  # autre système de fichiers
+                shutil.copyfile(path, tmp)
+            self._publish(tmp, key)
+        except OSError:  # disque plein… : le résultat est envoyé sans être gardé
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    async def _tee(self, key: str, chunks):
+        try:
+            tmp = self._temporary()
+            sink = open(tmp, "wb")
+        except OSError:
+            sink = None
+        complete = False
+        try:
+            async for chunk in chunks:
+                if sink is not None:
+                    try:
+                        await run_sync(sink.write, chunk)
+                    except OSError:
+                        sink.close()
+                        os.remove(tmp)
+                        sink = None
+                yield chunk
+            complete = True
+        finally:
+            if sink is not None:
+                sink.close()
+                if complete:
+                    self._publish(tmp, key)
+                else:  # client parti ou erreur d'export : rien n'est gardé
+                    os.remove(tmp)
+
+    def _publish(self, tmp: str, key: str):
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        """Supprime les résultats les moins récemment servis au-delà de max_bytes."""
+        with self._lock:
+            entries, stale = [], time.time() - STALE_SECONDS
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat()
+                        if entry.name.startswith(".tmp-"):
+                            # copies en cours : comptées seulement une fois publiées
+                            if stat.st_mtime < stale:
+                                os.remove(entry.path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+result_cache = ResultCache()
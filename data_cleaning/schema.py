@@ -0,0 +1,200 @@
+"""
+Schéma d'un fichier sans l'analyser en entier (/get-numeric-columns).
+
+On ne lit que le début : l'en-tête et un échantillon borné de lignes (CSV,
+Excel), le pied du fichier Parquet (schéma, nombre de lignes, nombre de
+valeurs manquantes par colonne) ou les premiers enregistrements d'une liste
+JSON. Les types sont déduits par les mêmes moteurs de lecture que load_file
+(readers.py, même ordre et même repli), sur l'échantillon : une colonne numérique au début mais textuelle plus loin
+passe pour numérique.
+
+Par colonne : nom, type pandas, nature (numeric / boolean / datetime /
+text), part de valeurs manquantes et nombre estimé de valeurs distinctes
+(estimateur Chao1 : d + f1(f1 - 1) / 2(f2 + 1), où d est le nombre de
+valeurs distinctes de l'échantillon et f_j celui des valeurs vues j fois,
+borné par le nombre de lignes restantes). Le nombre de lignes est exact
+si le fichier tient dans l'échantillon (et pour Parquet), extrapolé sinon.
+"""
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .metrics import stage
+from .readers import json_dtypes, read_with_fallback
+from .uploads import check_upload_size, raw_file
+from .utils import load_file, tidy_frame
+
+SAMPLE_ROWS = int(os.environ.get("SCHEMA_SAMPLE_ROWS", "10000"))
+SAMPLE_BYTES = int(float(os.environ.get("SCHEMA_SAMPLE_MB", "1")) * 1024 * 1024)
+
+
+def column_kind(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    return "text"
+
+
+def estimate_distinct(values: pd.Series, total: int) -> int:
+    """Valeurs distinctes (hors manquantes) d'une colonne de `total` lignes, vue sur un échantillon."""
+    present = values.dropna()
+    try:
+        counts = present.value_counts(sort=False).to_numpy()
+    except TypeError:  # listes ou objets JSON imbriqués : comparés par leur texte
+        counts = present.astype(str).value_counts(sort=False).to_numpy()
+    if not len(counts) or total <= len(values):
+        return int(len(counts))
+    f1 = int((counts == 1).sum())
+    f2 = int((counts == 2).sum())
+    estimate = len(counts) + f1 * (f1 - 1) / (2 * (f2 + 1))
+    # au plus une valeur nouvelle par ligne non manquante hors échantillon
+    upper = len(counts) + (total - len(values)) * len(present) / len(values)
+    return int(round(min(estimate, upper)))
+
+
+def describe(sample: pd.DataFrame, total: int, null_counts: dict = None) -> list:
+    """Schéma des colonnes ; `null_counts` exacts (Parquet) à la place de l'échantillon."""
+    columns = []
+    for col in sample.columns:
+        values = sample[col]
+        if null_counts is not None and col in null_counts and total:
+            null_rate = null_counts[col] / total
+        else:
+            null_rate = float(values.isna().mean()) if len(values) else 0.0
+        columns.append({
+            "name": col,
+            "dtype": str(values.dtype),
+            "kind": column_kind(values.dtype),
+            "null_rate": round(null_rate, 4),
+            "distinct": estimate_distinct(values, total),
+        })
+    return columns
+
+
+def _sample_csv(source, size: int):
+    """(échantillon, lignes estimées, exact) d'après le premier bloc du fichier."""
+    chunk = source.read(SAMPLE_BYTES)
+    complete = len(chunk) == size
+    if not complete:
+        # dernière ligne probablement coupée
+        chunk = chunk[:chunk.rfind(b"\n") + 1]
+    df = read_with_fallback(io.BytesIO(chunk), "csv", nrows=SAMPLE_ROWS)
+    if complete and len(df) < SAMPLE_ROWS:
+        return df, len(df), True
+    lines = max(chunk.count(b"\n") - 1, len(df))
+    return df, int(round(lines * size / max(len(chunk), 1))), False
+
+
+def _sample_excel(source):
+    df = read_with_fallback(source, "excel", nrows=SAMPLE_ROWS)
+    # au-delà de l'échantillon, le nombre de lignes est inconnu sans tout lire
+    exact = len(df) < SAMPLE_ROWS
+    return df, len(df), exact
+
+
+def _sample_parquet(source):
+    """Pied de fichier : schéma, nombre de lignes et valeurs manquantes exacts ; premier lot en échantillon."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(source)
+    metadata = parquet.metadata
+    batch = next(parquet.iter_batches(batch_size=SAMPLE_ROWS), None)
+    # schéma complet (métadonnées pandas comprises) : mêmes types que read_parquet
+    schema = parquet.schema_arrow
+    df = pa.Table.from_batches([] if batch is None else [batch], schema=schema).to_pandas()
+
+    null_counts = {}
+    for i, name in enumerate(schema.names):
+        total = 0
+        for rg in range(metadata.num_row_groups):
+            stats = metadata.row_group(rg).column(i).statistics
+            if stats is None or not stats.has_null_count:
+                total = None
+                break
+            total += stats.null_count
+        if total is not None:
+            null_counts[name] = total
+    return df, metadata.num_rows, True, null_counts
+
+
+def _first_records(source, size: int):
+    """Premiers enregistrements d'une liste JSON ([{...}, ...]) ; None pour les autres formes."""
+    chunk = source.read(SAMPLE_BYTES)
+    text = chunk.decode("utf-8", errors="ignore")
+    decoder = json.JSONDecoder()
+    pos = len(text) - len(text.lstrip())
+    if not text[pos:pos + 1] == "[":
+        return None
+    pos += 1
+    records, complete = [], False
+    while len(records) < SAMPLE_ROWS:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if text[pos:pos + 1] == "]":
+            complete = True
+            break
+        try:
+            record, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            break  # enregistrement coupé en fin de bloc
+        records.append(record)
+    if not records and not complete:
+        return None
+    df = json_dtypes(pd.DataFrame(records))
+    if complete:
+        return df, len(df), True
+    used = len(text[:pos].encode("utf-8"))
+    return df, int(round(len(df) * size / max(used, 1))), False
+
+
+def sniff_upload(file) -> dict:
+    """
+    Schéma d'un fichier envoyé, d'après son début. Lève ValueError comme
+    load_file ; les formes JSON autres qu'une liste sont analysées en entier.
+    """
+    source = raw_file(file.file)
+    filename = file.filename.lower()
+    df, null_counts = None, None
+    with stage("sniff") as record:
+        try:
+            size = check_upload_size(source)
+            if filename.endswith(".csv"):
+                df, rows, exact = _sample_csv(source, size)
+            elif filename.endswith((".xls", ".xlsx")):
+                df, rows, exact = _sample_excel(source)
+            elif filename.endswith(".parquet"):
+                df, rows, exact, null_counts = _sample_parquet(source)
+            elif filename.endswith(".json"):
+                sampled = _first_records(source, size)
+                if sampled is not None:
+                    df, rows, exact = sampled
+            else:
+                raise ValueError(f"Format de fichier non pris en charge : {filename}")
+
+            if df is not None:
+                if df.empty:
+                    raise ValueError("Le fichier est vide ou illisible.")
+                df = tidy_frame(df)
+        except Exception as e:
+            file.file.close()
+            raise ValueError(f"Erreur de lecture du fichier : {e}")
+        if df is None:
+            # {"data": [...]}, colonnes… : lecture complète
+            source.seek(0)
+            return schema_of(load_file(file)[0])
+        file.file.close()
+        record.rows_out = len(df)
+    return {"rows": rows, "rows_exact": exact, "sampled_rows": len(df),
+            "columns": describe(df, rows, null_counts)}
+
+
+def schema_of(df: pd.DataFrame) -> dict:
+    """Schéma exact d'un DataFrame déjà chargé (dataset_id)."""
+    return {"rows": len(df), "rows_exact": True, "sampled_rows": len(df), "columns": describe(df, len(df))}
@@ -0,0 +1,155 @@
+"""
+Esquisses de quantiles fusionnables (KLL).
+
+Une esquisse résume une colonne en quelques milliers de valeurs pondérées,
+quelle que soit sa longueur : on l'alimente morceau par morceau, on fusionne
+celles de plusieurs morceaux ou de plusieurs workers, puis on l'interroge.
+L'erreur porte sur le rang : pour une erreur relative `error`, le quantile
+renvoyé pour q a un rang compris entre (q - error)·n et (q + error)·n avec
+une forte probabilité. Le minimum et le maximum restent exacts.
+
+Référence : Karnin, Lang, Liberty, « Optimal Quantile Approximation in
+Streams » (2016).
+"""
+import math
+
+import numpy as np
+
+# erreur de rang normalisée ≈ 1.65 / k (intervalle à 99 %, d'après la référence)
+_ERROR_CONSTANT = 1.65
+_MIN_K = 8
+
+
+def k_for_error(error: float) -> int:
+    """Taille de compacteur donnant l'erreur de rang `error` (0 < error < 0.5)."""
+    return max(_MIN_K, math.ceil(_ERROR_CONSTANT / error))
+
+
+class KLLSketch:
+    """
+    Esquisse KLL vectorisée : les valeurs d'un lot sont ajoutées d'un coup au
+    niveau 0, puis tout niveau qui dépasse sa capacité est trié et une valeur
+    sur deux (parité tirée au hasard) monte au niveau suivant, de poids double.
+    Le générateur est initialisé par `seed` : le résultat est reproductible.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def for_error(cls, error: float, seed: int = 0) -> "KLLSketch":
+        return cls(k_for_error(error), seed)
+
+    def __len__(self):
+        """Nombre de valeurs conservées (et non de valeurs vues, voir `n`)."""
+        return sum(len(level) for level in self.levels)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        changed = True
+        while changed:
+            changed = False
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) <= self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                buf = np.sort(self.levels[h])
+                # un élément reste au niveau courant si la taille est impaire
+                odd = len(buf) % 2
+                promoted = buf[odd:][self._rng.integers(2)::2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = buf[:odd]
+                changed = True
+
+    def update(self, values) -> "KLLSketch":
+        """Ajoute un lot de valeurs (les NaN sont ignorés)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def update_constant(self, value: float, count: int) -> "KLLSketch":
+        """Ajoute `count` fois la même valeur sans les matérialiser (décomposition binaire)."""
+        if count <= 0 or np.isnan(value):
+            return self
+        self.n += count
+        self.min = min(self.min, float(value))
+        self.max = max(self.max, float(value))
+        h = 0
+        while count:
+            if count & 1:
+                while len(self.levels) <= h:
+                    self.levels.append(np.empty(0))
+                self.levels[h] = np.append(self.levels[h], value)
+            count >>= 1
+            h += 1
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fusionne `other` dans cette esquisse (morceaux ou workers différents)."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs) -> list:
+        """
+        Quantiles estimés, interpolés linéairement comme pandas (rang q·(n-1)).
+        Sans aucune compaction (moins de k valeurs), le résultat est exact.
+        """
+        if not self.n:
+            return [np.nan for _ in qs]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, weights = items[order], weights[order]
+        # rang central de chaque valeur pondérée, bornes exactes aux extrémités
+        positions = np.cumsum(weights) - weights + (weights - 1) / 2
+        positions = np.concatenate([[0.0], positions, [self.n - 1.0]])
+        items = np.concatenate([[self.min], items, [self.max]])
+        return [float(np.interp(q * (self.n - 1), positions, items)) for q in qs]
+
+
+class ColumnSketches:
+    """Une esquisse par colonne, alimentée en une passe sur des morceaux de DataFrame."""
+
+    def __init__(self, columns, error: float, seed: int = 0):
+        self.sketches = {col: KLLSketch.for_error(error, seed) for col in columns}
+
+    def update(self, chunk) -> "ColumnSketches":
+        """`chunk` : DataFrame ou dict {colonne: ndarray}."""
+        for col, sketch in self.sketches.items():
+            sketch.update(chunk[col])
+        return self
+
+    def merge(self, other: "ColumnSketches") -> "ColumnSketches":
+        for col, sketch in other.sketches.items():
+            if col in self.sketches:
+                self.sketches[col].merge(sketch)
+            else:
+                self.sketches[col] = sketch
+        return self
+
+    def quantiles(self, qs) -> dict:
+        """{colonne: {q: valeur}}"""
+        return {col: dict(zip(qs, sketch.quantiles(qs))) for col, sketch in self.sketches.items()}
@@ -0,0 +1,316 @@
+"""
+Pipeline complet en flux pour les gros fichiers CSV.
+
+Le CSV est lu par morceaux : dédoublonnage au fil de l'eau (index des
+empreintes normalisées conservé d'un morceau à l'autre), lignes d'origine
+retenues déversées sur disque, puis statistiques exactes (médianes,
+quartiles) calculées en relisant uniquement les colonnes numériques.
+Une dernière passe applique valeurs manquantes et outliers et écrit le
+CSV de sortie morceau par morceau : la mémoire ne dépend que de la taille
+d'un morceau.
+"""
+import json
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+from .dedup_index import DedupIndex, first_occurrences
+from .export import ChunkWriter
+from .bounds import (
+    MAD_SCALE, check_detector, check_quantile_method, parse_column_bounds, treat_outliers,
+)
+from .quantiles import exact_quantiles
+from .sketches import ColumnSketches
+from .utils import tidy_frame
+
+CHUNK_ROWS = 100_000
+
+MISSING_METHODS = ("median", "mean", "constant", "null")
+OUTLIER_METHODS = ("delete", "mean", "median")
+
+
+def _no_progress(stage, fraction):
+    pass
+
+
+class Spill:
+    """Suite d'objets sérialisés sur disque, relisible autant de fois que nécessaire."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "wb")
+
+    def append(self, obj):
+        pickle.dump(obj, self._fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def close(self):
+        self._fh.close()
+
+    def __iter__(self):
+        with open(self.path, "rb") as fh:
+            while True:
+                try:
+                    yield pickle.load(fh)
+                except EOFError:
+                    return
+
+
+def check_params(missing_method, missing_value, outlier_method, columns,
+                 use_custom_bounds, lower_bound, upper_bound):
+    """Valide les paramètres avant toute lecture ; lève ValueError comme les routes."""
+    constant_val = None
+    if missing_method not in MISSING_METHODS:
+        raise ValueError("Méthode de valeurs manquantes invalide.")
+    if missing_method == "constant":
+        if missing_value is None or missing_value == "":
+            raise ValueError("Valeur constante manquante.")
+        try:
+            constant_val = float(missing_value)
+        except ValueError:
+            raise ValueError("Valeur constante invalide.")
+
+    selected_cols = None
+    if columns and columns != "null":
+        try:
+            selected_cols = json.loads(columns)
+        except Exception:
+            raise ValueError("Format des colonnes invalide.")
+
+    bounds = None
+    if use_custom_bounds:
+        if lower_bound is None or lower_bound == "" or upper_bound is None or upper_bound == "":
+            raise ValueError("Bornes personnalisées manquantes.")
+        try:
+            bounds = (float(lower_bound), float(upper_bound))
+        except ValueError:
+            raise ValueError("Bornes personnalisées invalides.")
+
+    if outlier_method not in OUTLIER_METHODS:
+        raise ValueError("Méthode d'outliers invalide.")
+    return constant_val, selected_cols, bounds
+
+
+def csv_dtypes(source, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """
+    Passe de schéma : types à imposer pour que chaque morceau ait les types
+    qu'aurait donnés une lecture complète (numérique si numérique partout).
+    """
+    kinds = {}
+    for chunk in pd.read_csv(source, chunksize=chunk_rows):
+        for col, dtype in chunk.dtypes.items():
+            kinds.setdefault(col, set()).add(dtype)
+    source.seek(0)
+
+    dtypes = {}
+    for col, found in kinds.items():
+        if len(found) == 1:
+            continue
+        numeric = all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in found)
+        dtypes[col] = np.float64 if numeric else object
+    return dtypes
+
+
+def clean_csv_stream(source, output_path: str, missing_method: str = "median",
+                     missing_value=None, outlier_method: str = "delete", columns=None,
+                     use_custom_bounds: bool = False, lower_bound=None, upper_bound=None,
+                     iqr_factor: float = 1.5, column_bounds=None, detector: str = "iqr",
+                     threshold=None, quantile_method: str = "exact",
+                     quantile_error=None, chunk_rows: int = CHUNK_ROWS,
+                     output_format: str = "csv", compression=None,
+                     progress=_no_progress) -> dict:
+    """
+    Même traitement que /clean-all-and-download, en mémoire bornée.
+    `source` est un fichier CSV binaire repositionnable ; le résultat est écrit
+    dans `output_path` (CSV, NDJSON, Parquet ou Feather, voir export.py).
+    Retourne un petit rapport ; `progress(étape, fraction)` suit les mêmes
+    étapes que full_cleaning.STAGES.
+    """
+    constant_val, selected_cols, bounds = check_params(
+        missing_method, missing_value, outlier_method, columns,
+        use_custom_bounds, lower_bound, upper_bound,
+    )
+    quantile_method, quantile_error = check_quantile_method(quantile_method, quantile_error)
+    detector, threshold = check_detector(detector, threshold)
+    per_column = parse_column_bounds(column_bounds)
+    dtypes = csv_dtypes(source, chunk_rows)
+    size = max(source.seek(0, os.SEEK_END), 1)
+    source.seek(0)
+    report = {"lignes_lues": 0, "doublons_supprimes": 0,
+              "valeurs_manquantes_remplacees": {}, "valeurs_aberrantes_traitees": {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = Spill(os.path.join(tmp, "rows.pkl"))
+        numeric = Spill(os.path.join(tmp, "numeric.pkl"))
+
+        # === 1️⃣ NORMALISATION + DÉDOUBLONNAGE (passe d'ingestion) ===
+        index = DedupIndex()
+        numeric_cols = text_cols = None
+        counts, nulls, sums = {}, {}, {}
+        spilled = 0
+        for chunk in pd.read_csv(source, chunksize=chunk_rows, dtype=dtypes):
+            report["lignes_lues"] += len(chunk)
+            chunk = tidy_frame(chunk)
+            keep = first_occurrences(chunk, index, chunk_rows)
+            chunk = chunk[keep]
+            report["doublons_supprimes"] += int((~keep).sum())
+
+            if numeric_cols is None:
+                numeric_cols = chunk.select_dtypes(include=[np.number]).columns.tolist()
+                text_cols = chunk.select_dtypes(include=["object", "string"]).columns.tolist()
+                counts = dict.fromkeys(numeric_cols, 0)
+                nulls, sums = dict(counts), dict.fromkeys(numeric_cols, 0.0)
+
+            block = {c: chunk[c].to_numpy(dtype=np.float64) for c in numeric_cols}
+            for c, values in block.items():
+                present = ~np.isnan(values)
+                counts[c] += int(present.sum())
+                nulls[c] += int((~present).sum())
+                sums[c] += float(values[present].sum())
+            rows.append(chunk)
+            numeric.append(block)
+            spilled += 1
+            # position approximative (lecture bufferisée), suffisante pour un suivi
+            done = min(source.tell() / size, 1.0)
+            progress("normalize", done)
+            progress("dedup", done)
+        rows.close()
+        numeric.close()
+
+        if numeric_cols is None:
+            raise ValueError("Le fichier est vide ou illisible.")
+
+        def scan(fill=None, within=None):
+            """Relit les colonnes numériques, NaN remplacés par `fill`, filtrées par `within`."""
+            for block in numeric:
+                out = {}
+                for c, values in block.items():
+                    if fill is not None and not np.isnan(fill.get(c, np.nan)):
+                        values = np.where(np.isnan(values), fill[c], values)
+                    values = values[~np.isnan(values)]
+                    if within is not None and c in within:
+                        lo, hi = within[c]
+                        values = values[(values >= lo) & (values <= hi)]
+                    out[c] = values
+                yield out
+
+        # === 2️⃣ VALEURS MANQUANTES : valeur de remplacement par colonne ===
+        fill = {}
+        if missing_method == "median":
+            medians = exact_quantiles(lambda: scan(), counts, {c: [0.5] for c in numeric_cols})
+            fill = {c: medians[c][0.5] for c in numeric_cols}
+        elif missing_method == "mean":
+            fill = {c: sums[c] / counts[c] if counts[c] else np.nan for c in numeric_cols}
+        elif missing_method == "constant":
+            fill = dict.fromkeys(numeric_cols, constant_val)
+        report["valeurs_manquantes_remplacees"] = {
+            c: nulls[c] for c in numeric_cols
+            if nulls[c] and (missing_method == "null" or not np.isnan(fill[c]))
+        }
+        progress("missing", 1.0)
+
+        # === 3️⃣ OUTLIERS : bornes puis valeurs de remplacement ===
+        if missing_method == "null":
+            # fillna("NULL") rend ces colonnes textuelles : elles ne sont plus numériques
+            numeric_available = [c for c in numeric_cols if nulls[c] == 0]
+        else:
+            numeric_available = numeric_cols
+        cols_to_check = [c for c in (selected_cols or numeric_cols) if c in numeric_available]
+
+        filled_counts = {c: counts[c] + (nulls[c] if not np.isnan(fill.get(c, np.nan)) else 0)
+                         for c in numeric_cols}
+        def quantiles(scan_values, cols, qs):
+            """{colonne: {q: valeur}} exacts (plusieurs passes) ou par esquisses (une passe)."""
+            if quantile_method == "sketch":
+                sketches = ColumnSketches(cols, quantile_error)
+                for block in scan_values():
+                    sketches.update(block)
+                return sketches.quantiles(qs)
+            return exact_quantiles(scan_values, {c: filled_counts[c] for c in cols},
+                                   {c: qs for c in cols})
+
+        limits = {}
+        detected = [c for c in cols_to_check if c not in per_column]
+        if bounds is not None:
+            limits = dict.fromkeys(detected, bounds)
+        elif detected and detector == "iqr":
+            quartiles = quantiles(lambda: scan(fill), detected, [0.25, 0.75])
+            for c in detected:
+                q1, q3 = quartiles[c][0.25], quartiles[c][0.75]
+                iqr = q3 - q1
+                limits[c] = (q1 - iqr_factor * iqr, q3 + iqr_factor * iqr)
+        elif detected and detector == "mad":
+            medians = {c: qs[0.5] for c, qs in quantiles(lambda: scan(fill), detected, [0.5]).items()}
+            deviations = quantiles(
+                lambda: ({c: np.abs(block[c] - medians[c]) for c in detected} for block in scan(fill)),
+                detected, [0.5],
+            )
+            for c in detected:
+                half = threshold * deviations[c][0.5] / MAD_SCALE
+                limits[c] = (medians[c] - half, medians[c] + half)
+        elif detected:
+            # z-score : moyenne puis écart-type (ddof=1) en deux relectures
+            totals = dict.fromkeys(detected, 0.0)
+            for block in scan(fill):
+                for c in detected:
+                    totals[c] += float(block[c].sum())
+            means = {c: totals[c] / filled_counts[c] if filled_counts[c] else np.nan for c in detected}
+            squares = dict.fromkeys(detected, 0.0)
+            for block in scan(fill):
+                for c in detected:
+                    squares[c] += float(((block[c] - means[c]) ** 2).sum())
+            for c in detected:
+                std = np.sqrt(squares[c] / (filled_counts[c] - 1)) if filled_counts[c] > 1 else np.nan
+                limits[c] = (means[c] - threshold * std, means[c] + threshold * std)
+        limits.update({c: per_column[c] for c in cols_to_check if c in per_column})
+        limits = {c: lim for c, lim in limits.items() if not np.isnan(lim).any()}
+
+        replacement = {}
+        if limits and outlier_method in ("mean", "median"):
+            inside_counts = dict.fromkeys(limits, 0)
+            inside_sums = dict.fromkeys(limits, 0.0)
+            for block in scan(fill, within=limits):
+                for c in limits:
+                    inside_counts[c] += len(block[c])
+                    inside_sums[c] += float(block[c].sum())
+            if outlier_method == "mean":
+                replacement = {c: inside_sums[c] / inside_counts[c] for c in limits if inside_counts[c]}
+            else:
+                medians = exact_quantiles(lambda: scan(fill, within=limits), inside_counts,
+                                          {c: [0.5] for c in limits})
+                replacement = {c: medians[c][0.5] for c in limits if inside_counts[c]}
+
+        progress("outliers", 1.0)
+
+        # === 4️⃣ APPLICATION ET ÉCRITURE MORCEAU PAR MORCEAU ===
+        treated = dict.fromkeys(limits, 0)
+        lower = np.array([lo for lo, _ in limits.values()], dtype=np.float64)
+        upper = np.array([hi for _, hi in limits.values()], dtype=np.float64)
+        # colonnes devenues textuelles avec fillna("NULL") : même type dans tous les morceaux
+        nullable = [c for c in numeric_cols if nulls[c]] if missing_method == "null" else []
+        writer = ChunkWriter(output_path, output_format, compression)
+        try:
+            for written, chunk in enumerate(rows, 1):
+                if missing_method == "null":
+                    chunk = chunk.fillna("NULL")
+                    chunk[nullable] = chunk[nullable].astype(str)
+                elif numeric_cols:
+                    chunk[numeric_cols] = chunk[numeric_cols].fillna(pd.Series(fill))
+                chunk[text_cols] = chunk[text_cols].fillna("NULL")
+
+                if limits:
+                    chunk, found = treat_outliers(
+                        chunk, limits, lower, upper, outlier_method,
+                        [replacement.get(c, np.nan) for c in limits],
+                    )
+                    for c, n in found.items():
+                        treated[c] += n
+
+                writer.write(chunk)
+                progress("export", written / spilled)
+        finally:
+            writer.close()
+
+    report["valeurs_aberrantes_traitees"] = {c: n for c, n in treated.items() if n}
+    return report
@@ -0,0 +1,100 @@
+"""
+Fichiers envoyés : taille maximale et lecture sans recopie.
+
+Starlette garde un envoi en mémoire jusqu'à 1 Mo puis le déverse dans un
+fichier temporaire. Les lecteurs lisent directement ce fichier (ou son
+tampon en mémoire) au lieu d'une copie `bytes` + BytesIO ; ceux qui veulent
+le contenu d'un bloc (CSV pyarrow, JSON) le reçoivent via `mapped` : mmap du
+fichier sur disque, ou copie du petit tampon en mémoire. load_file ferme
+l'envoi dès qu'il est analysé.
+
+MAX_UPLOAD_MB (0 : pas de limite) borne la taille d'un envoi : refus 413
+dès l'en-tête Content-Length (avant que le corps ne soit reçu), et
+vérification de la taille réelle à la lecture pour les envois sans
+Content-Length.
+"""
+import contextlib
+import io
+import mmap
+import os
+import tempfile
+
+from fastapi.responses import JSONResponse
+
+MAX_UPLOAD_MB = float(os.environ.get("MAX_UPLOAD_MB", "1024"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+
+
+def too_large_message(size: int) -> str:
+    return f"Fichier trop volumineux ({size / 1024 / 1024:.1f} Mo, maximum {MAX_UPLOAD_MB:g} Mo)."
+
+
+def raw_file(fileobj):
+    """
+    Fichier sous-jacent d'un SpooledTemporaryFile (BytesIO ou fichier sur
+    disque) : son fileno() forcerait sinon le passage sur disque.
+    """
+    if isinstance(fileobj, tempfile.SpooledTemporaryFile):
+        return fileobj._file
+    return fileobj
+
+
+def upload_size(fileobj) -> int:
+    """Taille en octets ; la position est remise au début."""
+    fileobj.seek(0, io.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+def check_upload_size(fileobj) -> int:
+    """Taille de l'envoi ; ValueError au-delà de MAX_UPLOAD_MB."""
+    size = upload_size(fileobj)
+    if MAX_UPLOAD_BYTES and size > MAX_UPLOAD_BYTES:
+        raise ValueError(too_large_message(size))
+    return size
+
+
+@contextlib.contextmanager
+def mapped(source):
+    """
+    Contenu de `source` d'un seul bloc : mmap d'un fichier sur disque (sans
+    copie), sinon lecture complète. La vue n'est valable que dans le bloc
+    `with`.
+    """
+    if isinstance(source, io.BytesIO):
+        # envoi en mémoire (≤ 1 Mo) : copie, car une vue exportée vers pyarrow
+        # peut survivre à la lecture et empêcherait de fermer le fichier
+        yield source.getvalue()
+        return
+    try:
+        fd = source.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fd = None
+    if fd is None or upload_size(source) == 0:  # mmap refuse les fichiers vides
+        yield source.read()
+        return
+    mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    try:
+        with memoryview(mm) as view:
+            yield view
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            pass  # encore référencé : libéré avec le dernier objet qui le tient
+
+
+class UploadLimitMiddleware:
+    """Middleware ASGI : refuse (413) les requêtes dont Content-Length dépasse MAX_UPLOAD_MB."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and MAX_UPLOAD_BYTES:
+            for name, value in scope.get("headers", []):
+                if name == b"content-length" and value.isdigit() and int(value) > MAX_UPLOAD_BYTES:
+                    response = JSONResponse({"error": too_large_message(int(value))}, status_code=413)
+                    return await response(scope, receive, send)
+        await self.app(scope, receive, send)
@@ -1,49 +1,62 @@
 import pandas as pd
-import io
-import json
-from pandas import json_normalize
 
-def load_file(file):
+from .compact import COMPACT_DTYPES, compact_frame
+from .metrics import stage
+from .readers import read_with_fallback
+from .uploads import check_upload_size, raw_file
+
+def tidy_frame(df):
+    """
+    Nettoyage de base commun à tous les chargements (fichier entier ou morceau) :
+    suppression des colonnes vides et ajout d'un identifiant si absent.
+    """
+    df = df.loc[:, ~df.columns.str.contains("^Unnamed")]
+
+    # --- Vérifie la présence d'un identifiant ---
+    # (l'index d'un morceau lu par read_csv(chunksize=...) continue celui du précédent)
+    if "id" not in df.columns:
+        df = df.reset_index().rename(columns={"index": "id"})
+    return df
+
+
+def load_file(file, compact: bool = None):
     """
     Charge un fichier (CSV, Excel, Parquet ou JSON) dans un DataFrame pandas.
     Préserve les colonnes existantes (ex: 'id') et détecte automatiquement le type.
+    `compact` (par défaut COMPACT_DTYPES) : types compacts, voir compact.py.
     """
-    content = file.file.read()
+    with stage("load") as record:
+        df, file_type = _read_file(file)
+        if COMPACT_DTYPES if compact is None else compact:
+            df = compact_frame(df)
+        record.rows_out = len(df)
+    return df, file_type
+
+
+def _read_file(file):
+    # lu sur place (mémoire ou fichier temporaire de Starlette), sans copie
+    source = raw_file(file.file)
     filename = file.filename.lower()
     df = None
 
     try:
+        check_upload_size(source)
+
         # --- CSV ---
         if filename.endswith(".csv"):
-            df = pd.read_csv(io.BytesIO(content))
+            df = read_with_fallback(source, "csv")
 
         # --- Excel (.xls, .xlsx) ---
         elif filename.endswith((".xls", ".xlsx")):
-            df = pd.read_excel(io.BytesIO(content))
+            df = read_with_fallback(source, "excel")
 
         # --- Parquet ---
         elif filename.endswith(".parquet"):
-            df = pd.read_parquet(io.BytesIO(content))
+            df = pd.read_parquet(source)
 
-        # --- JSON ---
+        # --- JSON (liste d'enregistrements, {"data": [...]} ou colonnes) ---
         elif filename.endswith(".json"):
-            try:
-                # 🔹 JSON déjà bien structuré
-                df = pd.read_json(io.BytesIO(content))
-            except ValueError:
-                # 🔹 JSON imbriqué ou complexe
-                data = json.load(io.BytesIO(content))
-                if isinstance(data, dict):
-                    # Cas: {"data": [ {...}, {...} ]}
-                    for key, val in data.items():
-                        if isinstance(val, list):
-                            df = json_normalize(val)
-                            break
-                elif isinstance(data, list):
-                    # Cas: [ {...}, {...} ]
-                    df = json_normalize(data)
-                else:
-                    raise ValueError("Format JSON non supporté.")
+            df = read_with_fallback(source, "json")
 
         else:
             raise ValueError(f"Format de fichier non pris en charge : {filename}")
@@ -52,18 +65,13 @@ def load_file(file):
         if df is None or df.empty:
             raise ValueError("Le fichier est vide ou illisible.")
 
-        # --- Nettoyage de base : suppression des colonnes vides ---
-        df = df.loc[:, ~df.columns.str.contains("^Unnamed")]
-
-        # --- Vérifie la présence d'un identifiant ---
-        if "id" not in df.columns:
-            df.reset_index(inplace=True)
-            df.rename(columns={"index": "id"}, inplace=True)
-
-        return df, filename.split(".")[-1]
+        return tidy_frame(df), filename.split(".")[-1]
 
     except Exception as e:
         raise ValueError(f"Erreur de lecture du fichier : {e}")
+    finally:
+        # contenu brut analysé : libéré sans attendre la fin de la requête
+        file.file.close()
 
 
 # import pandas as pd
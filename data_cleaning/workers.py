@@ -0,0 +1,162 @@
+"""
+Exécution des traitements pandas hors de la boucle d'événements.
+
+Les routes restent des fonctions synchrones ; le décorateur `offload` les
+exécute dans un pool borné : au plus `workers` traitements en parallèle,
+`max_queue` en attente, au-delà la requête est refusée (503) au lieu de
+s'accumuler. Chaque requête a un délai maximal (504). La boucle reste ainsi
+libre pour les autres requêtes, y compris la route de santé `/`.
+"""
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from fastapi.responses import JSONResponse
+
+from .metrics import run_profiled
+
+WORKERS = int(os.environ.get("WORKER_THREADS", str(min(4, os.cpu_count() or 1))))
+MAX_QUEUE = int(os.environ.get("WORKER_QUEUE", "16"))
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT_SECONDS", "300"))
+
+
+_pool_process = False
+
+
+def _mark_pool_process():
+    global _pool_process
+    _pool_process = True
+
+
+def in_pool_process() -> bool:
+    """Vrai dans un processus de WorkerPool("process") : pas de second pool imbriqué."""
+    return _pool_process
+
+
+class PoolBusy(Exception):
+    """Plus de place dans le pool ni dans la file d'attente."""
+
+
+class WorkerPool:
+    """
+    Pool d'exécution borné (threads ou processus).
+
+    Les routes utilisent des threads : elles manipulent des UploadFile et des
+    DataFrames en cache qui ne traversent pas une frontière de processus sans
+    copie. Le mode "process" sert aux fonctions pures dont les arguments sont
+    sérialisables ; ses processus sont lancés par "spawn" (un fork du serveur
+    copierait des verrous tenus par ses threads).
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = WORKERS,
+                 max_queue: int = MAX_QUEUE, timeout: float = REQUEST_TIMEOUT):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Type de pool inconnu : {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="cleaning")
+            else:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_mark_pool_process)
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        """Traitements en cours ou en attente."""
+        return self._in_flight
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                raise PoolBusy()
+            self._in_flight += 1
+
+    def _release(self, _):
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit(self, func, *args, **kwargs):
+        """Version sans attente (tâches de fond) : renvoie un concurrent.futures.Future."""
+        self._acquire()
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func, *args, timeout: float = None, **kwargs):
+        """
+        Exécute `func` dans le pool. Lève PoolBusy si la file est pleine et
+        TimeoutError au-delà du délai ; dans ce cas le traitement se termine
+        en arrière-plan et continue d'occuper sa place jusqu'au bout.
+        """
+        self._acquire()
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        if self.kind == "thread":
+            # contexte de la requête (étapes pour Server-Timing, profilage) suivi dans le thread
+            call = functools.partial(contextvars.copy_context().run, run_profiled, call)
+        try:
+            future = loop.run_in_executor(self.executor, call)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+
+    def discard(self, executor):
+        """
+        Abandonne `executor` (pool de processus cassé) : le prochain envoi en
+        crée un neuf. Sans effet s'il a déjà été remplacé ; rien n'est annulé,
+        les tâches des autres requêtes finissent ou échouent d'elles-mêmes.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        """Arrêt du pool entier (fin de programme, benchmarks) : annule les tâches en attente."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+pool = WorkerPool()
+
+
+def offload(func=None, *, timeout: float = None):
+    """
+    Transforme une route synchrone en route asynchrone exécutée dans `pool`.
+    `@offload(timeout=...)` : délai propre à la route (REQUEST_TIMEOUT sinon).
+    """
+    if func is None:
+        return functools.partial(offload, timeout=timeout)
+
+    @functools.wraps(func)
+    async def endpoint(*args, **kwargs):
+        try:
+            return await pool.run(func, *args, timeout=timeout, **kwargs)
+        except PoolBusy:
+            return JSONResponse({"error": "Serveur occupé, réessayez dans quelques instants."}, status_code=503)
+        except asyncio.TimeoutError:
+            return JSONResponse({"error": "Délai de traitement dépassé."}, status_code=504)
+
+    return endpoint
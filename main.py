@@ -5,9 +5,18 @@ from data_cleaning.deduplication import router as dedup_router
 from data_cleaning.missing_values import router as missing_router
 from data_cleaning.outliers import router as outlier_router
 from data_cleaning.full_cleaning import router as full_cleaning_router
+from data_cleaning.pipeline import router as pipeline_router
+from data_cleaning.batch import router as batch_router
+from data_cleaning.datasets import router as datasets_router
+from data_cleaning.jobs import router as jobs_router
+from data_cleaning.metrics import MetricsMiddleware, router as metrics_router
+from data_cleaning.uploads import UploadLimitMiddleware
 
 app = FastAPI(title="Data Cleaning API")
 
+# --- Taille maximale des envois : 413 avant lecture du corps (sous CORS, qui ajoute ses en-têtes) ---
+app.add_middleware(UploadLimitMiddleware)
+
 # --- Configuration CORS ---
 app.add_middleware(
     CORSMiddleware,
@@ -17,11 +26,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Latence par route, en-tête Server-Timing, profilage à la demande ---
+app.add_middleware(MetricsMiddleware)
+
 # --- Enregistrement des routes ---
 app.include_router(dedup_router)
 app.include_router(missing_router)
 app.include_router(outlier_router)
 app.include_router(full_cleaning_router)
+app.include_router(pipeline_router)
+app.include_router(batch_router)
+app.include_router(datasets_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 def root():
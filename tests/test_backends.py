@@ -0,0 +1,71 @@
+"""Conformité des moteurs d'exécution : chaque plan donne le même résultat qu'avec pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaning.backends import Backend, PandasBackend
+from data_cleaning.conformance import PLANS, assert_same_frame, variants
+from data_cleaning.pipeline import compile_steps, execute
+
+
+def dirty_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Lignes de type CRM : doublons après normalisation, valeurs manquantes, outliers."""
+    rng = np.random.default_rng(seed)
+    names = np.array(["Alice Martin", "Bob Dubois", "Chloé Roux", "Élodie Faure", "Zoë Girard"], dtype=object)
+    cities = np.array(["Paris", "Lyon", "Saint-Étienne", "Nice"], dtype=object)
+    df = pd.DataFrame({
+        "id": np.arange(n_rows) + 1,
+        "nom": names[rng.integers(0, len(names), n_rows)],
+        "ville": cities[rng.integers(0, len(cities), n_rows)],
+        "age": rng.integers(18, 90, n_rows).astype(np.float64),
+        "revenu": np.round(rng.lognormal(10, 0.5, n_rows), 2),
+    })
+    outliers = rng.random(n_rows) < 0.01
+    df.loc[outliers, "age"] = 500.0
+    df.loc[outliers, "revenu"] *= 1000
+    copies = df.sample(n_rows // 10, random_state=seed)
+    copies["nom"] = copies["nom"].str.upper()
+    copies["ville"] = "  " + copies["ville"] + " "
+    df = pd.concat([df, copies], ignore_index=True)
+    for col in ("nom", "ville", "age", "revenu"):
+        df[col] = df[col].mask(rng.random(len(df)) < 0.05)
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+DATASETS = variants(dirty_frame(3000))
+
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class Partial(Backend):
+        name = "partiel"
+
+        def load(self, df):
+            return df
+
+    with pytest.raises(TypeError):
+        Partial()
+    PandasBackend()
+
+
+@pytest.mark.parametrize("plan", list(PLANS))
+@pytest.mark.parametrize("data", list(DATASETS))
+def test_polars_matches_pandas(data, plan):
+    pytest.importorskip("polars")
+    df = DATASETS[data]
+    passes = compile_steps(PLANS[plan])
+    assert_same_frame(execute(df, passes, engine="pandas"), execute(df, passes, engine="polars"))
+
+
+@pytest.mark.parametrize("missing", [np.nan, None])
+def test_polars_keeps_missing_value_kind(missing):
+    pytest.importorskip("polars")
+    df = pd.DataFrame({"nom": ["a", missing, "b", "a"], "age": [1.0, 2.0, np.nan, 1.0]})
+    passes = compile_steps([{"op": "dedup"}, {"op": "fill_missing", "columns": ["age"]}])
+    assert_same_frame(execute(df, passes, engine="pandas"), execute(df, passes, engine="polars"))
+
+
+@pytest.mark.filterwarnings("ignore:Mismatched null-like values:FutureWarning")
+def test_assert_same_frame_rejects_none_for_nan():
+    reference = pd.DataFrame({"nom": ["a", np.nan]})
+    with pytest.raises(AssertionError):
+        assert_same_frame(reference, pd.DataFrame({"nom": ["a", None]}))
@@ -0,0 +1,48 @@
+import io
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from data_cleaning import batch
+from data_cleaning.workers import WorkerPool
+from main import app
+
+CSV = pd.DataFrame({"nom": ["a", "a", "b"], "age": [1.0, None, 3.0]}).to_csv(index=False).encode()
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    # threads plutôt que processus : même clean_file, démarrage immédiat
+    monkeypatch.setattr(batch, "batch_pool", WorkerPool("thread", workers=2, max_queue=8))
+    monkeypatch.setattr(batch, "BATCH_DIR", str(tmp_path))
+    return TestClient(app)
+
+
+def damaged_zip(compression) -> bytes:
+    target = io.BytesIO()
+    with zipfile.ZipFile(target, "w", compression) as archive:
+        archive.writestr("bon.csv", CSV)
+        archive.writestr("abime.csv", CSV * 50)
+    content = bytearray(target.getvalue())
+    # octets au milieu des données du second membre : CRC ou flux compressé faux
+    info = zipfile.ZipFile(io.BytesIO(bytes(content))).getinfo("abime.csv")
+    start = info.header_offset + 30 + len(info.filename) + info.compress_size // 2
+    content[start:start + 8] = b"\xff" * 8
+    return bytes(content)
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_damaged_member_does_not_fail_the_batch(client, compression):
+    response = client.post("/batch", files=[("files", ("lot.zip", damaged_zip(compression)))],
+                           data={"output_format": "csv"})
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        summary = json.loads(archive.read("resume.json"))
+        assert "bon.csv" in archive.namelist()
+    results = {item["file"]: item for item in summary["results"]}
+    assert results["bon.csv"]["status"] == "ok"
+    assert results["abime.csv"]["status"] == "error"
+    assert "illisible" in results["abime.csv"]["error"]
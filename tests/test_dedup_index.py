@@ -0,0 +1,30 @@
+import numpy as np
+
+from data_cleaning.dedup_index import DedupIndex
+
+
+def test_membership_across_runs():
+    rng = np.random.default_rng(0)
+    index, seen = DedupIndex(), set()
+    # lots de tailles variées, avec des valeurs répétées dans un lot et d'un lot à l'autre
+    for size in [5, 1, 40, 3, 3, 200, 7, 1000, 2, 60]:
+        batch = rng.integers(0, 2000, size).astype(np.uint64)
+        expected = []
+        for value in batch.tolist():
+            expected.append(value not in seen)
+            seen.add(value)
+        assert index.add(batch).tolist() == expected
+    assert len(index._runs) > 1
+    assert len(index) == len(seen)
+    assert all(value in index for value in seen)
+    assert not any(value in index for value in set(range(2000)) - seen)
+
+
+def test_extreme_hashes():
+    index = DedupIndex()
+    top = np.iinfo(np.uint64).max
+    index.add(np.array([0, top], dtype=np.uint64))
+    index.add(np.array([5], dtype=np.uint64))
+    assert 0 in index and top in index and 5 in index
+    assert 1 not in index and top - 1 not in index
+    assert index.add(np.array([top, 0, 6], dtype=np.uint64)).tolist() == [False, False, True]
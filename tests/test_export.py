@@ -0,0 +1,55 @@
+import asyncio
+import io
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaning import export
+from data_cleaning.export import frame_response, write_xlsx
+
+
+def test_write_xlsx_infinite_values():
+    df = pd.DataFrame({
+        "a": [1.0, np.inf, -np.inf, np.nan],
+        "b": pd.array([np.inf, 2.5, None, 1], dtype="Float64"),
+        "nom": ["x", "y", None, "z"],
+    })
+    target = io.BytesIO()
+    write_xlsx(df, target, ["a"])
+    target.seek(0)
+    result = pd.read_excel(target)
+    # même rendu que to_excel (inf_rep="inf") : texte, relu en flottant
+    assert result["a"].tolist()[:3] == [1.0, np.inf, -np.inf]
+    assert np.isnan(result["a"].iloc[3])
+    assert result["b"].tolist()[:2] == [np.inf, 2.5]
+    assert result["nom"].tolist()[:2] == ["x", "y"]
+
+
+def test_write_xlsx_row_limit(monkeypatch):
+    monkeypatch.setattr(export, "XLSX_MAX_ROWS", 4)
+    with pytest.raises(ValueError, match="csv ou parquet"):
+        write_xlsx(pd.DataFrame({"a": range(4)}), io.BytesIO())
+
+
+def test_xlsx_response_leaves_no_temp_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    response = frame_response(pd.DataFrame({"a": [1, 2]}), "out", "xlsx")
+    # corps jamais lu : le fichier temporaire est déjà supprimé
+    assert list(tmp_path.iterdir()) == []
+
+    async def read():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    assert asyncio.run(read())[:2] == b"PK"
+
+
+def test_write_xlsx_in_row_blocks():
+    df = pd.DataFrame({
+        "a": [1.0, np.nan, np.inf, 4.0, 5.0, -np.inf, 7.0],
+        "nom": ["x", np.nan, "z", "t", np.nan, "v", "w"],
+    })
+    target = io.BytesIO()
+    write_xlsx(df, target, batch_rows=3)  # blocs de 3, 3 et 1 lignes
+    target.seek(0)
+    pd.testing.assert_frame_equal(pd.read_excel(target), df)
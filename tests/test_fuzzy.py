@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaning.fuzzy import fuzzy_deduplicate
+
+ROWS = pd.DataFrame({
+    "id": [1, 2, 3, 4, 5, 6, 7, 8],
+    "nom": ["Jean Dupont", "Marie Curie", "jean  DUPOND", "Paul Martin",
+            "Marie Curie.", "Pauline Mercier", np.nan, np.nan],
+    "ville": ["Paris", "Lyon", "Paris", "Nice", "Lyon", "Nice", "Paris", "Paris"],
+})
+
+
+def test_near_duplicates_are_merged():
+    out = fuzzy_deduplicate(ROWS, columns=["nom"])
+    # premier représentant de chaque grappe, lignes vides laissées seules
+    assert out["id"].tolist() == [1, 2, 4, 6, 7, 8]
+    assert out.set_index("id")["cluster_size"].to_dict() == {1: 2, 2: 2, 4: 1, 6: 1, 7: 1, 8: 1}
+
+
+def test_keep_all_labels_every_row():
+    out = fuzzy_deduplicate(ROWS, columns=["nom"], keep_all=True)
+    assert len(out) == len(ROWS)
+    clusters = out.set_index("id")["cluster_id"]
+    assert clusters[1] == clusters[3] and clusters[2] == clusters[5]
+    assert clusters.drop([3, 5]).is_unique
+
+
+def test_blocking_keeps_rows_of_other_blocks():
+    rows = ROWS.assign(ville=["Paris", "Lyon", "Nice", "Nice", "Lyon", "Nice", "Paris", "Paris"])
+    out = fuzzy_deduplicate(rows, columns=["nom"], block_on=["ville"])
+    assert out["id"].tolist() == [1, 2, 3, 4, 6, 7, 8]
+
+
+def test_strict_threshold_keeps_distinct_rows():
+    out = fuzzy_deduplicate(ROWS, columns=["nom"], similarity=1.0)
+    # seules les différences effacées par la normalisation (ponctuation) restent fusionnées
+    assert out["id"].tolist() == [1, 2, 3, 4, 6, 7, 8]
+
+
+def test_invalid_similarity():
+    with pytest.raises(ValueError):
+        fuzzy_deduplicate(ROWS, columns=["nom"], similarity=1.5)
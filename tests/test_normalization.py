@@ -0,0 +1,20 @@
+import pandas as pd
+
+from data_cleaning.normalization import clean_text, clean_text_column
+
+
+def test_clean_text_column_matches_apply():
+    series = pd.Series([" Élodie  Martin", "Nice!!", None, "Zoë\tDupont", 3])
+    expected = series.apply(clean_text).apply(clean_text)
+    assert clean_text_column(series, twice=True).tolist() == expected.tolist()
+
+
+def test_clean_text_column_categorical():
+    series = pd.Series([" Paris ", None, "LYON", " Paris "], dtype="category")
+    assert clean_text_column(series).tolist() == ["paris", "", "lyon", "paris"]
+
+
+def test_clean_text_column_categorical_without_categories():
+    # colonne dictionnaire entièrement nulle (Parquet, dataset en cache)
+    series = pd.Series([None, None], dtype=pd.CategoricalDtype([]))
+    assert clean_text_column(series).tolist() == ["", ""]
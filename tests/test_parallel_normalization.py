@@ -0,0 +1,36 @@
+import tempfile
+
+import pandas as pd
+import pytest
+
+from data_cleaning import parallel_normalization
+from data_cleaning.dedup_index import row_hashes
+from data_cleaning.normalization import normalize_for_duplicates
+from data_cleaning.parallel_normalization import parallel_row_hashes
+from data_cleaning.workers import WorkerPool
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"nom": [" Élodie ", "BOB", None, "bob "] * 50, "age": [1, 2, None, 2] * 50})
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool("thread", workers=2, max_queue=8)
+    yield pool
+    pool.shutdown()
+
+
+def test_shared_memory_unavailable_falls_back_to_temp_dir(monkeypatch, frame, pool):
+    monkeypatch.setattr(parallel_normalization, "SHARED_DIR", "/inexistant/shm")
+    hashes = parallel_row_hashes(frame, pool=pool)
+    assert (hashes == row_hashes(normalize_for_duplicates(frame))).all()
+
+
+def test_no_space_anywhere_returns_none(monkeypatch, frame, pool):
+    monkeypatch.setattr(parallel_normalization, "SHARED_DIR", "/inexistant/shm")
+    monkeypatch.setattr(tempfile, "tempdir", "/inexistant/tmp")
+    assert parallel_row_hashes(frame, pool=pool) is None
@@ -0,0 +1,16 @@
+import pytest
+
+from data_cleaning.pipeline import parse_plan
+
+
+def test_parse_plan_defaults():
+    (step,) = parse_plan('[{"op": "dedup", "mode": "fuzzy"}]')
+    assert step["mode"] == "fuzzy" and step["num_perm"] > 0 and step["block_on"] is None
+
+
+@pytest.mark.parametrize("options", [
+    '"num_perm": null', '"ngram": [3]', '"similarity": "haute"', '"block_on": "ville"',
+])
+def test_parse_plan_invalid_fuzzy_settings(options):
+    with pytest.raises(ValueError):
+        parse_plan('[{"op": "dedup", "mode": "fuzzy", %s}]' % options)
@@ -0,0 +1,18 @@
+import io
+
+import pandas as pd
+import pytest
+
+from data_cleaning.readers import read_with_fallback
+
+
+@pytest.mark.parametrize("text", [
+    "a\n0x10\n5\n",
+    "a\n99999999999999999999\n1\n",
+    "a\n18446744073709551615\n1\n",
+    "a\n+5\n1\n",
+    "a\n0.12345678901234567\n1.0000000000000002\n",
+])
+def test_default_csv_engine_matches_read_csv(text):
+    result = read_with_fallback(io.BytesIO(text.encode()), "csv")
+    pd.testing.assert_frame_equal(result, pd.read_csv(io.StringIO(text)))
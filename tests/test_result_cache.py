@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from data_cleaning import readers
+from data_cleaning.result_cache import ResultCache
+from main import app
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    for module in ("full_cleaning", "deduplication", "missing_values", "outliers"):
+        monkeypatch.setattr(f"data_cleaning.{module}.result_cache", ResultCache(str(tmp_path)))
+    return TestClient(app)
+
+
+CSV = pd.DataFrame({"nom": ["a", "A ", "b"], "age": [1.0, None, 3.0]}).to_csv(index=False).encode()
+
+
+def post(client, headers=None):
+    return client.post("/fill-missing", files={"file": ("x.csv", CSV)},
+                       data={"output_format": "csv"}, headers=headers or {})
+
+
+def test_etag_and_if_none_match(client):
+    first = post(client)
+    etag = first.headers["etag"]
+    again = post(client)
+    assert again.content == first.content and again.headers["etag"] == etag
+    not_modified = post(client, {"If-None-Match": f'W/{etag}, "autre"'})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+
+
+def test_if_none_match_star_requires_stored_result(client):
+    # rien de calculé : "*" ne correspond à aucune représentation
+    first = post(client, {"If-None-Match": "*"})
+    assert first.status_code == 200 and first.content
+    assert post(client, {"If-None-Match": "*"}).status_code == 304
+
+
+def test_key_depends_on_load_settings(monkeypatch, tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("/fill-missing", dataset_id="abc", params={"method": "median"})
+    assert cache.key("/fill-missing", dataset_id="abc", params={"method": "median"}) == key
+    with monkeypatch.context() as patch:
+        patch.setattr("data_cleaning.utils.COMPACT_DTYPES", True)
+        assert cache.key("/fill-missing", dataset_id="abc", params={"method": "median"}) != key
+    with monkeypatch.context() as patch:
+        patch.setitem(readers.DEFAULT_ORDER, "csv", ["pyarrow", "pandas"])
+        assert cache.key("/fill-missing", dataset_id="abc", params={"method": "median"}) != key
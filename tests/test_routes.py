@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from data_cleaning.result_cache import ResultCache
+from main import app
+
+CSV = pd.DataFrame({"age": [1.0, None, 300.0, 4.0, 5.0]}).to_csv(index=False).encode()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for module in ("deduplication", "missing_values", "outliers"):
+        monkeypatch.setattr(f"data_cleaning.{module}.result_cache", ResultCache(max_bytes=0))
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("route, module", [
+    ("/deduplicate", "deduplication"), ("/fill-missing", "missing_values"), ("/remove-outliers", "outliers"),
+])
+def test_execution_errors_are_reported(client, monkeypatch, route, module):
+    def failing(*args, **kwargs):
+        raise ValueError("Colonnes introuvables : x")
+    monkeypatch.setattr(f"data_cleaning.{module}.execute", failing)
+    response = client.post(route, files={"file": ("x.csv", CSV)})
+    assert response.status_code == 200
+    assert response.json() == {"error": "Colonnes introuvables : x"}
@@ -0,0 +1,29 @@
+import io
+
+import pandas as pd
+import pytest
+from fastapi import UploadFile
+
+from data_cleaning.schema import sniff_upload
+from data_cleaning.utils import load_file
+
+
+def upload(content: bytes, filename: str) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=filename)
+
+
+@pytest.mark.parametrize("filename", ["data.csv", "data.xlsx"])
+def test_sniff_types_match_load_file(filename):
+    df = pd.DataFrame({"age": [31, None, 45], "nom": ["a", "b", None], "revenu": [1.5, 2.0, 3.25]})
+    target = io.BytesIO()
+    if filename.endswith(".csv"):
+        df.to_csv(target, index=False)
+    else:
+        df.to_excel(target, index=False)
+    content = target.getvalue()
+
+    schema = sniff_upload(upload(content, filename))
+    loaded, _ = load_file(upload(content, filename))
+    assert schema["rows"] == len(loaded) and schema["rows_exact"]
+    assert {c["name"]: c["dtype"] for c in schema["columns"]} == {
+        col: str(dtype) for col, dtype in loaded.dtypes.items()}
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from data_cleaning.sketches import ColumnSketches, KLLSketch
+
+QS = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+def rank_errors(values: np.ndarray, estimates) -> list:
+    """Écart de rang normalisé entre chaque estimation et le quantile exact."""
+    ordered = np.sort(values)
+    n = len(ordered)
+    errors = []
+    for q, estimate in zip(QS, estimates):
+        low = np.searchsorted(ordered, estimate, side="left")
+        high = np.searchsorted(ordered, estimate, side="right")
+        target = q * (n - 1)
+        errors.append(max(0.0, low - target, target - high) / n)
+    return errors
+
+
+@pytest.mark.parametrize("error", [0.05, 0.01])
+def test_quantiles_within_rank_error(error):
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(10, 1, 200_000)
+    # deux workers alimentés par morceaux, puis fusionnés
+    left, right = KLLSketch.for_error(error), KLLSketch.for_error(error, seed=1)
+    for chunk in np.array_split(values[:120_000], 12):
+        left.update(chunk)
+    for chunk in np.array_split(values[120_000:], 5):
+        right.update(chunk)
+    sketch = left.merge(right)
+
+    assert sketch.n == len(values) and len(sketch) < len(values) // 10
+    estimates = sketch.quantiles(QS)
+    assert estimates[0] == values.min() and estimates[-1] == values.max()
+    assert max(rank_errors(values, estimates)) <= error
+
+
+def test_small_columns_are_exact():
+    rng = np.random.default_rng(2)
+    values = rng.normal(size=50)
+    sketches = ColumnSketches(["x"], error=0.01).update({"x": values})
+    expected = np.quantile(values, QS)
+    assert np.allclose(list(sketches.quantiles(QS)["x"].values()), expected)
@@ -0,0 +1,49 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from data_cleaning.result_cache import ResultCache
+from data_cleaning.streaming import clean_csv_stream
+from main import app
+
+
+def dirty_csv(n_rows: int = 60) -> bytes:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(n_rows) + 1,
+        "nom": rng.choice(["Alice", "Bob", "Chloé", "Élodie"], n_rows),
+        "ville": rng.choice(["Paris", "Lyon", "Nice"], n_rows),
+        "age": rng.integers(18, 90, n_rows).astype(float),
+        "revenu": np.round(rng.lognormal(10, 0.5, n_rows), 2),
+    })
+    df.loc[[3, 17], "age"] = [500.0, -40.0]
+    df.loc[[5, 29, 41], "revenu"] = np.nan
+    df.loc[[8, 33], "nom"] = np.nan
+    copies = df.iloc[[2, 11, 23, 50]].copy()
+    copies["nom"] = " " + copies["nom"].str.upper() + "  "
+    return pd.concat([df, copies], ignore_index=True).to_csv(index=False).encode()
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"missing_method": "mean", "outlier_method": "median", "detector": "mad"},
+    {"missing_method": "constant", "missing_value": "0", "outlier_method": "mean", "detector": "zscore"},
+])
+def test_streaming_matches_in_memory(monkeypatch, tmp_path, params):
+    monkeypatch.setattr("data_cleaning.full_cleaning.result_cache", ResultCache(max_bytes=0))
+    data = dirty_csv()
+    response = TestClient(app).post("/clean-all-and-download", files={"file": ("x.csv", data)},
+                                    data={"output_format": "csv", **params})
+    assert response.status_code == 200
+    in_memory = pd.read_csv(io.BytesIO(response.content))
+
+    # morceaux de 7 lignes : doublons et statistiques à cheval sur plusieurs morceaux
+    output = tmp_path / "flux.csv"
+    clean_csv_stream(io.BytesIO(data), str(output), chunk_rows=7, **params)
+    streamed = pd.read_csv(output)
+
+    assert streamed["id"].is_unique
+    pd.testing.assert_frame_equal(streamed, in_memory)
@@ -0,0 +1,22 @@
+import threading
+
+from data_cleaning.workers import WorkerPool
+
+
+def test_discard_keeps_other_requests_tasks():
+    pool = WorkerPool("thread", workers=1, max_queue=4)
+    release = threading.Event()
+    executor = pool.executor
+    running = pool.submit(release.wait, 5)
+    queued = pool.submit(lambda: "fini")
+
+    pool.discard(object())  # exécuteur déjà remplacé : sans effet
+    assert pool.executor is executor
+    pool.discard(executor)
+    assert pool.executor is not executor  # nouvel exécuteur pour la suite
+
+    release.set()
+    # les tâches de l'ancien exécuteur ne sont pas annulées
+    assert running.result(timeout=5) is True
+    assert queued.result(timeout=5) == "fini"
+    pool.shutdown()